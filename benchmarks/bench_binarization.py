@@ -0,0 +1,99 @@
+"""
+Integral-image binarization (Sauvola, Wolf) vs. adaptive threshold + NLMeans.
+
+Renders light, noisy, dark-theme (the dashboard's own colors) and colored
+captures plus a 4K page, binarizes each with every method and reports the
+median time of the binarization chain and the character error rate of
+Tesseract on its output (--psm 6, no escalation). The 4K page is timed only.
+
+    python benchmarks/bench_binarization.py [--runs 3]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import numpy as np
+from config import COLORS
+from evaluation import edit_distance, normalize_text
+from ocr_engine import create_engine
+from preprocessing import run_pipeline
+from synthetic_text import render_text_image, text_for_lines
+
+GRAYSCALE = {'stage': 'grayscale'}
+CHAINS = {
+    'adaptive+nlmeans': [GRAYSCALE, {'stage': 'binarize', 'method': 'adaptive'}, {'stage': 'denoise'}],
+    'adaptive': [GRAYSCALE, {'stage': 'binarize', 'method': 'adaptive'}, {'stage': 'denoise', 'when': 'noisy'}],
+    'sauvola': [GRAYSCALE, {'stage': 'binarize', 'method': 'sauvola'}],
+    'wolf': [GRAYSCALE, {'stage': 'binarize', 'method': 'wolf'}],
+}
+
+
+def hex_color(value):
+    """'#rrggbb' to a BGR triple"""
+    return np.array([int(value[5:7], 16), int(value[3:5], 16), int(value[1:3], 16)], dtype=np.float32)
+
+
+def capture(text, background='#ffffff', foreground='#000000', **kwargs):
+    """Render text and tint it, keeping the anti-aliasing, as a BGR capture"""
+    gray = render_text_image(text, padding=16, **kwargs)[:, :, :1].astype(np.float32) / 255.0
+    image = hex_color(background) * gray + hex_color(foreground) * (1.0 - gray)
+    return np.clip(image, 0, 255).astype(np.uint8)
+
+
+def cases():
+    block = text_for_lines(4, offset=3)
+    return [
+        ('light', capture(block, font_size=14), block, True),
+        ('noisy', capture(block, font_size=16, noise=12.0, seed=5), block, True),
+        ('dark theme', capture(block, COLORS['bg'], COLORS['fg'], font_size=14), block, True),
+        ('dark noisy', capture(block, COLORS['button_bg'], COLORS['fg'], font_size=16, noise=10.0, seed=7),
+         block, True),
+        ('accent', capture(block, COLORS['accent'], COLORS['fg'], font_size=14), block, True),
+        ('4K page', capture(text_for_lines(40), font_size=22, size=(3840, 2160)), None, False),
+    ]
+
+
+def cer(reference, text):
+    reference, text = normalize_text(reference), normalize_text(text)
+    return edit_distance(reference, text) / max(1, len(reference))
+
+
+def run(image, pipeline, runs):
+    samples = []
+    binary = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        binary = run_pipeline(image, pipeline, force=False).image
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), binary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--backend', default='auto', choices=['auto', 'tesserocr', 'pytesseract'])
+    args = parser.parse_args()
+
+    engine = create_engine(args.backend, pool_size=1)
+    print(f"{'case':<12} " + " ".join(f"{name:>21}" for name in CHAINS))
+    print(f"{'':<12} " + " ".join(f"{'ms':>10} {'CER':>10}" for _ in CHAINS))
+    for name, image, reference, ocr in cases():
+        cells = []
+        for pipeline in CHAINS.values():
+            # NLMeans on a 4K frame takes seconds; once is enough
+            slow = any(spec['stage'] == 'denoise' and 'when' not in spec for spec in pipeline)
+            runs = 1 if slow and image.size > 8_000_000 else args.runs
+            seconds, binary = run(image, pipeline, runs)
+            error = f"{cer(reference, engine.image_to_string(binary, '--psm 6')):10.3f}" if ocr else f"{'-':>10}"
+            cells.append(f"{seconds * 1000:10.1f} {error}")
+        print(f"{name:<12} " + " ".join(cells))
+    engine.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""
+Bytes copied and time per capture: the original capture path vs. a backend.
+
+The original path (PIL screenshot -> np.array -> RGB2BGR -> BGR2GRAY, then
+a second BGR2GRAY in enhance_image) is replayed on the same frame the
+backend serves, so both columns describe the same pixels.
+
+    python benchmarks/bench_capture.py                    # synthetic frame
+    python benchmarks/bench_capture.py --backend mss --xvfb
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import cv2
+import numpy as np
+from PIL import Image
+from capture_backends import SyntheticBackend, XvfbDisplay, create_backend
+from synthetic_text import render_text_image, text_for_lines
+
+REGIONS = [(400, 40), (1280, 400), (1920, 1080)]
+
+
+def legacy_capture(frame_rgb, x, y, width, height):
+    """Replay the original conversions and return (gray, bytes written)"""
+    screenshot = Image.fromarray(frame_rgb[y:y + height, x:x + width])  # stands in for pyautogui
+    image_array = np.array(screenshot)
+    image = cv2.cvtColor(image_array, cv2.COLOR_RGB2BGR)
+    discarded_gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    written = width * height * 3 + image_array.nbytes + image.nbytes + discarded_gray.nbytes + gray.nbytes
+    return gray, written
+
+
+def traced_allocation(func):
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def time_calls(func, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def run(backend, frame_rgb, runs):
+    print(f"{'region':<11} {'legacy KB':>10} {backend.name + ' KB':>12} {'legacy peak':>12} "
+          f"{'backend peak':>13} {'legacy ms':>10} {'backend ms':>11}")
+    for width, height in REGIONS:
+        out = np.empty((height, width), dtype=np.uint8)
+        _, legacy_bytes = legacy_capture(frame_rgb, 0, 0, width, height)
+        backend.grab_gray(0, 0, width, height, out=out)
+        backend_bytes = backend.last_bytes_copied
+        legacy_peak = traced_allocation(lambda: legacy_capture(frame_rgb, 0, 0, width, height))
+        backend_peak = traced_allocation(lambda: backend.grab_gray(0, 0, width, height, out=out))
+        legacy_ms = time_calls(lambda: legacy_capture(frame_rgb, 0, 0, width, height), runs)
+        backend_ms = time_calls(lambda: backend.grab_gray(0, 0, width, height, out=out), runs)
+        print(f"{width}x{height:<6} {legacy_bytes / 1024:10.0f} {backend_bytes / 1024:12.0f} "
+              f"{legacy_peak / 1024:12.0f} {backend_peak / 1024:13.0f} {legacy_ms:10.2f} {backend_ms:11.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--backend', default='synthetic', choices=['synthetic', 'mss', 'pyautogui'])
+    parser.add_argument('--xvfb', action='store_true', help="Start a virtual X server for mss/pyautogui")
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    frame_rgb = render_text_image(text_for_lines(40), size=(1920, 1080))
+    if args.backend == 'synthetic':
+        backend = SyntheticBackend(text_for_lines(40))
+        run(backend, frame_rgb, args.runs)
+        return
+    display = XvfbDisplay(1920, 1080).start() if args.xvfb else None
+    try:
+        backend = create_backend(args.backend)
+        run(backend, frame_rgb, args.runs)
+        backend.close()
+    finally:
+        if display:
+            display.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Cost of confidence-driven escalation vs. enhancing every capture.
+
+Runs ocr_image on clean, noisy and dark captures and a large page with
+escalation on (plain grayscale pass, unsure lines re-read) and off (full
+preprocessing pipeline first), and reports latency, escalated lines and
+accuracy against the rendered text (line counts need metrics on, i.e.
+SCREEN_OCR_METRICS unset). Then times the per-line bookkeeping of
+a 5000-word page in WordBoxes against the same work on a list of word dicts.
+
+    python benchmarks/bench_escalation.py [--runs 3]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import cv2
+import numpy as np
+import ocr_pipeline
+from evaluation import edit_distance, normalize_text
+from instrumentation import metrics
+from ocr_engine import create_engine
+from synthetic_text import render_text_image, text_for_lines
+from word_boxes import WordBoxes
+
+
+def case(text, **kwargs):
+    return cv2.cvtColor(render_text_image(text, padding=16, **kwargs), cv2.COLOR_RGB2BGR), text
+
+
+CASES = [
+    ('clean line', case(text_for_lines(1, offset=1), font_size=14)),
+    ('clean block', case(text_for_lines(6), font_size=14)),
+    ('noisy block', case(text_for_lines(4, offset=2), font_size=16, noise=12.0, seed=3)),
+    ('dark block', case(text_for_lines(4, offset=4), font_size=14, background=30, foreground=220)),
+    ('page', case(text_for_lines(30), font_size=16)),
+]
+
+
+def cer(reference, text):
+    reference, text = normalize_text(reference), normalize_text(text)
+    return edit_distance(reference, text) / max(1, len(reference))
+
+
+def run(image, engine, runs):
+    samples = []
+    text = ''
+    for _ in range(runs):
+        start = time.perf_counter()
+        text = ocr_pipeline.ocr_image(image, engine)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), text
+
+
+def synthetic_page(words=5000, per_line=20, seed=0):
+    rng = np.random.default_rng(seed)
+    lines = np.arange(words) // per_line
+    boxes = np.column_stack([(np.arange(words) % per_line) * 60, lines * 20,
+                             np.full(words, 50), np.full(words, 16)])
+    return WordBoxes([f"w{i}" for i in range(words)], boxes, rng.uniform(40, 96, words), lines)
+
+
+def dict_bookkeeping(words, threshold):
+    """The same steps on one dict per word"""
+    by_line = {}
+    for word in words:
+        by_line.setdefault(word['line'], []).append(word)
+    unsure = [line for line, items in by_line.items() if min(w['conf'] for w in items) < threshold]
+    replaced = set(unsure[::2])
+    merged = []
+    for line in sorted(by_line):
+        merged.extend(dict(w, conf=99.0) for w in by_line[line]) if line in replaced else merged.extend(by_line[line])
+    return "\n".join(" ".join(w['text'] for w in by_line[line]) for line in sorted(by_line)), merged
+
+
+def boxes_bookkeeping(words, threshold):
+    numbers, _, lowest = words.line_confidence()
+    _, starts, ends = words.lines()
+    unsure = np.flatnonzero(lowest < threshold)[::2]
+    replacements = {}
+    for index in unsure.tolist():
+        start, end = starts[index], ends[index]
+        replacements[int(numbers[index])] = WordBoxes(words.texts[start:end], words.boxes[start:end],
+                                                      np.full(end - start, 99.0), words.line[start:end])
+    merged = words.splice(replacements)
+    return merged.text(), merged
+
+
+def time_it(func, runs=20):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--backend', default='auto', choices=['auto', 'tesserocr', 'pytesseract'])
+    args = parser.parse_args()
+
+    engine = create_engine(args.backend, pool_size=1)
+    ocr_pipeline.ocr_image(CASES[0][1][0], engine)
+    print(f"{'case':<12} {'full ms':>8} {'escal. ms':>9} {'speedup':>8} {'lines':>6} {'escalated':>9} "
+          f"{'full CER':>8} {'escal. CER':>10}")
+    for name, (image, reference) in CASES:
+        ocr_pipeline.ESCALATION_ENABLED = False
+        full_time, full_text = run(image, engine, args.runs)
+        ocr_pipeline.ESCALATION_ENABLED = True
+        before = metrics.snapshot()[1]
+        escalated_time, text = run(image, engine, args.runs)
+        after = metrics.snapshot()[1]
+        lines, escalated = ((after.get(counter, 0) - before.get(counter, 0)) // args.runs
+                            for counter in ('escalation_lines', 'escalation_lines_escalated'))
+        print(f"{name:<12} {full_time * 1000:8.1f} {escalated_time * 1000:9.1f} {full_time / escalated_time:8.2f} "
+              f"{lines:6d} {escalated:9d} {cer(reference, full_text):8.3f} {cer(reference, text):10.3f}")
+    engine.close()
+
+    page = synthetic_page()
+    as_dicts = page.as_dicts()
+    dict_time = time_it(lambda: dict_bookkeeping(as_dicts, 60.0))
+    boxes_time = time_it(lambda: boxes_bookkeeping(page, 60.0))
+    print(f"\n5000-word page, find unsure lines + splice + text: dicts {dict_time * 1000:.2f} ms, "
+          f"WordBoxes {boxes_time * 1000:.2f} ms ({dict_time / boxes_time:.1f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
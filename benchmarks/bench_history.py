@@ -0,0 +1,98 @@
+"""
+Capture history at scale.
+
+Fills a temporary history with --entries synthetic captures through the
+background writer, then reports the cost of add() on the capture path, the
+writer's throughput, search/recent/count latency and one eviction pass.
+
+    python benchmarks/bench_history.py [--entries 300000] [--runs 20]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from capture_history import CaptureHistory
+from synthetic_text import SAMPLE_LINES
+
+QUERIES = ['invoice', 'quick brown', 'lorem ipsum dolor', 'zzzunmatched', 'err']
+
+
+def synthetic_text(rng, index):
+    lines = rng.sample(SAMPLE_LINES, k=min(3, len(SAMPLE_LINES)))
+    return "\n".join(lines) + f"\ninvoice {index} total {rng.randint(1, 9999)}.{rng.randint(0, 99):02d}"
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def timed(func, runs):
+    samples = []
+    result = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = func()
+        samples.append(time.perf_counter() - start)
+    return samples, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--entries', type=int, default=300000)
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        history = CaptureHistory(os.path.join(tmp, 'history.sqlite3'), max_entries=0,
+                                 max_age_days=0, max_bytes=0, flush_interval=0.05)
+        add_samples = []
+        start = time.perf_counter()
+        for i in range(args.entries):
+            text = synthetic_text(rng, i)
+            while True:
+                began = time.perf_counter()
+                queued = history.add(text, (0, 0, 800, 200))
+                add_samples.append(time.perf_counter() - began)
+                if queued:
+                    break
+                # The bounded queue is full; a real capture would be dropped
+                history.flush()
+        history.flush()
+        elapsed = time.perf_counter() - start
+        size_mb = os.path.getsize(os.path.join(tmp, 'history.sqlite3')) / 1e6
+        print(f"entries:            {history.count()} ({size_mb:.1f} MB)")
+        print(f"add() on capture:   p50 {percentile(add_samples, 0.5) * 1e6:.1f} us, "
+              f"p99 {percentile(add_samples, 0.99) * 1e6:.1f} us")
+        print(f"writer throughput:  {args.entries / elapsed:.0f} entries/s")
+
+        print(f"{'query':<20} {'hits':>6} {'p50 ms':>8} {'p95 ms':>8}")
+        for query in QUERIES:
+            samples, results = timed(lambda: history.search(query, 100), args.runs)
+            print(f"{query:<20} {len(results):6d} {statistics.median(samples) * 1000:8.2f} "
+                  f"{percentile(samples, 0.95) * 1000:8.2f}")
+        samples, _ = timed(lambda: history.search('invoice', 100, 5000), args.runs)
+        print(f"{'invoice (page 50)':<20} {100:6d} {statistics.median(samples) * 1000:8.2f} "
+              f"{percentile(samples, 0.95) * 1000:8.2f}")
+        samples, _ = timed(lambda: history.recent(100), args.runs)
+        print(f"{'recent':<20} {100:6d} {statistics.median(samples) * 1000:8.2f} "
+              f"{percentile(samples, 0.95) * 1000:8.2f}")
+        samples, _ = timed(history.count, args.runs)
+        print(f"count(): {statistics.median(samples) * 1000:.2f} ms")
+
+        history.max_entries = args.entries // 2
+        start = time.perf_counter()
+        removed = history.evict()
+        print(f"evict {removed} oldest entries: {(time.perf_counter() - start) * 1000:.0f} ms")
+        history.close()
+
+
+if __name__ == "__main__":
+    main()
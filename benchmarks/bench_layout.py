@@ -0,0 +1,77 @@
+"""
+Latency gained by the layout classifier per selection class.
+
+Renders a single word, single lines, a text block, two columns and sparse
+labels, preprocesses each once, then times OCR with Tesseract's default
+automatic layout analysis against the mode picked by the classifier and
+reports how close the two texts are.
+
+    python benchmarks/bench_layout.py [--runs 5]
+"""
+import argparse
+import difflib
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import numpy as np
+from config import PREPROCESSING_PIPELINE
+from layout import classify_layout
+from ocr_engine import create_engine
+from ocr_pipeline import is_dark_text
+from preprocessing import run_pipeline
+from synthetic_text import render_text_image, text_for_lines
+
+
+def two_columns(line_count, width=560, gutter=80):
+    left = render_text_image(text_for_lines(line_count), size=(width, 30 * line_count))
+    right = render_text_image(text_for_lines(line_count, offset=3), size=(width, 30 * line_count))
+    return np.hstack([left, np.full((left.shape[0], gutter, 3), 255, np.uint8), right])
+
+
+CASES = [
+    ('word', render_text_image("0x80070005")),
+    ('filename', render_text_image("C:\\Users\\admin\\AppData\\Local\\Temp\\setup.log")),
+    ('line', render_text_image("Error 0x80070005: Access is denied.")),
+    ('block', render_text_image(text_for_lines(8))),
+    ('columns', two_columns(6)),
+    ('sparse', render_text_image("File\n\n\n\n\n\nEdit\n\n\n\n\n\nView\n\n\n\n\n\nHelp")),
+]
+
+
+def median_time(func, runs):
+    samples = []
+    result = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--backend', default='auto', choices=['auto', 'tesserocr', 'pytesseract'])
+    args = parser.parse_args()
+
+    engine = create_engine(args.backend, pool_size=1)
+    print(f"{'case':<10} {'class':<8} {'classify ms':>11} {'auto ms':>9} {'picked ms':>10} "
+          f"{'speedup':>8} {'similarity':>11}")
+    for name, image in CASES:
+        dark_text = is_dark_text(image, PREPROCESSING_PIPELINE)
+        enhanced = run_pipeline(image).image
+        classify, layout = median_time(lambda: classify_layout(enhanced, dark_text=dark_text), args.runs)
+        auto, reference = median_time(lambda: engine.image_to_string(enhanced).strip(), args.runs)
+        picked, text = median_time(lambda: engine.image_to_string(enhanced, layout.config).strip(), args.runs)
+        similarity = difflib.SequenceMatcher(None, reference, text).ratio()
+        print(f"{name:<10} {layout.name:<8} {classify * 1000:11.2f} {auto * 1000:9.1f} {picked * 1000:10.1f} "
+              f"{auto / (picked + classify):8.2f} {similarity:11.3f}")
+    engine.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Speedup of parallel line-band OCR over a single whole-image OCR call.
+
+Renders multi-paragraph captures, preprocesses them once, then times plain
+OCR against band OCR on 1..N workers and reports how close the text is.
+
+    python benchmarks/bench_line_bands.py [--runs 3] [--workers 1 2 4]
+"""
+import argparse
+import concurrent.futures
+import difflib
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import cv2
+from ocr_engine import create_engine
+from ocr_pipeline import enhance_image
+from line_bands import find_text_lines, ocr_bands
+from synthetic_text import render_text_image, text_for_lines
+
+
+def paragraphs(count, lines_per_paragraph):
+    return "\n\n".join(text_for_lines(lines_per_paragraph, offset=i * 3) for i in range(count))
+
+
+CASES = [
+    ('3 paragraphs', paragraphs(3, 4), (1280, 720)),
+    ('6 paragraphs', paragraphs(6, 5), (1600, 1400)),
+]
+
+
+def median_time(func, runs):
+    samples = []
+    result = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--backend', default='auto', choices=['auto', 'tesserocr', 'pytesseract'])
+    args = parser.parse_args()
+
+    engine = create_engine(args.backend, pool_size=max(args.workers))
+    print(f"CPU cores: {os.cpu_count()}")
+    print(f"{'case':<14} {'lines':>5} {'mode':<10} {'ms':>9} {'speedup':>8} {'similarity':>11}")
+    for name, text, size in CASES:
+        image = enhance_image(cv2.cvtColor(render_text_image(text, size=size), cv2.COLOR_RGB2BGR))
+        lines = find_text_lines(image)
+        serial, reference = median_time(lambda: engine.image_to_string(image).strip(), args.runs)
+        print(f"{name:<14} {len(lines):5d} {'serial':<10} {serial * 1000:9.1f} {1.0:8.2f} {1.0:11.3f}")
+        for workers in args.workers:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+                elapsed, banded = median_time(
+                    lambda: ocr_bands(image, engine, executor, workers, lines), args.runs)
+            similarity = difflib.SequenceMatcher(None, reference, banded).ratio()
+            print(f"{name:<14} {len(lines):5d} {f'bands x{workers}':<10} {elapsed * 1000:9.1f} "
+                  f"{serial / elapsed:8.2f} {similarity:11.3f}")
+    engine.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Peak memory of a 4K full-screen capture through the capture pipeline.
+
+Grabs a synthetic 3840x2160 screen into a pooled grayscale buffer and runs
+ocr_image on it repeatedly, the way the overlay does. For each capture it
+records the tracemalloc peak (numpy/OpenCV arrays) and the process RSS peak
+above the level after a warm-up capture, then fails if the worst capture
+exceeds --max-peak-mb or --max-rss-mb. --no-pool keeps the pool empty so
+every step allocates, for comparison.
+
+    python benchmarks/bench_memory.py [--captures 5] [--max-peak-mb 16]
+    python benchmarks/bench_memory.py --no-pool
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import psutil
+from buffer_pool import get_buffer_pool
+from capture_backends import SyntheticBackend
+from ocr_engine import create_engine
+from ocr_pipeline import ocr_image
+from synthetic_text import text_for_lines
+
+MB = 1024 * 1024
+WIDTH, HEIGHT = 3840, 2160
+
+
+class RSSSampler:
+    """Track the highest RSS seen while active"""
+
+    def __init__(self, interval=0.002):
+        self.process = psutil.Process()
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.peak = self.process.memory_info().rss
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, self.process.memory_info().rss)
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.process.memory_info().rss)
+        return False
+
+
+def capture(backend, engine, pool):
+    image = backend.grab_gray(0, 0, WIDTH, HEIGHT, out=pool.acquire((HEIGHT, WIDTH)))
+    try:
+        return ocr_image(image, engine)
+    finally:
+        pool.release(image)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--captures', type=int, default=5)
+    parser.add_argument('--lines', type=int, default=12, help="Text lines on the synthetic screen")
+    parser.add_argument('--font-size', type=int, default=20)
+    parser.add_argument('--max-peak-mb', type=float, default=16.0)
+    parser.add_argument('--max-rss-mb', type=float, default=64.0)
+    parser.add_argument('--no-pool', action='store_true', help="Allocate every buffer (pool disabled)")
+    parser.add_argument('--backend', default='auto', choices=['auto', 'tesserocr', 'pytesseract'])
+    args = parser.parse_args()
+
+    backend = SyntheticBackend(text_for_lines(args.lines), size=(WIDTH, HEIGHT), font_size=args.font_size)
+    engine = create_engine(args.backend, pool_size=1)
+    pool = get_buffer_pool()
+    if args.no_pool:
+        pool.max_bytes = 0
+        pool.clear()
+
+    # Warm-up: load traineddata, fill the pool, settle the allocator
+    capture(backend, engine, pool)
+    baseline_rss = psutil.Process().memory_info().rss
+    tracemalloc.start()
+    peaks = []
+    rss_peaks = []
+    times = []
+    for _ in range(args.captures):
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        with RSSSampler() as sampler:
+            text = capture(backend, engine, pool)
+        times.append(time.perf_counter() - start)
+        peaks.append(tracemalloc.get_traced_memory()[1] - current)
+        rss_peaks.append(sampler.peak - baseline_rss)
+    tracemalloc.stop()
+
+    frame_mb = WIDTH * HEIGHT / MB
+    print(f"4K capture: {WIDTH}x{HEIGHT} gray = {frame_mb:.1f} MB, pool {'off' if args.no_pool else 'on'}, "
+          f"{len(text.splitlines())} text lines recognized")
+    print(f"{'capture':>7} {'ms':>8} {'traced peak MB':>15} {'RSS peak +MB':>13}")
+    for i, (elapsed, peak, rss) in enumerate(zip(times, peaks, rss_peaks)):
+        print(f"{i + 1:7d} {elapsed * 1000:8.1f} {peak / MB:15.1f} {rss / MB:13.1f}")
+    print(f"pool: {pool.stats()}")
+
+    failures = []
+    if max(peaks) / MB > args.max_peak_mb:
+        failures.append(f"traced peak {max(peaks) / MB:.1f} MB > {args.max_peak_mb:.1f} MB")
+    if max(rss_peaks) / MB > args.max_rss_mb:
+        failures.append(f"RSS peak +{max(rss_peaks) / MB:.1f} MB > {args.max_rss_mb:.1f} MB")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    engine.close()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""
+Compare per-call OCR latency of the resident C API engine against pytesseract.
+
+Usage:
+    python benchmarks/bench_ocr_engine.py [--runs 20] [--pool-size 1]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+from ocr_engine import PytesseractEngine, TesseractAPIEngine
+
+
+def render_sample():
+    """Render a short grayscale line of text similar to a UI capture"""
+    image = Image.new('L', (640, 48), 255)
+    draw = ImageDraw.Draw(image)
+    draw.text((8, 8), "Error 0x80070005: Access is denied.", fill=0,
+              font=ImageFont.load_default(size=24))
+    return np.array(image)
+
+
+def time_engine(engine, image, runs):
+    # First call is reported separately so the cold start is visible
+    start = time.perf_counter()
+    engine.image_to_string(image)
+    first = time.perf_counter() - start
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        engine.image_to_string(image)
+        samples.append(time.perf_counter() - start)
+    return first, samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--pool-size', type=int, default=1)
+    args = parser.parse_args()
+
+    image = render_sample()
+    backends = [
+        ('tesserocr', lambda: TesseractAPIEngine(pool_size=args.pool_size)),
+        ('pytesseract', PytesseractEngine),
+    ]
+    print(f"{'backend':<12} {'first ms':>9} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9}")
+    for name, factory in backends:
+        try:
+            engine = factory()
+            first, samples = time_engine(engine, image, args.runs)
+            engine.close()
+        except Exception as e:
+            print(f"{name:<12} unavailable: {e}")
+            continue
+        samples.sort()
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        print(f"{name:<12} {first * 1000:9.1f} {statistics.mean(samples) * 1000:9.1f} "
+              f"{statistics.median(samples) * 1000:9.1f} {p95 * 1000:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
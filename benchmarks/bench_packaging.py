@@ -0,0 +1,116 @@
+"""
+Launch time and size of the frozen app per packaging profile.
+
+Builds each profile of package.py with PyInstaller (or reuses the existing
+builds with --skip-build), then launches the frozen executable --runs times
+with SCREEN_OCR_STARTUP_PROBE set and reports:
+
+- size: the executable, or the whole folder of a onedir bundle
+- launched: process start to main.py running (bootloader, unpacking,
+  interpreter and dashboard imports)
+- ocr stack: process start to the OCR pipeline imported (cv2, numpy, PIL),
+  measured without opening a window
+- first frame: process start to the dashboard's first <Map> event; needs an
+  X display, --xvfb starts one
+
+The first launch is reported separately: a onefile build pays for unpacking
+on every launch, but the first one also finds nothing in the page cache.
+
+    python benchmarks/bench_packaging.py [--profile startup] [--runs 5] [--skip-build] [--xvfb]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'src'))
+
+import package
+
+
+def launch(executable, headless, timeout=120):
+    """Run the frozen app once; returns {probe event: seconds since launch}"""
+    env = dict(os.environ, SCREEN_OCR_STARTUP_PROBE=repr(time.time()), SCREEN_OCR_METRICS='0')
+    if headless:
+        env['SCREEN_OCR_STARTUP_PROBE_HEADLESS'] = '1'
+    result = subprocess.run([str(executable)], env=env, capture_output=True, text=True, timeout=timeout)
+    events = {}
+    for line in result.stdout.splitlines():
+        parts = line.split()
+        if len(parts) == 2 and parts[0] in ('launched', 'ocr-stack', 'first-frame'):
+            events[parts[0]] = float(parts[1])
+    if 'launched' not in events:
+        raise RuntimeError(f"{executable} did not start:\n{result.stderr[-2000:]}")
+    return events
+
+
+def measure(executable, runs, window):
+    """Return {event: [seconds per run]}; the first launch is kept first"""
+    samples = {}
+    for _ in range(runs):
+        events = launch(executable, headless=True)
+        if window:
+            events.update((key, value) for key, value in launch(executable, headless=False).items()
+                          if key == 'first-frame')
+        for key, value in events.items():
+            samples.setdefault(key, []).append(value)
+    return samples
+
+
+def fmt(values):
+    if not values:
+        return f"{'-':>9} {'-':>9}"
+    rest = values[1:] or values
+    return f"{values[0] * 1000:9.0f} {statistics.median(rest) * 1000:9.0f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--profile', action='append', choices=sorted(package.PACKAGING_PROFILES),
+                        help="Profile to measure (repeatable, default: all)")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--skip-build', action='store_true', help="Measure the existing builds")
+    parser.add_argument('--xvfb', action='store_true', help="Start a virtual X server for the first-frame time")
+    args = parser.parse_args()
+
+    profiles = args.profile or list(package.PACKAGING_PROFILES)
+    builds = {}
+    for name in profiles:
+        if args.skip_build:
+            builds[name] = (package.profile_paths(name)[2], None, None)
+        else:
+            builds[name] = package.build_app(name)
+        if builds[name][0] is None or not builds[name][0].exists():
+            print(f"No executable for the '{name}' profile")
+            return 1
+
+    display = None
+    if args.xvfb:
+        from capture_backends import XvfbDisplay
+        display = XvfbDisplay(1280, 800).start()
+    window = bool(os.environ.get('DISPLAY')) or sys.platform == 'win32'
+    try:
+        results = [(name, measure(executable, args.runs, window)) for name, (executable, _, _) in builds.items()]
+    finally:
+        if display:
+            display.stop()
+
+    print(f"\n{'':<10} {'':>9} {'':>8}   {'launched ms':^19}   {'ocr stack ms':^19}   {'first frame ms':^19}")
+    print(f"{'profile':<10} {'size MB':>9} {'build s':>8}   {'first':>9} {'median':>9}   {'first':>9} {'median':>9}   "
+          f"{'first':>9} {'median':>9}")
+    for name, samples in results:
+        executable, build_time, _ = builds[name]
+        build = f"{build_time:8.1f}" if build_time is not None else f"{'-':>8}"
+        print(f"{name:<10} {package.bundle_size(executable) / (1024 * 1024):9.1f} {build}   "
+              f"{fmt(samples.get('launched'))}   {fmt(samples.get('ocr-stack'))}   {fmt(samples.get('first-frame'))}")
+    if not window:
+        print("first frame: skipped (no display; use --xvfb)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
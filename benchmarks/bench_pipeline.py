@@ -0,0 +1,213 @@
+"""
+Stage-level latency and memory benchmark for the capture-to-clipboard pipeline.
+
+Renders synthetic text images at several sizes, fonts and noise levels and
+runs them through the same stages as ScreenCaptureApp.process_image_async,
+without the GUI. Reports p50/p95 latency and peak traced memory per stage.
+Threshold and denoise are always both timed here; bench_preprocessing.py
+measures the cost-aware pipeline.
+
+    python benchmarks/bench_pipeline.py --save-baseline baseline.json
+    python benchmarks/bench_pipeline.py --baseline baseline.json --threshold 0.25
+
+Exits with status 1 when any stage p50 regresses past the threshold.
+Use --live-capture on an X display (e.g. Xvfb) to time a real pyautogui grab.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import cv2
+import numpy as np
+from PIL import Image
+from ocr_engine import create_engine
+from preprocessing import threshold_image, denoise_image
+from synthetic_text import render_text_image, text_for_lines
+
+STAGES = ['capture', 'rgb2bgr', 'bgr2gray', 'threshold', 'denoise', 'ocr', 'total']
+
+# name: (line count, canvas size or None for tight fit)
+SIZES = {
+    'line': (1, None),
+    'paragraph': (12, (1280, 400)),
+    'fullscreen': (40, (1920, 1080)),
+}
+FONTS = [('sans', 16), ('mono', 13)]
+NOISE_LEVELS = [0.0, 8.0, 20.0]
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def make_grabber(live_capture):
+    """Return a function producing the RGB array that pyautogui would hand us"""
+    if live_capture:
+        import pyautogui
+
+        def grab(rgb):
+            height, width = rgb.shape[:2]
+            return np.array(pyautogui.screenshot(region=(0, 0, width, height)))
+        return grab
+
+    def grab(rgb):
+        # Same PIL image -> numpy copy that process_image_async performs
+        return np.array(Image.fromarray(rgb))
+    return grab
+
+
+def run_stages(rgb, grab, engine, timings):
+    """Run one capture through every stage, appending seconds to timings"""
+    stage_start = total_start = time.perf_counter()
+
+    def mark(stage):
+        nonlocal stage_start
+        now = time.perf_counter()
+        timings[stage].append(now - stage_start)
+        stage_start = now
+
+    captured = grab(rgb)
+    mark('capture')
+    bgr = cv2.cvtColor(captured, cv2.COLOR_RGB2BGR)
+    mark('rgb2bgr')
+    gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+    mark('bgr2gray')
+    thresh = threshold_image(gray)
+    mark('threshold')
+    denoised = denoise_image(thresh)
+    mark('denoise')
+    engine.image_to_string(denoised)
+    mark('ocr')
+    timings['total'].append(time.perf_counter() - total_start)
+
+
+def measure_peak_memory(rgb, grab, engine):
+    """Peak traced allocation per stage, in bytes (Tesseract's own heap is not traced)"""
+    peaks = {}
+    tracemalloc.start()
+    try:
+        steps = [
+            ('capture', lambda _: grab(rgb)),
+            ('rgb2bgr', lambda img: cv2.cvtColor(img, cv2.COLOR_RGB2BGR)),
+            ('bgr2gray', lambda img: cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)),
+            ('threshold', threshold_image),
+            ('denoise', denoise_image),
+            ('ocr', engine.image_to_string),
+        ]
+        value = None
+        for stage, func in steps:
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+            value = func(value)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks[stage] = max(0, peak - baseline)
+        peaks['total'] = max(peaks.values())
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+
+def build_cases(quick):
+    sizes = ['line', 'paragraph'] if quick else list(SIZES)
+    fonts = FONTS[:1] if quick else FONTS
+    noises = [0.0, 20.0] if quick else NOISE_LEVELS
+    for size_name in sizes:
+        lines, canvas = SIZES[size_name]
+        for family, font_size in fonts:
+            for noise in noises:
+                name = f"{size_name}/{family}{font_size}/noise{int(noise)}"
+                rgb = render_text_image(text_for_lines(lines), font_size=font_size, family=family,
+                                        noise=noise, size=canvas)
+                yield name, rgb
+
+
+def run_suite(runs, quick, backend, live_capture):
+    engine = create_engine(backend)
+    grab = make_grabber(live_capture)
+    results = {}
+    for name, rgb in build_cases(quick):
+        timings = {stage: [] for stage in STAGES}
+        # Warm-up run so lazy initialization is not attributed to a stage
+        run_stages(rgb, grab, engine, {stage: [] for stage in STAGES})
+        for _ in range(runs):
+            run_stages(rgb, grab, engine, timings)
+        peaks = measure_peak_memory(rgb, grab, engine)
+        results[name] = {
+            stage: {
+                'p50_ms': percentile(timings[stage], 0.50) * 1000,
+                'p95_ms': percentile(timings[stage], 0.95) * 1000,
+                'peak_kb': peaks[stage] / 1024,
+            }
+            for stage in STAGES
+        }
+    engine.close()
+    return results
+
+
+def print_report(results):
+    print(f"{'case':<28} {'stage':<10} {'p50 ms':>9} {'p95 ms':>9} {'peak KB':>10}")
+    for name, stages in results.items():
+        for stage in STAGES:
+            row = stages[stage]
+            print(f"{name:<28} {stage:<10} {row['p50_ms']:9.2f} {row['p95_ms']:9.2f} {row['peak_kb']:10.1f}")
+
+
+def find_regressions(results, baseline, threshold, min_ms):
+    """Stages whose p50 grew more than threshold (fraction) over the baseline"""
+    regressions = []
+    for name, stages in results.items():
+        for stage, row in stages.items():
+            base = baseline.get(name, {}).get(stage)
+            if not base:
+                continue
+            # Ignore sub-millisecond stages, their jitter dwarfs any real change
+            if base['p50_ms'] < min_ms and row['p50_ms'] < min_ms:
+                continue
+            if row['p50_ms'] > base['p50_ms'] * (1 + threshold):
+                regressions.append((name, stage, base['p50_ms'], row['p50_ms']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Capture pipeline stage benchmark")
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--quick', action='store_true', help="Smaller case matrix")
+    parser.add_argument('--backend', default='auto', choices=['auto', 'tesserocr', 'pytesseract'])
+    parser.add_argument('--live-capture', action='store_true', help="Time a real pyautogui screenshot")
+    parser.add_argument('--json', help="Write results to this file")
+    parser.add_argument('--save-baseline', help="Write results as a new baseline")
+    parser.add_argument('--baseline', help="Compare against this baseline")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="Allowed p50 regression as a fraction (default 0.25)")
+    parser.add_argument('--min-ms', type=float, default=1.0,
+                        help="Ignore stages faster than this in both runs")
+    args = parser.parse_args()
+
+    results = run_suite(args.runs, args.quick, args.backend, args.live_capture)
+    print_report(results)
+    for path in (args.json, args.save_baseline):
+        if path:
+            with open(path, 'w') as f:
+                json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = find_regressions(results, baseline, args.threshold, args.min_ms)
+        if regressions:
+            print(f"\n{len(regressions)} stage(s) regressed more than {args.threshold:.0%}:")
+            for name, stage, before, after in regressions:
+                print(f"  {name} {stage}: {before:.2f} ms -> {after:.2f} ms")
+            return 1
+        print(f"\nNo stage regressed more than {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""
+Measure what the cost-aware preprocessing decisions save.
+
+Each synthetic case is run through the configured pipeline twice: once with
+its conditions (adaptive) and once with every stage forced on. The report
+shows which stages were skipped, the preprocessing and OCR time of both
+runs, and whether the OCR text still matches.
+
+    python benchmarks/bench_preprocessing.py [--runs 5]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import cv2
+from ocr_engine import create_engine
+from preprocessing import run_pipeline
+from synthetic_text import render_text_image, text_for_lines
+
+CASES = [
+    ('label/clean', dict(text="Save changes?", font_size=11)),
+    ('line/clean', dict(text=text_for_lines(1), font_size=16)),
+    ('paragraph/clean', dict(text=text_for_lines(10), font_size=16)),
+    ('paragraph/noise8', dict(text=text_for_lines(10), font_size=16, noise=8.0)),
+    ('paragraph/noise20', dict(text=text_for_lines(10), font_size=16, noise=20.0)),
+]
+
+
+def time_pipeline(bgr, engine, force, runs):
+    pre_times = []
+    ocr_times = []
+    result = text = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = run_pipeline(bgr, force=force)
+        pre_times.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        text = engine.image_to_string(result.image).strip()
+        ocr_times.append(time.perf_counter() - start)
+    return result, text, statistics.median(pre_times), statistics.median(ocr_times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--backend', default='auto', choices=['auto', 'tesserocr', 'pytesseract'])
+    args = parser.parse_args()
+
+    engine = create_engine(args.backend)
+    print(f"{'case':<20} {'skipped':<22} {'noise':>6} {'pre ms':>8} {'forced':>8} "
+          f"{'ocr ms':>8} {'forced':>8} {'saved ms':>9} {'same text':>10}")
+    for name, kwargs in CASES:
+        bgr = cv2.cvtColor(render_text_image(**kwargs), cv2.COLOR_RGB2BGR)
+        adaptive, text, pre, ocr = time_pipeline(bgr, engine, False, args.runs)
+        _, forced_text, forced_pre, forced_ocr = time_pipeline(bgr, engine, True, args.runs)
+        skipped = ','.join(stage for stage, when in adaptive.skipped if when != 'never') or '-'
+        saved = (forced_pre + forced_ocr - pre - ocr) * 1000
+        print(f"{name:<20} {skipped:<22} {adaptive.stats.noise:6.1f} {pre * 1000:8.1f} {forced_pre * 1000:8.1f} "
+              f"{ocr * 1000:8.1f} {forced_ocr * 1000:8.1f} {saved:9.1f} {str(text == forced_text):>10}")
+    engine.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Cost of the rolling latency histograms behind the dashboard's performance panel.
+
+Records --values latencies (log-normal, around 50 ms) into a metrics store
+and reports:
+
+- observe: time per Metrics.observe() for a name without and with a rolling
+  histogram
+- memory: traced memory of the store after 1k and after all values; it must
+  not grow with the number of values
+- snapshot: time of rolling_snapshot(), which the panel calls on the Tk loop
+- error: relative error of the reported p50/p95/p99 vs. the exact percentiles
+
+    python benchmarks/bench_rolling_metrics.py [--values 1000000]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from instrumentation import PANEL_QUANTILES, Metrics
+
+
+def observe_cost(store, name, values):
+    start = time.perf_counter()
+    for value in values:
+        store.observe(name, value)
+    return (time.perf_counter() - start) / len(values)
+
+
+def exact_quantile(ordered, quantile):
+    return ordered[min(len(ordered) - 1, int(quantile * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--values', type=int, default=1_000_000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    values = [rng.lognormvariate(-3.0, 0.8) for _ in range(args.values)]
+
+    store = Metrics()
+    plain = observe_cost(store, 'plain_stage', values[:100_000])
+    rolling = observe_cost(store, 'ocr', values[:100_000])
+    print(f"observe:   {plain * 1e6:.2f} us plain, {rolling * 1e6:.2f} us with a rolling histogram")
+
+    tracemalloc.start()
+    store = Metrics()
+    for value in values[:1000]:
+        store.observe('ocr', value)
+    small = tracemalloc.get_traced_memory()[0]
+    for value in values[1000:]:
+        store.observe('ocr', value)
+    large = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"memory:    {small / 1024:.1f} KiB after 1k values, {large / 1024:.1f} KiB after {len(values)}")
+
+    samples = []
+    for _ in range(200):
+        start = time.perf_counter()
+        snapshot = store.rolling_snapshot()
+        samples.append(time.perf_counter() - start)
+    print(f"snapshot:  {statistics.median(samples) * 1000:.3f} ms median, {max(samples) * 1000:.3f} ms max")
+
+    # All values fall in the current window unless the run spans more than it
+    histogram = snapshot['histograms']['ocr']
+    ordered = sorted(values[-histogram['count']:])
+    errors = []
+    for quantile in PANEL_QUANTILES:
+        exact = exact_quantile(ordered, quantile)
+        reported = histogram['quantiles'][quantile]
+        errors.append(abs(reported - exact) / exact)
+        print(f"p{quantile * 100:g}:".ljust(11) + f"{reported * 1000:.2f} ms reported, {exact * 1000:.2f} ms exact")
+    print(f"error:     {max(errors):.1%} worst relative")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+Hotkey capture latency while background OCR is running.
+
+Keeps a steady stream of batch work (a few text blocks OCR'd back to back by
+--background threads) and meanwhile runs interactive captures through
+ocr_image, first the old way (every caller with its own thread pool, all
+competing for the CPU), then through the shared scheduler, where the
+interactive Tesseract calls jump the queue. Reports interactive p50/p95
+latency, the idle baseline and how much background work got done.
+
+    python benchmarks/bench_scheduler.py [--captures 10] [--background 4]
+"""
+import argparse
+import concurrent.futures
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import cv2
+from ocr_engine import create_engine
+from ocr_pipeline import enhance_image, ocr_image
+from ocr_scheduler import OCRScheduler, BATCH, INTERACTIVE
+from synthetic_text import render_text_image, text_for_lines
+
+
+def bgr(text, **kwargs):
+    return cv2.cvtColor(render_text_image(text, **kwargs), cv2.COLOR_RGB2BGR)
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+class Background:
+    """Threads that OCR a block over and over, directly or via a scheduler"""
+
+    def __init__(self, engine, image, threads, scheduler=None):
+        self.engine = engine
+        self.image = image
+        self.scheduler = scheduler
+        self.done = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = [threading.Thread(target=self._run, daemon=True) for _ in range(threads)]
+
+    def _ocr(self):
+        return self.engine.image_to_string(self.image, '--psm 6')
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self.scheduler is None:
+                self._ocr()
+            else:
+                self.scheduler.submit(self._ocr, priority=BATCH).result()
+            with self._lock:
+                self.done += 1
+
+    def __enter__(self):
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        return False
+
+
+def interactive(engine, image, executor, captures, pause):
+    samples = []
+    for _ in range(captures):
+        time.sleep(pause)
+        start = time.perf_counter()
+        ocr_image(image, engine, executor=executor)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--captures', type=int, default=10)
+    parser.add_argument('--background', type=int, default=4, help="Background OCR threads")
+    parser.add_argument('--pause', type=float, default=0.2, help="Seconds between captures")
+    parser.add_argument('--backend', default='auto', choices=['auto', 'tesserocr', 'pytesseract'])
+    args = parser.parse_args()
+
+    engine = create_engine(args.backend, pool_size=args.background + 4)
+    capture = bgr(text_for_lines(2), font_size=16)
+    block = enhance_image(bgr(text_for_lines(8, offset=2), font_size=14))
+    own_pool = concurrent.futures.ThreadPoolExecutor(max_workers=4)
+    scheduler = OCRScheduler()
+    print(f"CPU cores: {os.cpu_count()}, scheduler: {scheduler.workers} workers x "
+          f"{scheduler.threads_per_job} OpenMP threads, OMP_THREAD_LIMIT={os.environ.get('OMP_THREAD_LIMIT')}")
+
+    ocr_image(capture, engine)
+    idle = interactive(engine, capture, None, args.captures, 0.0)
+    modes = [('idle', idle, 0, 0.0)]
+    for name, executor, background_scheduler in (('own pools', own_pool, None),
+                                                 ('scheduler', scheduler.executor(INTERACTIVE), scheduler)):
+        with Background(engine, block, args.background, background_scheduler) as background:
+            start = time.perf_counter()
+            samples = interactive(engine, capture, executor, args.captures, args.pause)
+            elapsed = time.perf_counter() - start
+            done = background.done
+        modes.append((name, samples, done, elapsed))
+
+    print(f"{'mode':<10} {'p50 ms':>8} {'p95 ms':>8} {'background/s':>13}")
+    for name, samples, done, elapsed in modes:
+        rate = done / elapsed if elapsed else 0.0
+        print(f"{name:<10} {statistics.median(samples) * 1000:8.1f} {percentile(samples, 0.95) * 1000:8.1f} "
+              f"{rate:13.2f}")
+    print(f"scheduler: {scheduler.stats()}")
+    scheduler.close()
+    own_pool.shutdown()
+    engine.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""
+Load-test the local OCR service.
+
+Starts an in-process instance on a free port (or targets --url), then runs
+--clients concurrent clients posting synthetic PNG captures for --duration
+seconds and reports throughput, p50/p95/p99 latency and rejected (503)
+requests. --distinct controls how many different images the clients cycle
+through, so repeated images exercise request coalescing.
+
+    python benchmarks/bench_service.py --clients 8 --duration 20
+    python benchmarks/bench_service.py --url http://127.0.0.1:8765
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import cv2
+from synthetic_text import render_text_image, text_for_lines
+
+
+def make_payloads(count):
+    payloads = []
+    for i in range(count):
+        image = render_text_image(text_for_lines(2 + i % 4, offset=i), size=(640, 60 + 30 * (i % 4)))
+        ok, encoded = cv2.imencode('.png', cv2.cvtColor(image, cv2.COLOR_RGB2BGR))
+        payloads.append(encoded.tobytes())
+    return payloads
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def client(url, payloads, offset, deadline, latencies, counts, lock):
+    i = offset
+    while time.perf_counter() < deadline:
+        request = urllib.request.Request(url, data=payloads[i % len(payloads)],
+                                         headers={'Content-Type': 'application/octet-stream'})
+        i += 1
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                json.loads(response.read())
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                counts['ok'] += 1
+        except urllib.error.HTTPError as e:
+            with lock:
+                counts[e.code] = counts.get(e.code, 0) + 1
+            if e.code == 503:
+                time.sleep(float(e.headers.get('Retry-After', 1)) / 10)
+        except Exception:
+            with lock:
+                counts['failed'] += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--url', help="Base URL of a running service (default: start one in-process)")
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=20.0)
+    parser.add_argument('--distinct', type=int, default=16, help="Number of different images sent")
+    parser.add_argument('--workers', type=int, default=4, help="Workers of the in-process instance")
+    args = parser.parse_args()
+
+    server = service = None
+    base_url = args.url
+    if base_url is None:
+        from ocr_service import OCRService, make_server
+        service = OCRService(workers=args.workers)
+        server = make_server(service, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        print(f"started {service.engine.name} service with {service.workers} workers on {base_url}")
+
+    payloads = make_payloads(args.distinct)
+    latencies = []
+    counts = {'ok': 0, 'failed': 0}
+    lock = threading.Lock()
+    # Warm-up request so engine start-up is not measured
+    urllib.request.urlopen(urllib.request.Request(base_url + '/ocr', data=payloads[0]), timeout=60).read()
+
+    start = time.perf_counter()
+    deadline = start + args.duration
+    threads = [threading.Thread(target=client, args=(base_url + '/ocr', payloads, i, deadline, latencies, counts, lock))
+               for i in range(args.clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    print(f"clients: {args.clients}, distinct images: {args.distinct}, duration: {elapsed:.1f} s")
+    print(f"throughput: {counts['ok'] / elapsed:.1f} req/s ({counts['ok']} ok)")
+    if latencies:
+        print(f"latency: p50 {percentile(latencies, 0.5) * 1000:.1f} ms, "
+              f"p95 {percentile(latencies, 0.95) * 1000:.1f} ms, p99 {percentile(latencies, 0.99) * 1000:.1f} ms")
+    errors = {code: count for code, count in counts.items() if code not in ('ok',) and count}
+    print(f"rejected/failed: {errors or 'none'}")
+    with urllib.request.urlopen(base_url + '/health', timeout=10) as response:
+        print(f"health: {json.loads(response.read())}")
+
+    if server is not None:
+        server.shutdown()
+        server.server_close()
+        service.close()
+        service.engine.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Guard the dashboard's cold start.
+
+1. Runs `python -X importtime -c "import dashboard"` and fails if the
+   imaging/OCR stack (cv2, numpy, PIL, pytesseract, ...) is imported before
+   the window exists, or if the import takes longer than --max-import-ms.
+2. Launches src/main.py with SCREEN_OCR_STARTUP_PROBE set and measures the
+   time from process launch to the dashboard's first <Map> event, failing
+   above --max-first-frame-ms. Needs an X display; --xvfb starts one.
+
+    python benchmarks/bench_startup.py --runs 5 --xvfb
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, SRC_DIR)
+
+# Modules that must only be loaded lazily, after the first frame
+HEAVY_MODULES = {'cv2', 'numpy', 'PIL', 'pytesseract', 'tesserocr', 'pyautogui', 'mss', 'win32clipboard'}
+
+
+def import_profile(module='dashboard'):
+    """Return (cumulative import ms of module, set of top-level packages imported)"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=SRC_DIR, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    cumulative_us = None
+    imported = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2].strip()
+        imported.add(name.split('.')[0])
+        if parts[2].rstrip() == f' {module}':
+            cumulative_us = int(parts[1])
+    return (cumulative_us or 0) / 1000, imported
+
+
+def first_frame_seconds(timeout=30):
+    env = dict(os.environ, SCREEN_OCR_STARTUP_PROBE=repr(time.time()), SCREEN_OCR_METRICS='0')
+    result = subprocess.run([sys.executable, os.path.join(SRC_DIR, 'main.py')],
+                            env=env, capture_output=True, text=True, timeout=timeout)
+    for line in result.stdout.splitlines():
+        if line.startswith('first-frame '):
+            return float(line.split()[1])
+    raise RuntimeError(f"main.py did not report a first frame:\n{result.stderr[-2000:]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--max-import-ms', type=float, default=250.0)
+    parser.add_argument('--max-first-frame-ms', type=float, default=1500.0)
+    parser.add_argument('--xvfb', action='store_true', help="Start a virtual X server for the first-frame test")
+    args = parser.parse_args()
+
+    failures = []
+    import_times = []
+    imported = set()
+    for _ in range(args.runs):
+        elapsed_ms, imported = import_profile()
+        import_times.append(elapsed_ms)
+    import_ms = statistics.median(import_times)
+    heavy = sorted(HEAVY_MODULES & imported)
+    print(f"import dashboard: {import_ms:.1f} ms (median of {args.runs})")
+    print(f"heavy modules imported up front: {', '.join(heavy) or 'none'}")
+    if heavy:
+        failures.append(f"heavy modules imported before the first frame: {', '.join(heavy)}")
+    if import_ms > args.max_import_ms:
+        failures.append(f"import took {import_ms:.1f} ms > {args.max_import_ms:.1f} ms")
+
+    display = None
+    if args.xvfb:
+        from capture_backends import XvfbDisplay
+        display = XvfbDisplay(1280, 800).start()
+    try:
+        if os.environ.get('DISPLAY') or sys.platform == 'win32':
+            frames = [first_frame_seconds() * 1000 for _ in range(args.runs)]
+            first_frame_ms = statistics.median(frames)
+            print(f"launch to first frame: {first_frame_ms:.1f} ms (median of {args.runs})")
+            if first_frame_ms > args.max_first_frame_ms:
+                failures.append(f"first frame after {first_frame_ms:.1f} ms > {args.max_first_frame_ms:.1f} ms")
+        else:
+            print("launch to first frame: skipped (no display; use --xvfb)")
+    finally:
+        if display:
+            display.stop()
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
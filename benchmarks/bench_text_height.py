@@ -0,0 +1,78 @@
+"""
+Latency and accuracy of text-height normalization.
+
+Renders the same text from tiny UI-label sizes up to zoomed 4K sizes and runs
+the configured pipeline with and without the normalize_height stage. The
+report shows the estimated glyph height, the resampling factor, pipeline +
+OCR time and character accuracy against the rendered text for both runs.
+
+    python benchmarks/bench_text_height.py [--runs 3] [--sizes 9 12 16 32 64 96]
+"""
+import argparse
+import difflib
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import cv2
+from config import PREPROCESSING_PIPELINE
+from ocr_engine import create_engine
+from preprocessing import run_pipeline, text_scale_factor
+from synthetic_text import render_text_image, text_for_lines
+
+
+def without_normalization(pipeline):
+    return [spec for spec in pipeline if spec['stage'] != 'normalize_height']
+
+
+def accuracy(reference, text):
+    """1 - character error rate, approximated from the longest matching blocks"""
+    return difflib.SequenceMatcher(None, " ".join(reference.split()), " ".join(text.split())).ratio()
+
+
+def run(bgr, engine, pipeline, runs):
+    samples = []
+    result = text = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = run_pipeline(bgr, pipeline)
+        text = engine.image_to_string(result.image, '--psm 6').strip()
+        samples.append(time.perf_counter() - start)
+    return result, text, statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[9, 12, 16, 32, 64, 96])
+    parser.add_argument('--lines', type=int, default=4)
+    parser.add_argument('--backend', default='auto', choices=['auto', 'tesserocr', 'pytesseract'])
+    args = parser.parse_args()
+
+    normalize_spec = next((spec for spec in PREPROCESSING_PIPELINE if spec['stage'] == 'normalize_height'), None)
+    if normalize_spec is None:
+        print("normalize_height is not in PREPROCESSING_PIPELINE")
+        return 1
+    engine = create_engine(args.backend, pool_size=1)
+    reference = text_for_lines(args.lines)
+    print(f"{'font px':>7} {'size':>11} {'glyph px':>8} {'factor':>6} {'native ms':>10} {'norm ms':>8} "
+          f"{'speedup':>8} {'native acc':>10} {'norm acc':>9}")
+    for font_size in args.sizes:
+        bgr = cv2.cvtColor(render_text_image(reference, font_size=font_size, padding=font_size),
+                           cv2.COLOR_RGB2BGR)
+        native, native_text, native_time = run(bgr, engine, without_normalization(PREPROCESSING_PIPELINE), args.runs)
+        _, text, normalized_time = run(bgr, engine, PREPROCESSING_PIPELINE, args.runs)
+        factor = text_scale_factor(native.stats, normalize_spec)
+        glyph = native.stats.text_height or 0.0
+        print(f"{font_size:7d} {f'{bgr.shape[1]}x{bgr.shape[0]}':>11} {glyph:8.1f} {factor:6.2f} "
+              f"{native_time * 1000:10.1f} {normalized_time * 1000:8.1f} {native_time / normalized_time:8.2f} "
+              f"{accuracy(reference, native_text):10.3f} {accuracy(reference, text):9.3f}")
+    engine.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,7 +11,7 @@ python -m pip install -r requirements.txt
 
 # Run the packaging script
 echo "Packaging the application..."
-python package.py
+python package.py "$@"
 
 # Check if packaging was successful
 if [ -f "dist/ScreenCaptureOCR.exe" ]; then
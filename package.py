@@ -1,4 +1,9 @@
+import argparse
+import hashlib
+import importlib.metadata
+import json
 import os
+import platform
 import sys
 import tempfile
 import urllib.request
@@ -6,15 +11,39 @@ import subprocess
 import PyInstaller.__main__
 from pathlib import Path
 import shutil
-import winreg
 import gc
-import multiprocessing
-import psutil
 import time
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from system_utils import get_optimal_workers
+
 TESSERACT_DOWNLOAD_URL = "https://sourceforge.net/projects/tesseract-ocr-alt/files/latest/download"
 TESSERACT_INSTALLER_NAME = "tesseract-installer.exe"
 
+APP_NAME = 'ScreenCaptureOCR'
+
+# Packaging profiles (python package.py --profile NAME)
+# - size: the original single UPX-compressed executable. Smallest download, but
+#   every launch unpacks the whole cv2/numpy payload into a temp dir and UPX
+#   decompresses each library as it is loaded.
+# - startup: a onedir bundle that is launched in place: no unpacking, no UPX,
+#   modules the app never imports pruned, bytecode precompiled at -OO.
+PACKAGING_PROFILES = {
+    'size': {'onefile': True, 'upx': True, 'optimize': 0, 'prune': False},
+    'startup': {'onefile': False, 'upx': False, 'optimize': 2, 'prune': True},
+}
+DEFAULT_PROFILE = 'size'
+
+# Never imported by the app but pulled in through optional imports of its
+# dependencies (numpy's config/test helpers, pytesseract's pandas output,
+# OpenCV's type stubs). The OpenCV codec libraries (libavcodec, libvpx, ...)
+# cannot be pruned: cv2's extension module links against them directly.
+PRUNED_MODULES = [
+    'yaml', 'unittest', 'doctest', 'pydoc', 'pdb', 'xmlrpc', 'lib2to3', 'setuptools', 'pkg_resources',
+    'numpy.testing', 'numpy.f2py', 'numpy.distutils', 'cv2.typing', 'cv2.gapi', 'cv2.mat_wrapper',
+]
+
 def is_tesseract_installed():
     """Check if Tesseract is installed by looking in common installation paths."""
     paths = [
@@ -27,6 +56,7 @@ def is_tesseract_installed():
 def get_tesseract_path():
     """Get Tesseract installation path."""
     try:
+        import winreg
         with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\Tesseract-OCR") as key:
             return winreg.QueryValueEx(key, "Path")[0]
     except:
@@ -62,7 +92,10 @@ def download_and_install_tesseract():
 
 def ensure_upx_available():
     """Download UPX if not available for better compression with robust error handling"""
-    upx_dir = Path(__file__).parent.absolute() / 'upx'
+    if sys.platform != 'win32':
+        # Only the Windows build is downloaded; elsewhere use upx from PATH
+        return shutil.which('upx') is not None
+    upx_dir = Path(__file__).resolve().parent / 'upx'
     upx_dir.mkdir(exist_ok=True)
     
     # Check if UPX is already available
@@ -136,119 +169,53 @@ def ensure_upx_available():
         # Not critical, build can continue without UPX
         return False
 
-def get_optimal_workers():
-    """
-    Determine the optimal number of worker processes based on system resources.
-    Safely handles systems where resource detection might fail.
-    
-    Returns a tuple of (cpu_count, worker_count) where:
-    - cpu_count: Number of logical CPU cores available
-    - worker_count: Optimal number of worker processes to use
-    """
-    try:
-        # Try to detect CPU count
-        cpu_count = multiprocessing.cpu_count()
-    except Exception:
-        # Default to 2 if detection fails
-        print("Could not detect CPU count, defaulting to 2")
-        cpu_count = 2
-    
-    try:
-        # Try to detect memory
-        mem_gb = psutil.virtual_memory().total / (1024 * 1024 * 1024)
-    except Exception:
-        # Default to 4GB if detection fails
-        print("Could not detect system memory, defaulting to 4GB")
-        mem_gb = 4
-    
-    # Calculate optimal workers based on CPU and memory
-    # Each worker might need ~1GB of memory
-    mem_based_workers = max(1, int(mem_gb / 1.5))
-    cpu_based_workers = max(1, cpu_count - 1)  # Leave one core free for system
-    
-    # Use the smaller of the two to avoid resource exhaustion
-    worker_count = min(mem_based_workers, cpu_based_workers)
-    
-    # Cap at 8 workers to avoid issues on very high-end systems
-    worker_count = min(worker_count, 8)
-    
-    print(f"System has {cpu_count} CPU cores and {mem_gb:.1f}GB RAM")
-    print(f"Using {worker_count} worker processes for optimal performance")
-    
-    return cpu_count, worker_count
+def upx_directory():
+    """Directory holding the UPX binary, or None"""
+    if sys.platform == 'win32':
+        return str(Path(__file__).resolve().parent / 'upx')
+    upx = shutil.which('upx')
+    return os.path.dirname(upx) if upx else None
 
-def package_app():
+def profile_paths(profile_name, current_dir=None):
     """
-    Package the application using PyInstaller with parallel processing.
-    
-    This function handles the entire build process:
-    1. Sets up build environment
-    2. Cleans previous builds
-    3. Configures PyInstaller for optimal performance
-    4. Runs the build process with parallel workers
-    
-    The build process creates several directories:
-    - build/: Contains intermediate files and analysis
-    - dist/: Contains the final executable
-    - resources/: Contains additional files to be bundled
+    Return (dist_dir, build_dir, executable) of a profile.
+
+    The size profile keeps the original dist/ScreenCaptureOCR(.exe); other
+    profiles build into dist/<profile>/ so they can sit next to each other.
     """
-    # Get the current directory
-    current_dir = Path(__file__).parent.absolute()
-    
-    # Define paths for build artifacts
-    dist_dir = current_dir / 'dist'      # Final executable location
-    build_dir = current_dir / 'build'    # Intermediate build files
-    
-    # Clean previous builds to prevent conflicts
-    try:
-        if dist_dir.exists():
-            for item in dist_dir.iterdir():
-                if item.is_file():
-                    item.unlink(missing_ok=True)
-                elif item.is_dir():
-                    shutil.rmtree(item, ignore_errors=True)
-        if build_dir.exists():
-            shutil.rmtree(build_dir, ignore_errors=True)
-    except Exception as e:
-        print(f"Warning: Could not fully clean previous build: {e}")
-    
-    # Create resources directory for additional files
-    resources_dir = current_dir / 'resources'
-    resources_dir.mkdir(exist_ok=True)    # Get optimal worker count for parallel processing
-    cpu_count, worker_count = get_optimal_workers()
-    
-    # Ensure we have all necessary files and directories
-    try:
-        # Create a resources directory if it doesn't exist
-        resources_dir = current_dir / 'resources'
-        resources_dir.mkdir(exist_ok=True)
-        
-        # Create a README.txt in resources to explain the app
-        readme_path = resources_dir / 'README.txt'
-        if not readme_path.exists():
-            with open(readme_path, 'w') as f:
-                f.write("Screen Capture OCR\n\n")
-                f.write("This application allows you to capture text from anywhere on your screen.\n")
-                f.write("1. Click 'Start' to enable screen capture\n")
-                f.write("2. Press Ctrl+Shift+X to start capture\n")
-                f.write("3. Click and drag to select text area\n")
-                f.write("4. Text will be copied to clipboard\n")
-                f.write("5. Press 'Stop' to disable\n\n")
-                f.write("For support, please contact the developer.\n")
-    except Exception as e:
-        print(f"Warning: Could not create resource files: {e}")
-    
-    # Check if UPX is available for compression
-    upx_available = ensure_upx_available()
-    
-    # Base PyInstaller configuration
+    current_dir = Path(current_dir or Path(__file__).resolve().parent)
+    profile = PACKAGING_PROFILES[profile_name]
+    suffix = '.exe' if sys.platform == 'win32' else ''
+    if profile_name == DEFAULT_PROFILE:
+        dist_dir, build_dir = current_dir / 'dist', current_dir / 'build'
+    else:
+        dist_dir, build_dir = current_dir / 'dist' / profile_name, current_dir / 'build' / profile_name
+    if profile['onefile']:
+        return dist_dir, build_dir, dist_dir / (APP_NAME + suffix)
+    return dist_dir, build_dir, dist_dir / APP_NAME / (APP_NAME + suffix)
+
+def bundle_size(executable):
+    """Bytes shipped: the executable itself, or its whole onedir folder"""
+    executable = Path(executable)
+    if executable.parent.name != APP_NAME:
+        return executable.stat().st_size
+    return sum(path.stat().st_size for path in executable.parent.rglob('*')
+               if path.is_file() and not path.is_symlink())
+
+def pyinstaller_args(profile_name, dist_dir, build_dir, spec_dir, upx_dir=None):
+    """PyInstaller command line for a profile"""
+    profile = PACKAGING_PROFILES[profile_name]
+    # Absolute paths: PyInstaller resolves data paths against the spec directory
+    current_dir = Path(__file__).resolve().parent
     args = [
-        'src/main.py',                  # Entry point script
-        '--onefile',                     # Create single executable
+        str(current_dir / 'src' / 'main.py'),  # Entry point script
+        '--onefile' if profile['onefile'] else '--onedir',
         '--noconsole',                   # No console window for GUI app
-        '--name', 'ScreenCaptureOCR',    # Output executable name
+        '--name', APP_NAME,              # Output executable name
+        '--paths', str(current_dir / 'src'),  # Flat src/ modules import each other top-level
         '--hidden-import', 'PIL._tkinter_finder',  # Force include PIL GUI support
-        '--hidden-import', 'win32clipboard',  # Ensure win32clipboard is included
+        # Loaded by the dashboard with importlib after the first frame
+        '--hidden-import', 'capture_overlay',
         '--hidden-import', 'cv2',        # Ensure OpenCV is included
         '--hidden-import', 'pytesseract',  # Ensure pytesseract is included
         # Explicitly include NumPy modules that are needed
@@ -256,15 +223,14 @@ def package_app():
         '--hidden-import', 'numpy.core._multiarray_umath',
         '--hidden-import', 'numpy.core.multiarray',
         '--hidden-import', 'numpy.core._dtype_ctypes',
-        '--add-data', f'resources;resources',  # Bundle additional resources
-        '--version-file', 'src/version_info.txt',  # Add version info to executable
-        '--uac-admin',                   # Request admin rights if needed
-        '--clean',                       # Clean PyInstaller cache
+        '--add-data', f'{current_dir / "resources"}{os.pathsep}resources',  # Bundle additional resources
+        '--optimize', str(profile['optimize']),  # Bytecode is compiled at build time at this level
+        '--noconfirm',                   # Replace an existing onedir output without asking
         # Enable parallel processing if supported
         '--log-level', 'WARN',           # Reduce log noise during parallel build
         f'--distpath={dist_dir}',        # Specify dist directory
         f'--workpath={build_dir}',       # Specify build directory
-        f'--specpath={current_dir}',     # Specify spec directory
+        f'--specpath={spec_dir}',        # Specify spec directory
         # Exclude unnecessary large packages to reduce size
         '--exclude-module', 'matplotlib',
         '--exclude-module', 'notebook',
@@ -285,106 +251,283 @@ def package_app():
         '--exclude-module', 'numpy.matrixlib.tests',
         '--exclude-module', 'numpy.polynomial.tests',
         '--exclude-module', 'numpy.random.tests',
-        # High-performance optimization flags
-        '--strip',                       # Strip symbols from binary
+        # PyInstaller always excludes __main__, appending it to the stored
+        # excludes when missing; listing it keeps them equal between builds
+        # so an incremental build can reuse the cached analysis
+        '--exclude-module', '__main__',
     ]
-    
-    # Add UPX compression if available
-    if upx_available:
-        args.extend(['--upx-dir', os.path.join(current_dir, 'upx')])
-    
-    # Note: Parallel processing with --number-processes is not supported in this PyInstaller version
-    # We'll use system resources efficiently in other ways
-    
-    # Ensure UPX is available for better compression
-    ensure_upx_available()
-    
-    # Set environment variables to optimize performance
-    os.environ['PYTHONOPTIMIZE'] = '2'  # Enable Python optimization
-    
+    if sys.platform == 'win32':
+        # Strip symbols from binary. Not elsewhere: stripping the auditwheel-
+        # repaired libraries of the Linux wheels (numpy's OpenBLAS) breaks them
+        args.append('--strip')
+        args.extend(['--hidden-import', 'win32clipboard'])  # Ensure win32clipboard is included
+        args.append('--uac-admin')       # Request admin rights if needed
+        version_file = current_dir / 'src' / 'version_info.txt'
+        if version_file.exists():
+            args.extend(['--version-file', str(version_file)])  # Add version info to executable
+    if profile['prune']:
+        for module in PRUNED_MODULES:
+            args.extend(['--exclude-module', module])
+    if profile['upx'] and upx_dir:
+        args.extend(['--upx-dir', upx_dir])
+    else:
+        args.append('--noupx')
+    return args
+
+def hash_tree(directory):
+    """Content hash of the files under directory, including their relative paths"""
+    digest = hashlib.sha256()
+    directory = Path(directory)
+    if directory.exists():
+        for path in sorted(directory.rglob('*')):
+            if path.is_file() and '__pycache__' not in path.parts:
+                digest.update(path.relative_to(directory).as_posix().encode() + b'\0')
+                digest.update(hashlib.sha256(path.read_bytes()).digest())
+    return digest.hexdigest()
+
+def build_fingerprint(args, current_dir):
+    """
+    Fingerprint each input of a build: the sources, the spec (generated from
+    the PyInstaller command line), the interpreter and installed distributions,
+    and the bundled resources.
+    """
+    distributions = sorted(f"{dist.metadata['Name']}=={dist.version}"
+                           for dist in importlib.metadata.distributions())
+    environment = [sys.version, platform.platform(), PyInstaller.__version__] + distributions
+    return {
+        'sources': hash_tree(current_dir / 'src'),
+        'spec': hashlib.sha256(json.dumps(args).encode()).hexdigest(),
+        'dependencies': hashlib.sha256("\n".join(environment).encode()).hexdigest(),
+        'resources': hash_tree(current_dir / 'resources'),
+    }
+
+def load_build_state(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def save_build_state(path, state):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+
+def build_app(profile_name=DEFAULT_PROFILE, incremental=False):
+    """
+    Build one profile. Returns (executable, build seconds, cache), executable
+    being None when the build failed.
+
+    A clean build wipes the profile's previous output and PyInstaller's cache.
+    An incremental one fingerprints the inputs first: when nothing changed
+    since the last build the build is skipped, otherwise PyInstaller reruns on
+    its existing work directory and reuses what is still valid. cache is None
+    for clean builds, else {'hit': bool, 'changed': [inputs], 'saved': seconds
+    or None compared to the last clean build}.
+    """
+    current_dir = Path(__file__).resolve().parent
+    os.chdir(current_dir)
+    dist_dir, build_dir, executable = profile_paths(profile_name, current_dir)
+    profile = PACKAGING_PROFILES[profile_name]
+    state_path = build_dir / APP_NAME / 'fingerprint.json'
+    previous = load_build_state(state_path) if incremental else None
+
+    # Clean previous builds of this profile to prevent conflicts; an
+    # incremental build keeps them to reuse PyInstaller's analysis
+    try:
+        if incremental:
+            pass
+        elif profile_name == DEFAULT_PROFILE:
+            for item in (dist_dir / executable.name, dist_dir / APP_NAME, build_dir / APP_NAME):
+                if item.is_file():
+                    item.unlink(missing_ok=True)
+                elif item.is_dir():
+                    shutil.rmtree(item, ignore_errors=True)
+        else:
+            shutil.rmtree(dist_dir, ignore_errors=True)
+            shutil.rmtree(build_dir, ignore_errors=True)
+    except Exception as e:
+        print(f"Warning: Could not fully clean previous build: {e}")
+
+    # Ensure we have all necessary files and directories
+    try:
+        # Create a resources directory if it doesn't exist
+        resources_dir = current_dir / 'resources'
+        resources_dir.mkdir(exist_ok=True)
+
+        # Create a README.txt in resources to explain the app
+        readme_path = resources_dir / 'README.txt'
+        if not readme_path.exists():
+            with open(readme_path, 'w') as f:
+                f.write("Screen Capture OCR\n\n")
+                f.write("This application allows you to capture text from anywhere on your screen.\n")
+                f.write("1. Click 'Start' to enable screen capture\n")
+                f.write("2. Press Ctrl+Shift+X to start capture\n")
+                f.write("3. Click and drag to select text area\n")
+                f.write("4. Text will be copied to clipboard\n")
+                f.write("5. Press 'Stop' to disable\n\n")
+                f.write("For support, please contact the developer.\n")
+    except Exception as e:
+        print(f"Warning: Could not create resource files: {e}")
+
+    # Check if UPX is available for compression
+    upx_dir = upx_directory() if profile['upx'] and ensure_upx_available() else None
+    # Generated specs hold absolute machine paths; keep them out of the tree
+    args = pyinstaller_args(profile_name, dist_dir, build_dir, build_dir, upx_dir)
+    fingerprint = build_fingerprint(args, current_dir)
+
+    cache = None
+    if incremental:
+        parts = previous.get('fingerprint', {}) if previous else {}
+        changed = [part for part in fingerprint if parts.get(part) != fingerprint[part]]
+        if previous and not executable.exists():
+            changed.append('output')
+        clean_time = previous.get('clean_build_time') if previous else None
+        cache = {'hit': not changed, 'changed': changed, 'saved': None}
+        if not changed:
+            cache['saved'] = clean_time
+            print(f"Nothing changed since the last '{profile_name}' build, skipping it")
+            return executable, 0.0, cache
+        print(f"Incremental build, changed: {', '.join(changed) if previous else 'no previous build'}")
+    else:
+        args.append('--clean')           # Clean PyInstaller cache
+
+    # An incremental build keeps the last executable, so only a new
+    # modification time shows that this build produced one
+    previous_mtime = executable.stat().st_mtime_ns if executable.exists() else None
+
     # Force garbage collection before building
     gc.collect()
-    
-    print(f"Starting build with {worker_count} parallel workers...")
+
+    print(f"Building the '{profile_name}' profile ({'onefile' if profile['onefile'] else 'onedir'}, "
+          f"UPX {'on' if upx_dir else 'off'}, bytecode -O{profile['optimize']})...")
     start_time = time.time()
-    
+
     # Run PyInstaller with error handling
     try:
         PyInstaller.__main__.run(args)
-        build_success = True
-    except Exception as build_error:
+    except (Exception, SystemExit) as build_error:
         print(f"\nError during build: {build_error}")
-        print("Attempting to build with fallback settings...")
-        
-        # Fallback to simpler build settings
-        fallback_args = [
-            'src/main.py',
-            '--onefile',
-            '--noconsole',
-            '--name', 'ScreenCaptureOCR',
-            '--hidden-import', 'PIL._tkinter_finder',
-            '--hidden-import', 'win32clipboard',
-            '--hidden-import', 'cv2',
-            '--hidden-import', 'pytesseract',
-            '--add-data', f'resources;resources',
-            '--version-file', 'src/version_info.txt',
-            '--clean',
-        ]
-        
-        try:
-            PyInstaller.__main__.run(fallback_args)
-            build_success = True
-            print("Build completed with fallback settings")
-        except Exception as fallback_error:
-            print(f"Fallback build also failed: {fallback_error}")
-            build_success = False
-    
+        if profile_name == DEFAULT_PROFILE:
+            print("Attempting to build with fallback settings...")
+
+            # Fallback to simpler build settings
+            fallback_args = [
+                'src/main.py',
+                '--onefile',
+                '--noconsole',
+                '--name', APP_NAME,
+                '--paths', 'src',
+                '--hidden-import', 'PIL._tkinter_finder',
+                '--hidden-import', 'capture_overlay',
+                '--hidden-import', 'cv2',
+                '--hidden-import', 'pytesseract',
+                '--add-data', f'{current_dir / "resources"}{os.pathsep}resources',
+                '--specpath', str(build_dir),
+                '--clean',
+            ]
+            if sys.platform == 'win32':
+                fallback_args.extend(['--hidden-import', 'win32clipboard'])
+
+            try:
+                PyInstaller.__main__.run(fallback_args)
+                print("Build completed with fallback settings")
+            except (Exception, SystemExit) as fallback_error:
+                print(f"Fallback build also failed: {fallback_error}")
+
     # Calculate build time
     build_time = time.time() - start_time
+    if not executable.exists() or executable.stat().st_mtime_ns == previous_mtime:
+        if previous_mtime is not None:
+            print(f"The build failed; {executable} is left over from the last build")
+        return None, build_time, cache
+
+    # A build without a usable work directory counts as clean
+    clean_time = build_time
+    if previous and previous.get('clean_build_time'):
+        clean_time = previous['clean_build_time']
+        cache['saved'] = clean_time - build_time
+    save_build_state(state_path, {'fingerprint': fingerprint, 'build_time': build_time,
+                                  'clean_build_time': clean_time})
+    return executable, build_time, cache
+
+def package_app(profile_name=DEFAULT_PROFILE, incremental=False):
+    """
+    Package the application using PyInstaller with the given profile.
     
-    if build_success:
-        print(f"\nPackaging complete in {build_time:.2f} seconds!")
-        print("The executable is in the 'dist' folder.")
-    else:
-        print("\nBuild process failed. Please check the errors above.")
+    This function handles the entire build process:
+    1. Sets up build environment
+    2. Cleans previous builds of the profile, or with incremental=True skips
+       the build when its inputs are unchanged and otherwise reuses the cache
+    3. Configures PyInstaller for the profile (see PACKAGING_PROFILES)
+    4. Runs the build and reports size and build time
     
-    # Calculate and display the size of the executable
-    exe_path = dist_dir / 'ScreenCaptureOCR.exe'
-    if exe_path.exists():
-        size_mb = exe_path.stat().st_size / (1024 * 1024)
+    The build process creates several directories:
+    - build/: Contains intermediate files and analysis
+    - dist/: Contains the final executable (dist/<profile>/ for non-default profiles)
+    - resources/: Contains additional files to be bundled
+    """
+    cpu_count, worker_count = get_optimal_workers()
+    print(f"Starting build with {worker_count} parallel workers...")
+    exe_path, build_time, cache = build_app(profile_name, incremental)
+
+    if exe_path is not None:
+        print(f"\nPackaging complete in {build_time:.2f} seconds!")
+        print(f"The executable is {exe_path.relative_to(Path(__file__).resolve().parent)}")
+        size_mb = bundle_size(exe_path) / (1024 * 1024)
         print(f"Executable size: {size_mb:.2f} MB")
         
         # Print performance summary
         print("\nBuild Performance Summary:")
+        print(f"Profile: {profile_name}")
         print(f"CPU cores used: {worker_count} of {cpu_count}")
         print(f"Build time: {build_time:.2f} seconds")
-        print(f"Average throughput: {size_mb/build_time:.2f} MB/s")
+        if build_time > 0:
+            print(f"Average throughput: {size_mb/build_time:.2f} MB/s")
+        if cache is None:
+            print("Build cache: off (clean build)")
+        else:
+            print(f"Build cache: {'hit' if cache['hit'] else 'miss'}"
+                  + (f" ({', '.join(cache['changed'])} changed)" if cache['changed'] else ""))
+            if cache['saved'] is not None:
+                print(f"Time saved vs. a clean build: {cache['saved']:.2f} seconds")
         
         # Create a copy of the executable with a version number for backup
-        try:
-            import datetime
-            version_stamp = datetime.datetime.now().strftime("%Y%m%d%H%M")
-            backup_path = dist_dir / f"ScreenCaptureOCR_{version_stamp}.exe"
-            shutil.copy2(exe_path, backup_path)
-            print(f"\nBackup copy created: {backup_path.name}")
-        except Exception as e:
-            print(f"Warning: Could not create backup copy: {e}")
+        if PACKAGING_PROFILES[profile_name]['onefile'] and not (cache and cache['hit']):
+            try:
+                import datetime
+                version_stamp = datetime.datetime.now().strftime("%Y%m%d%H%M")
+                backup_path = exe_path.with_name(f"{APP_NAME}_{version_stamp}{exe_path.suffix}")
+                shutil.copy2(exe_path, backup_path)
+                print(f"\nBackup copy created: {backup_path.name}")
+            except Exception as e:
+                print(f"Warning: Could not create backup copy: {e}")
         
-        print("\nBuild completed successfully! Your application should work on any Windows system.")
+        print("\nBuild completed successfully!")
     else:
-        print("\nWarning: Could not find the executable in the dist folder.")
-        print("Please check the build logs for errors.")
+        print("\nBuild process failed. Please check the errors above.")
+        print("Warning: Could not find the executable in the dist folder.")
+        return 1
         
     # Create a simple batch file to run the application
-    try:
-        batch_path = dist_dir / "Run_ScreenCaptureOCR.bat"
-        with open(batch_path, 'w') as f:
-            f.write('@echo off\n')
-            f.write('echo Starting Screen Capture OCR...\n')
-            f.write('start "" "%~dp0ScreenCaptureOCR.exe"\n')
-        print(f"Created launcher batch file: {batch_path.name}")
-    except Exception as e:
-        print(f"Warning: Could not create launcher batch file: {e}")
+    if sys.platform == 'win32':
+        try:
+            batch_path = exe_path.parent / "Run_ScreenCaptureOCR.bat"
+            with open(batch_path, 'w') as f:
+                f.write('@echo off\n')
+                f.write('echo Starting Screen Capture OCR...\n')
+                f.write(f'start "" "%~dp0{exe_path.name}"\n')
+            print(f"Created launcher batch file: {batch_path.name}")
+        except Exception as e:
+            print(f"Warning: Could not create launcher batch file: {e}")
+    return 0
 
 if __name__ == "__main__":
-    package_app()
+    parser = argparse.ArgumentParser(description="Build the Screen Capture OCR executable with PyInstaller")
+    parser.add_argument('--profile', default=DEFAULT_PROFILE, choices=sorted(PACKAGING_PROFILES),
+                        help="size: one compressed executable; startup: onedir bundle that launches faster")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Skip the build if sources, spec, dependencies and resources are unchanged, "
+                             "otherwise reuse PyInstaller's cache")
+    args = parser.parse_args()
+    sys.exit(package_app(args.profile, args.incremental))
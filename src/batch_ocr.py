@@ -0,0 +1,118 @@
+"""
+Headless batch OCR over a directory or glob of images.
+
+Runs the same preprocessing and OCR pipeline as the capture overlay on a
+process pool and writes one JSON object per image, in input order:
+
+    python src/batch_ocr.py screenshots/ -o results.jsonl
+    python src/batch_ocr.py "archive/**/*.png" --workers 4
+"""
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import time
+import cv2
+from ocr_engine import create_engine, USER_THREAD_LIMIT
+from ocr_pipeline import ocr_image
+from ocr_utils import setup_tesseract_headless
+from system_utils import get_optimal_workers, get_thread_budget
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.webp')
+
+# One resident engine per worker process, created by _init_worker
+_worker_engine = None
+
+
+def iter_image_paths(source, recursive=False):
+    """Yield image paths from a directory or a glob pattern in a stable order"""
+    if os.path.isdir(source):
+        if recursive:
+            for dirpath, dirnames, filenames in os.walk(source):
+                dirnames.sort()
+                for filename in sorted(filenames):
+                    if filename.lower().endswith(IMAGE_EXTENSIONS):
+                        yield os.path.join(dirpath, filename)
+        else:
+            for entry in sorted(os.scandir(source), key=lambda e: e.name):
+                if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                    yield entry.path
+    else:
+        for path in sorted(glob.iglob(source, recursive=True)):
+            if os.path.isfile(path) and path.lower().endswith(IMAGE_EXTENSIONS):
+                yield path
+
+
+def _init_worker(backend):
+    global _worker_engine
+    setup_tesseract_headless()
+    # Each process already runs one image at a time, so one API instance is enough
+    _worker_engine = create_engine(backend, pool_size=1)
+
+
+def _process_path(path):
+    start = time.perf_counter()
+    try:
+        image = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            raise ValueError("could not decode image")
+        text = ocr_image(image, _worker_engine)
+        return {'path': path, 'text': text, 'seconds': round(time.perf_counter() - start, 4)}
+    except Exception as e:
+        return {'path': path, 'error': str(e), 'seconds': round(time.perf_counter() - start, 4)}
+
+
+def run_batch(paths, output, workers=None, backend='auto', chunksize=4):
+    """
+    OCR every path on a process pool and write JSON Lines to output.
+
+    Results are streamed in input order. Returns (count, errors, elapsed_seconds).
+    """
+    if workers is None:
+        _, workers = get_optimal_workers()
+    # Worker processes are the parallel jobs here; each gets its share of the
+    # cores for Tesseract's threads. Spawned workers load Tesseract after this
+    # is set, forked ones keep the limit the parent started with.
+    if USER_THREAD_LIMIT is None:
+        _, threads = get_thread_budget(workers)
+        os.environ['OMP_THREAD_LIMIT'] = str(threads)
+    count = 0
+    errors = 0
+    start = time.perf_counter()
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(backend,)) as pool:
+        for result in pool.imap(_process_path, paths, chunksize=chunksize):
+            output.write(json.dumps(result, ensure_ascii=False) + '\n')
+            count += 1
+            if 'error' in result:
+                errors += 1
+    return count, errors, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch OCR images without the GUI")
+    parser.add_argument('source', help="Directory of images or a glob pattern")
+    parser.add_argument('-o', '--output', help="JSON Lines output file (default: stdout)")
+    parser.add_argument('-r', '--recursive', action='store_true', help="Recurse into subdirectories")
+    parser.add_argument('-w', '--workers', type=int, help="Worker processes (default: CPU/memory heuristic)")
+    parser.add_argument('--backend', default='auto', choices=['auto', 'tesserocr', 'pytesseract'])
+    parser.add_argument('--chunksize', type=int, default=4)
+    args = parser.parse_args(argv)
+
+    paths = iter_image_paths(args.source, args.recursive)
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        count, errors, elapsed = run_batch(paths, output, args.workers, args.backend, args.chunksize)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    rate = count / elapsed if elapsed > 0 else 0.0
+    print(f"Processed {count} images ({errors} errors) in {elapsed:.2f}s: {rate:.2f} images/s",
+          file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
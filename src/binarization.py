@@ -0,0 +1,169 @@
+"""
+Local-threshold binarization on integral images (Sauvola and Wolf).
+
+Each pixel is compared against a threshold derived from the mean and
+standard deviation of the window around it. Both come from integral images
+of the pixels and their squares, so the cost per pixel does not depend on
+the window size. Rows are processed in strips, which keeps the float64
+integrals small and in cache. Text polarity is detected first, and
+light-on-dark text (dark UI themes) is thresholded as if it were inverted,
+so the output is always black text on white like the other binarize
+methods.
+"""
+import cv2
+import numpy as np
+
+INTEGRAL_METHODS = ('sauvola', 'wolf')
+
+DEFAULT_WINDOW = 25
+DEFAULT_K = {'sauvola': 0.2, 'wolf': 0.5}
+# Dynamic range of the standard deviation in Sauvola's formula
+SAUVOLA_R = 128.0
+# Rows per strip: two float64 integrals of (rows + window) x width stay in cache
+STRIP_ROWS = 32
+# Polarity is judged on every POLARITY_STRIDE-th pixel
+POLARITY_STRIDE = 4
+
+
+def detect_polarity(gray):
+    """
+    Return True when the text is lighter than its background.
+
+    The background is the majority tone of an Otsu split; text, being
+    thin strokes, is the minority. A BGR image is converted after sampling.
+    """
+    sample = np.ascontiguousarray(gray[::POLARITY_STRIDE, ::POLARITY_STRIDE])
+    if sample.ndim == 3:
+        sample = cv2.cvtColor(sample, cv2.COLOR_BGR2GRAY) if sample.shape[2] == 3 else sample[:, :, 0].copy()
+    if sample.size == 0:
+        return False
+    threshold, _ = cv2.threshold(sample, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return np.count_nonzero(sample > threshold) < sample.size // 2
+
+
+def _window_stats(gray, window, light_text, buffers):
+    """
+    Yield (top row, local mean, local standard deviation) per strip, as
+    float32 arrays of strip shape. The mean is of the inverted image when
+    light_text is set; the deviation is the same either way.
+    """
+    height, width = gray.shape
+    radius = window // 2
+    window = 2 * radius + 1
+    padded_shape = (height + window - 1, width + window - 1)
+    padded = buffers.acquire(padded_shape) if buffers is not None else np.empty(padded_shape, np.uint8)
+    try:
+        cv2.copyMakeBorder(gray, radius, radius, radius, radius, cv2.BORDER_REFLECT_101, dst=padded)
+        rows = min(STRIP_ROWS, height)
+        sums = np.empty((rows + window, width + window), np.int32)
+        squares = np.empty((rows + window, width + window), np.float64)
+        column_sums = np.empty((rows, width + window), np.int32)
+        column_squares = np.empty((rows, width + window), np.float64)
+        mean = np.empty((rows, width), np.float32)
+        deviation = np.empty((rows, width), np.float32)
+        scratch = np.empty((rows, width), np.float32)
+        scale = np.float32(1.0 / (window * window))
+        for top in range(0, height, rows):
+            count = min(rows, height - top)
+            # Integral of the strip alone keeps the sums exact in int32 and
+            # precise in float64
+            cv2.integral2(padded[top:top + count + window - 1], sums[:count + window], squares[:count + window],
+                          sdepth=cv2.CV_32S, sqdepth=cv2.CV_64F)
+            m, d, s = mean[:count], deviation[:count], scratch[:count]
+            # Window sum = differences of the integral, first down, then across
+            np.subtract(sums[window:window + count], sums[:count], out=column_sums[:count])
+            np.subtract(column_sums[:count, window:], column_sums[:count, :width], out=m, casting='unsafe')
+            np.subtract(squares[window:window + count], squares[:count], out=column_squares[:count])
+            np.subtract(column_squares[:count, window:], column_squares[:count, :width], out=d,
+                        casting='unsafe')
+            m *= scale
+            d *= scale
+            np.multiply(m, m, out=s)
+            d -= s
+            np.maximum(d, 0.0, out=d)
+            np.sqrt(d, out=d)
+            if light_text:
+                np.subtract(np.float32(255.0), m, out=m)
+            yield top, m, d
+    finally:
+        if buffers is not None:
+            buffers.release(padded)
+
+
+def _write(gray, top, threshold, light_text, out):
+    """Mark background (255) where the pixel is on the background side of threshold"""
+    rows = slice(top, top + threshold.shape[0])
+    if light_text:
+        # Inverted image: 255 - pixel > threshold
+        np.subtract(np.float32(255.0), threshold, out=threshold)
+        np.less(gray[rows], threshold, out=out[rows].view(bool))
+    else:
+        np.greater(gray[rows], threshold, out=out[rows].view(bool))
+
+
+def sauvola_threshold(gray, window=DEFAULT_WINDOW, k=DEFAULT_K['sauvola'], light_text=False, out=None,
+                      buffers=None):
+    """
+    Sauvola binarization: T = m * (1 + k * (s / R - 1)) in one pass over
+    the image. Flat areas fall well above (1 - k) * m and stay background
+    even when noisy, so no separate denoising pass is needed.
+    """
+    if out is None:
+        out = np.empty(gray.shape, np.uint8)
+    factor, offset = np.float32(k / SAUVOLA_R), np.float32(1.0 - k)
+    for top, mean, deviation in _window_stats(gray, window, light_text, buffers):
+        deviation *= factor
+        deviation += offset
+        deviation *= mean
+        _write(gray, top, deviation, light_text, out)
+    np.multiply(out, 255, out=out)
+    return out
+
+
+def wolf_threshold(gray, window=DEFAULT_WINDOW, k=DEFAULT_K['wolf'], light_text=False, out=None,
+                   buffers=None):
+    """
+    Wolf-Jolion binarization: T = m - k * (1 - s / R) * (m - M), with M the
+    darkest pixel and R the largest local deviation of the whole image. R
+    is only known after every window has been seen, so the per-strip means
+    and deviations are kept and thresholded in a second, cheap pass.
+    """
+    if out is None:
+        out = np.empty(gray.shape, np.uint8)
+    darkest = float(255 - gray.max()) if light_text else float(gray.min())
+    means = np.empty(gray.shape, np.float32)
+    deviations = np.empty(gray.shape, np.float32)
+    for top, mean, deviation in _window_stats(gray, window, light_text, buffers):
+        means[top:top + mean.shape[0]] = mean
+        deviations[top:top + mean.shape[0]] = deviation
+    spread = max(float(deviations.max()), 1.0)
+    # T = m - k * (m - M) + k * (s / R) * (m - M)
+    contrast = means - np.float32(darkest)
+    deviations *= np.float32(k / spread)
+    deviations -= np.float32(k)
+    deviations *= contrast
+    deviations += means
+    _write(gray, 0, deviations, light_text, out)
+    np.multiply(out, 255, out=out)
+    return out
+
+
+def binarize(gray, method='sauvola', window=DEFAULT_WINDOW, k=None, polarity='auto', out=None, buffers=None):
+    """
+    Binarize a grayscale image to black text on white with an integral-image
+    method. polarity is 'auto', 'dark_text' or 'light_text'.
+    """
+    if method not in INTEGRAL_METHODS:
+        raise ValueError(f"Unknown integral binarization method: {method}")
+    if polarity == 'auto':
+        light_text = detect_polarity(gray)
+    elif polarity in ('dark_text', 'light_text'):
+        light_text = polarity == 'light_text'
+    else:
+        raise ValueError(f"Unknown text polarity: {polarity}")
+    if k is None:
+        k = DEFAULT_K[method]
+    if gray.shape[0] == 0 or gray.shape[1] == 0:
+        return gray.copy() if out is None else out
+    threshold = sauvola_threshold if method == 'sauvola' else wolf_threshold
+    return threshold(gray, window, k, light_text, out, buffers)
@@ -0,0 +1,102 @@
+"""
+Size-bucketed pool of reusable image buffers.
+
+Every capture used to allocate a fresh array per step (grab, grayscale,
+resize, threshold, denoise). With a pool, each step writes into a buffer
+taken from the bucket for its size (the next power of two), and buffers are
+handed back once the next step has consumed them, so a burst of captures
+reuses the same few blocks of memory instead of growing the heap.
+"""
+import threading
+import weakref
+import numpy as np
+from config import BUFFER_POOL_MAX_BYTES
+
+# Smallest bucket; tiny arrays are not worth pooling
+MIN_BUCKET_BYTES = 64 * 1024
+
+
+def bucket_size(nbytes):
+    return max(MIN_BUCKET_BYTES, 1 << max(0, int(nbytes) - 1).bit_length())
+
+
+class BufferPool:
+    """
+    Thread-safe pool of flat byte buffers grouped by power-of-two size.
+
+    acquire() returns an array of the requested shape backed by a pooled
+    buffer; release() hands it back. Idle buffers are kept up to max_bytes,
+    larger surpluses are left to the garbage collector. Arrays that are never
+    released are simply freed as usual.
+    """
+
+    def __init__(self, max_bytes=BUFFER_POOL_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._free = {}
+        self._free_bytes = 0
+        # Buffers handed out by this pool, so foreign arrays are never adopted
+        self._owned = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def acquire(self, shape, dtype=np.uint8):
+        dtype = np.dtype(dtype)
+        nbytes = int(np.prod(shape)) * dtype.itemsize
+        size = bucket_size(nbytes)
+        with self._lock:
+            free = self._free.get(size)
+            if free:
+                base = free.pop()
+                self._free_bytes -= size
+                self.hits += 1
+            else:
+                base = None
+                self.misses += 1
+        if base is None:
+            base = np.empty(size, dtype=np.uint8)
+            with self._lock:
+                self._owned[id(base)] = base
+        return base[:nbytes].view(dtype).reshape(shape)
+
+    def release(self, array):
+        """Return an acquired array to the pool; anything else is ignored"""
+        if array is None:
+            return
+        base = array.base if array.base is not None else array
+        with self._lock:
+            if self._owned.get(id(base)) is not base:
+                return
+            if any(buffer is base for buffer in self._free.get(base.nbytes, ())):
+                return
+            if self._free_bytes + base.nbytes > self.max_bytes:
+                return
+            self._free.setdefault(base.nbytes, []).append(base)
+            self._free_bytes += base.nbytes
+
+    def clear(self):
+        with self._lock:
+            self._free.clear()
+            self._free_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'idle_bytes': self._free_bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+
+def get_buffer_pool():
+    """Return the process-wide buffer pool, creating it on first use"""
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = BufferPool()
+        return _shared_pool
@@ -0,0 +1,220 @@
+"""
+Screen-grab backends that deliver a capture as one grayscale numpy buffer.
+
+The default 'mss' backend keeps a grabber open per thread and converts its
+BGRA frame straight into a single uint8 grayscale buffer (optionally one the
+caller preallocated). 'pyautogui' is the original PIL-based path, and
+'file'/'synthetic' serve fixed frames for tests and benchmarks. XvfbDisplay
+starts a virtual X server so the real backends run headless on Linux.
+"""
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import cv2
+import numpy as np
+from config import CAPTURE_BACKEND
+
+
+class CaptureBackend:
+    """Base class; subclasses implement _grab_into"""
+    name = 'base'
+
+    def __init__(self):
+        self.captures = 0
+        self.bytes_copied = 0
+        self.last_bytes_copied = 0
+
+    def grab_gray(self, x, y, width, height, out=None):
+        """Capture a screen region as a (height, width) uint8 grayscale array"""
+        if out is None or out.shape != (height, width) or out.dtype != np.uint8:
+            out = np.empty((height, width), dtype=np.uint8)
+        copied = self._grab_into(x, y, width, height, out)
+        self.captures += 1
+        self.last_bytes_copied = copied
+        self.bytes_copied += copied
+        return out
+
+    def _grab_into(self, x, y, width, height, out):
+        """Fill out with the region; return the number of bytes written along the way"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class MSSBackend(CaptureBackend):
+    """Persistent mss grabber (one per thread, as mss handles are not thread-safe)"""
+    name = 'mss'
+
+    def __init__(self):
+        super().__init__()
+        import mss
+        self._mss = mss
+        self._local = threading.local()
+        self._grabbers = []
+        self._lock = threading.Lock()
+
+    def _grabber(self):
+        grabber = getattr(self._local, 'grabber', None)
+        if grabber is None:
+            grabber = self._local.grabber = self._mss.mss()
+            with self._lock:
+                self._grabbers.append(grabber)
+        return grabber
+
+    def _grab_into(self, x, y, width, height, out):
+        shot = self._grabber().grab({'left': x, 'top': y, 'width': width, 'height': height})
+        # View the BGRA bytes mss already holds; the only copy we make is into out
+        bgra = np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+        cv2.cvtColor(bgra, cv2.COLOR_BGRA2GRAY, dst=out)
+        return bgra.nbytes + out.nbytes
+
+    def close(self):
+        with self._lock:
+            for grabber in self._grabbers:
+                try:
+                    grabber.close()
+                except Exception:
+                    pass
+            self._grabbers = []
+        self._local = threading.local()
+
+
+class PyAutoGUIBackend(CaptureBackend):
+    """Original path: PIL screenshot, then a single RGB to gray conversion"""
+    name = 'pyautogui'
+
+    def _grab_into(self, x, y, width, height, out):
+        import pyautogui
+        screenshot = pyautogui.screenshot(region=(x, y, width, height))
+        # np.asarray still copies out of the PIL image, but skips the BGR step
+        rgb = np.asarray(screenshot)
+        cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY, dst=out)
+        return width * height * 3 + rgb.nbytes + out.nbytes
+
+
+class ArrayBackend(CaptureBackend):
+    """Serves regions of a fixed in-memory frame, like a frozen screen"""
+    name = 'array'
+
+    def __init__(self, frame):
+        super().__init__()
+        self.set_frame(frame)
+
+    def set_frame(self, frame):
+        if frame.ndim == 3 and frame.shape[2] == 3:
+            # Store frames like a real screen buffer (BGRA) so conversion costs match
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2BGRA)
+        self.frame = frame
+
+    def _grab_into(self, x, y, width, height, out):
+        region = self.frame[y:y + height, x:x + width]
+        if region.shape[:2] != (height, width):
+            raise ValueError(f"Region {x},{y} {width}x{height} is outside the {self.frame.shape[1]}x{self.frame.shape[0]} frame")
+        if region.ndim == 2:
+            np.copyto(out, region)
+        else:
+            cv2.cvtColor(region, cv2.COLOR_BGRA2GRAY, dst=out)
+        return out.nbytes
+
+
+class FileBackend(ArrayBackend):
+    """Treats an image file as the screen"""
+    name = 'file'
+
+    def __init__(self, path):
+        frame = cv2.imread(path, cv2.IMREAD_COLOR)
+        if frame is None:
+            raise ValueError(f"Could not read image: {path}")
+        super().__init__(frame)
+
+
+class SyntheticBackend(ArrayBackend):
+    """Renders synthetic text as the screen, for tests and benchmarks"""
+    name = 'synthetic'
+
+    def __init__(self, text=None, size=(1920, 1080), **render_kwargs):
+        from synthetic_text import render_text_image, text_for_lines
+        rgb = render_text_image(text or text_for_lines(40), size=size, **render_kwargs)
+        super().__init__(cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR))
+
+
+class XvfbDisplay:
+    """
+    Run a virtual X server for headless capture on Linux.
+
+        with XvfbDisplay(1920, 1080):
+            backend = create_backend('mss')
+    """
+
+    def __init__(self, width=1920, height=1080, depth=24, display=99):
+        self.width = width
+        self.height = height
+        self.depth = depth
+        self.display = f":{display}"
+        self.process = None
+        self._previous = None
+
+    def start(self):
+        xvfb = shutil.which('Xvfb')
+        if xvfb is None:
+            raise RuntimeError("Xvfb is not installed")
+        self.process = subprocess.Popen(
+            [xvfb, self.display, '-screen', '0', f"{self.width}x{self.height}x{self.depth}", '-nolisten', 'tcp'],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        # Wait for the server socket instead of sleeping a fixed time
+        socket_path = f"/tmp/.X11-unix/X{self.display[1:]}"
+        deadline = time.monotonic() + 5
+        while not os.path.exists(socket_path):
+            if self.process.poll() is not None or time.monotonic() > deadline:
+                self.stop()
+                raise RuntimeError(f"Xvfb failed to start on {self.display}")
+            time.sleep(0.05)
+        self._previous = os.environ.get('DISPLAY')
+        os.environ['DISPLAY'] = self.display
+        return self
+
+    def stop(self):
+        if self.process is not None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+            self.process = None
+        if self._previous is not None:
+            os.environ['DISPLAY'] = self._previous
+        elif os.environ.get('DISPLAY') == self.display:
+            del os.environ['DISPLAY']
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+
+BACKENDS = {
+    'mss': MSSBackend,
+    'pyautogui': PyAutoGUIBackend,
+    'file': FileBackend,
+    'synthetic': SyntheticBackend,
+}
+
+
+def create_backend(name=CAPTURE_BACKEND, *args, **kwargs):
+    """Create a capture backend; 'auto' prefers mss and falls back to pyautogui"""
+    if name == 'auto':
+        try:
+            return MSSBackend()
+        except Exception as e:
+            print(f"mss capture unavailable, using pyautogui: {e}", file=sys.stderr)
+            return PyAutoGUIBackend()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown capture backend: {name}")
+    return BACKENDS[name](*args, **kwargs)
@@ -0,0 +1,358 @@
+"""
+Persistent, searchable history of captures.
+
+Every recognized capture is stored in SQLite (text, time, screen region,
+pixel hash and an optional PNG thumbnail) with an FTS5 index over the text.
+The capture path only enqueues a record: a background writer encodes
+thumbnails, inserts records in batches of one transaction each and enforces
+the age, entry-count and file-size limits.
+"""
+import hashlib
+import os
+import queue
+import sqlite3
+import threading
+import time
+import cv2
+import numpy as np
+from config import (HISTORY_ENABLED, HISTORY_PATH, HISTORY_MAX_ENTRIES, HISTORY_MAX_AGE_DAYS,
+                    HISTORY_MAX_BYTES, HISTORY_THUMBNAIL_WIDTH, HISTORY_BATCH_SIZE,
+                    HISTORY_FLUSH_INTERVAL)
+
+# Records waiting for the writer; when the disk stalls, new captures are dropped
+QUEUE_LIMIT = 1000
+# Limits are enforced after this many inserted records
+EVICT_EVERY = 500
+# Share of the oldest entries dropped at once when the file is over budget
+SIZE_EVICT_FRACTION = 0.05
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS captures ("
+    "id INTEGER PRIMARY KEY, created REAL NOT NULL, "
+    "x INTEGER, y INTEGER, width INTEGER, height INTEGER, "
+    "pixel_hash TEXT, text TEXT NOT NULL, thumbnail BLOB)",
+    "CREATE INDEX IF NOT EXISTS captures_created ON captures (created)",
+    "CREATE INDEX IF NOT EXISTS captures_pixel_hash ON captures (pixel_hash)",
+]
+FTS_SCHEMA = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS captures_fts USING fts5("
+    "text, content='captures', content_rowid='id', tokenize='unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS captures_ai AFTER INSERT ON captures BEGIN "
+    "INSERT INTO captures_fts (rowid, text) VALUES (new.id, new.text); END",
+    "CREATE TRIGGER IF NOT EXISTS captures_ad AFTER DELETE ON captures BEGIN "
+    "INSERT INTO captures_fts (captures_fts, rowid, text) VALUES ('delete', old.id, old.text); END",
+]
+COLUMNS = "c.id, c.created, c.x, c.y, c.width, c.height, c.pixel_hash, c.thumbnail IS NOT NULL"
+
+
+def pixel_hash(image):
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{image.shape}|{image.dtype}".encode('utf-8'))
+    digest.update(memoryview(np.ascontiguousarray(image)))
+    return digest.hexdigest()
+
+
+def make_thumbnail(image, width=HISTORY_THUMBNAIL_WIDTH):
+    """PNG bytes of the capture scaled down to at most width pixels across"""
+    if image.shape[1] > width:
+        height = max(1, round(image.shape[0] * width / image.shape[1]))
+        image = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+    ok, encoded = cv2.imencode('.png', image)
+    return encoded.tobytes() if ok else None
+
+
+def fts_query(text):
+    """Turn free text into an FTS5 query: every word must match as a prefix"""
+    words = [word.replace('"', '""') for word in text.split()]
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def _row_to_entry(row):
+    return {
+        'id': row[0],
+        'created': row[1],
+        'region': (row[2], row[3], row[4], row[5]),
+        'pixel_hash': row[6],
+        'has_thumbnail': bool(row[7]),
+        'text': row[8],
+    }
+
+
+class CaptureHistory:
+    """
+    SQLite capture history with a batched background writer.
+
+    add() never touches the disk. search(), recent() and the other readers use
+    their own connection, which WAL mode lets run alongside the writer.
+    """
+
+    def __init__(self, path=HISTORY_PATH, max_entries=HISTORY_MAX_ENTRIES, max_age_days=HISTORY_MAX_AGE_DAYS,
+                 max_bytes=HISTORY_MAX_BYTES, thumbnail_width=HISTORY_THUMBNAIL_WIDTH,
+                 batch_size=HISTORY_BATCH_SIZE, flush_interval=HISTORY_FLUSH_INTERVAL):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self.max_bytes = max_bytes
+        self.thumbnail_width = thumbnail_width
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.dropped = 0
+        self.evicted = 0
+        self._queue = queue.Queue(maxsize=QUEUE_LIMIT)
+        self._read_lock = threading.Lock()
+        self._since_evict = 0
+        # Entry count: taken once by the writer thread, then kept up to date by
+        # the writer, evict() and delete() so count() need not scan the table
+        self._count = None
+        self._count_lock = threading.Lock()
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._writer_db = self._connect()
+        self.fts = self._create_schema(self._writer_db)
+        self._reader_db = self._connect() if path != ':memory:' else self._writer_db
+        self._thread = threading.Thread(target=self._run_writer, name='capture-history', daemon=True)
+        self._thread.start()
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, check_same_thread=False)
+        # Switching to WAL writes the header of a new file, fixing its vacuum
+        # mode, so auto_vacuum has to be set first
+        db.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def _create_schema(self, db):
+        # Files created without it (older versions) only switch on a VACUUM;
+        # without incremental mode eviction never gives space back
+        if db.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            db.execute("VACUUM")
+        for statement in SCHEMA:
+            db.execute(statement)
+        try:
+            for statement in FTS_SCHEMA:
+                db.execute(statement)
+            fts = True
+        except sqlite3.OperationalError as e:
+            print(f"SQLite FTS5 unavailable, history search falls back to LIKE: {e}")
+            fts = False
+        db.commit()
+        return fts
+
+    def add(self, text, region, image=None, release=None):
+        """
+        Queue a capture for storage; returns False if it had to be dropped.
+
+        image must not change until the writer is done with it, at which point
+        release(image) is called (e.g. to hand a pooled buffer back).
+        """
+        if not text:
+            return False
+        try:
+            self._queue.put_nowait((time.time(), tuple(region), text, image, release))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _prepare(self, item):
+        created, (x, y, width, height), text, image, release = item
+        hashed = thumbnail = None
+        if image is not None:
+            try:
+                hashed = pixel_hash(image)
+                if self.thumbnail_width:
+                    thumbnail = make_thumbnail(image, self.thumbnail_width)
+            except Exception as e:
+                print(f"History thumbnail failed: {e}")
+            finally:
+                if release is not None:
+                    release(image)
+        return created, x, y, width, height, hashed, text, thumbnail
+
+    def _run_writer(self):
+        # Apply the age limit to whatever accumulated while the app was closed
+        try:
+            self.evict()
+        except Exception as e:
+            print(f"History eviction failed: {e}")
+        with self._count_lock:
+            self._count = self._writer_db.execute("SELECT COUNT(*) FROM captures").fetchone()[0]
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            stop = False
+            # Collect whatever arrives within the flush interval into one transaction
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            self._write_batch(batch)
+            if stop:
+                break
+
+    def _write_batch(self, batch):
+        try:
+            rows = [self._prepare(item) for item in batch]
+            with self._writer_db:
+                self._writer_db.executemany(
+                    "INSERT INTO captures (created, x, y, width, height, pixel_hash, text, thumbnail) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+                )
+            self.written += len(rows)
+            self._adjust_count(len(rows))
+            self._since_evict += len(rows)
+            if self._since_evict >= EVICT_EVERY:
+                self._since_evict = 0
+                self.evict()
+        except Exception as e:
+            print(f"History write failed: {e}")
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    def evict(self):
+        """Drop entries past the age, count and size limits; returns how many"""
+        db = self._writer_db
+        removed = 0
+        with db:
+            if self.max_age_days:
+                cutoff = time.time() - self.max_age_days * 86400
+                removed += db.execute("DELETE FROM captures WHERE created < ?", (cutoff,)).rowcount
+            if self.max_entries:
+                row = db.execute("SELECT id FROM captures ORDER BY id DESC LIMIT 1 OFFSET ?",
+                                 (self.max_entries,)).fetchone()
+                if row is not None:
+                    removed += db.execute("DELETE FROM captures WHERE id <= ?", (row[0],)).rowcount
+            if self.max_bytes:
+                removed += self._evict_to_size(db)
+        if removed:
+            db.execute("PRAGMA incremental_vacuum").fetchall()
+            self.evicted += removed
+            self._adjust_count(-removed)
+        return removed
+
+    def _evict_to_size(self, db):
+        removed = 0
+        while self._file_bytes(db) > self.max_bytes:
+            count = db.execute("SELECT COUNT(*) FROM captures").fetchone()[0]
+            if not count:
+                break
+            step = max(1, int(count * SIZE_EVICT_FRACTION))
+            row = db.execute("SELECT id FROM captures ORDER BY id LIMIT 1 OFFSET ?", (step - 1,)).fetchone()
+            removed += db.execute("DELETE FROM captures WHERE id <= ?", (row[0],)).rowcount
+            # Free pages only count once they are handed back to the file system
+            db.commit()
+            db.execute("PRAGMA incremental_vacuum").fetchall()
+        return removed
+
+    @staticmethod
+    def _file_bytes(db):
+        page_size = db.execute("PRAGMA page_size").fetchone()[0]
+        pages = db.execute("PRAGMA page_count").fetchone()[0]
+        free = db.execute("PRAGMA freelist_count").fetchone()[0]
+        return (pages - free) * page_size
+
+    def flush(self):
+        """Block until every queued capture has been written"""
+        self._queue.join()
+
+    def search(self, query, limit=100, offset=0):
+        """Newest captures whose text matches every word of query (as prefixes)"""
+        query = (query or '').strip()
+        if not query:
+            return self.recent(limit, offset)
+        with self._read_lock:
+            if self.fts:
+                rows = self._reader_db.execute(
+                    f"SELECT {COLUMNS}, c.text FROM captures_fts f JOIN captures c ON c.id = f.rowid "
+                    "WHERE captures_fts MATCH ? ORDER BY f.rowid DESC LIMIT ? OFFSET ?",
+                    (fts_query(query), limit, offset)
+                ).fetchall()
+            else:
+                pattern = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+                rows = self._reader_db.execute(
+                    f"SELECT {COLUMNS}, c.text FROM captures c WHERE c.text LIKE ? ESCAPE '\\' "
+                    "ORDER BY c.id DESC LIMIT ? OFFSET ?", (pattern, limit, offset)
+                ).fetchall()
+        return [_row_to_entry(row) for row in rows]
+
+    def recent(self, limit=100, offset=0):
+        with self._read_lock:
+            rows = self._reader_db.execute(
+                f"SELECT {COLUMNS}, c.text FROM captures c ORDER BY c.id DESC LIMIT ? OFFSET ?",
+                (limit, offset)
+            ).fetchall()
+        return [_row_to_entry(row) for row in rows]
+
+    def thumbnail(self, entry_id):
+        """PNG bytes of an entry's thumbnail, or None"""
+        with self._read_lock:
+            row = self._reader_db.execute("SELECT thumbnail FROM captures WHERE id = ?", (entry_id,)).fetchone()
+        return row[0] if row else None
+
+    def count(self):
+        """Number of stored captures; only scans the table until the writer has counted it"""
+        with self._count_lock:
+            if self._count is not None:
+                return self._count
+        with self._read_lock:
+            return self._reader_db.execute("SELECT COUNT(*) FROM captures").fetchone()[0]
+
+    def _adjust_count(self, delta):
+        with self._count_lock:
+            if self._count is not None:
+                self._count += delta
+
+    def delete(self, entry_id):
+        # Under the count lock, so the writer's first count sees this delete or
+        # the adjustment does
+        with self._count_lock, self._read_lock:
+            with self._reader_db:
+                removed = self._reader_db.execute("DELETE FROM captures WHERE id = ?", (entry_id,)).rowcount
+            if self._count is not None:
+                self._count -= removed
+
+    def stats(self):
+        return {
+            'written': self.written,
+            'dropped': self.dropped,
+            'evicted': self.evicted,
+            'queued': self._queue.qsize(),
+        }
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        if self._reader_db is not self._writer_db:
+            self._reader_db.close()
+        self._writer_db.close()
+
+
+_shared_history = None
+_shared_history_lock = threading.Lock()
+
+
+def get_history():
+    """Return the process-wide capture history, or None when it is disabled"""
+    global _shared_history
+    if not HISTORY_ENABLED:
+        return None
+    with _shared_history_lock:
+        if _shared_history is None:
+            try:
+                _shared_history = CaptureHistory()
+            except Exception as e:
+                print(f"Capture history unavailable: {e}")
+                return None
+        return _shared_history
@@ -1,34 +1,53 @@
-import pyautogui
-import cv2
-import numpy as np
-from PIL import Image
-from tkinter import Tk, Canvas, messagebox
+from tkinter import Tk, Toplevel, Canvas, messagebox
 import win32clipboard
-import pytesseract
-import threading
 import concurrent.futures
-import queue
 import time
 from config import COLORS
 from ocr_utils import setup_tesseract
+from ocr_engine import get_engine, CancelToken, OCRCancelled
+from ocr_pipeline import enhance_image, ocr_image
+from ocr_cache import get_cache
+from capture_history import get_history
+from instrumentation import metrics
+from capture_backends import create_backend
+from buffer_pool import get_buffer_pool
+from ocr_scheduler import get_scheduler, INTERACTIVE
 
 class ScreenCaptureApp:
-    def __init__(self, dashboard=None):
+    def __init__(self, dashboard=None, master=None):
+        # With a master window the overlay stays resident: it is created once,
+        # shown per hotkey and hidden again instead of being torn down
+        self.master = master
+        self.resident = master is not None
         self.root = None
         self.canvas = None
         self.start_x = None
         self.start_y = None
         self.current_rect = None
         self.dashboard = dashboard
-        self.result_queue = queue.Queue()
-        self.processing_thread = None
-        self.thread_pool = concurrent.futures.ThreadPoolExecutor(max_workers=4)
+        self.hotkey_time = None
+        self.release_time = None
+        self.latencies = {}
+        # One worker runs the captures (keeping its mss grabber warm); the
+        # Tesseract calls, including line bands of large selections, go to
+        # the shared scheduler ahead of any background OCR
+        self.capture_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self.current_future = None
+        self.cancel_token = None
+        self.ocr_executor = get_scheduler().executor(INTERACTIVE)
         setup_tesseract()
+        self.engine = get_engine()
+        self.cache = get_cache()
+        self.history = get_history()
+        self.capture_backend = create_backend()
+        self.buffer_pool = get_buffer_pool()
         self.initialize_ui()
+        if self.resident:
+            self.root.withdraw()
 
     def initialize_ui(self):
         try:
-            self.root = Tk()
+            self.root = Toplevel(self.master) if self.master is not None else Tk()
             self.root.title("Screen Capture OCR")
             self.root.attributes('-alpha', 0.005)
             self.root.attributes('-fullscreen', True)
@@ -39,12 +58,44 @@ class ScreenCaptureApp:
             self.canvas.bind("<B1-Motion>", self.on_drag)
             self.canvas.bind("<ButtonRelease-1>", self.on_release)
             self.root.bind("<Escape>", lambda e: self.quit())
+            self.root.bind("<Map>", self.on_map)
+            self.root.bind("<<ProcessingDone>>", self.on_processing_done)
         except Exception as e:
             print(f"Failed to initialize UI: {e}")
             if self.root:
                 self.root.destroy()
             raise
 
+    def show(self, hotkey_time=None):
+        """Show the resident overlay for a new selection"""
+        self.hotkey_time = hotkey_time
+        self.start_x = None
+        self.start_y = None
+        self.root.deiconify()
+        # Some window managers drop these while the window is withdrawn
+        self.root.attributes('-fullscreen', True)
+        self.root.attributes('-topmost', True)
+        self.root.lift()
+        self.root.focus_force()
+
+    def hide(self):
+        if self.current_rect:
+            self.canvas.delete(self.current_rect)
+            self.current_rect = None
+        self.start_x = None
+        self.start_y = None
+        self.root.withdraw()
+
+    def on_map(self, event):
+        # <Map> on the toplevel means the overlay is on screen again
+        if event.widget is self.root and self.hotkey_time is not None:
+            self.record_latency('hotkey_to_visible', time.perf_counter() - self.hotkey_time)
+            self.hotkey_time = None
+
+    def record_latency(self, name, seconds):
+        self.latencies[name] = seconds
+        metrics.observe(name, seconds)
+
     def on_press(self, event):
         self.start_x = event.x
         self.start_y = event.y
@@ -60,6 +111,7 @@ class ScreenCaptureApp:
     def on_release(self, event):
         if not self.start_x or not self.start_y:
             return
+        self.release_time = time.perf_counter()
         try:
             # Reset the selection rectangle
             if self.current_rect:
@@ -86,16 +138,14 @@ class ScreenCaptureApp:
             
             # Capture screenshot with proper error handling
             try:
-                # Start a loading indicator or message
-                self.processing_thread = threading.Thread(
-                    target=self.process_image_async,
-                    args=(x1, y1, x2 - x1, y2 - y1)
+                # A new selection supersedes whatever is still running
+                self.cancel_processing()
+                self.cancel_token = CancelToken()
+                self.current_future = self.capture_executor.submit(
+                    self.process_image_async, x1, y1, x2 - x1, y2 - y1, self.cancel_token
                 )
-                self.processing_thread.daemon = True
-                self.processing_thread.start()
-                
-                # Check for results every 50ms
-                self.root.after(50, self.check_processing_results)
+                # Completion is posted to the Tk loop instead of being polled
+                self.current_future.add_done_callback(self.post_processing_done)
             except Exception as inner_e:
                 print(f"Error starting processing thread: {inner_e}")
                 # Show the window again if there's an error
@@ -128,7 +178,31 @@ class ScreenCaptureApp:
                 pass
             raise
 
+    def cancel_processing(self):
+        """Abandon in-flight work: drop queued jobs and kill running OCR"""
+        if self.cancel_token is not None:
+            self.cancel_token.cancel()
+        if self.current_future is not None:
+            self.current_future.cancel()
+        self.cancel_token = None
+        self.current_future = None
+
+    def post_processing_done(self, future):
+        # Runs on the worker thread; event_generate is the thread-safe way into Tk
+        try:
+            self.root.event_generate("<<ProcessingDone>>", when='tail')
+        except Exception:
+            # The overlay was destroyed while the job was running
+            pass
+
     def quit(self):
+        self.cancel_processing()
+        if self.resident:
+            self.hide()
+        else:
+            self.destroy()
+
+    def destroy(self):
         if self.root:
             try:
                 # Clean up resources before quitting
@@ -136,12 +210,10 @@ class ScreenCaptureApp:
                     self.canvas.delete(self.current_rect)
                     self.current_rect = None
                 
-                # Shut down the thread pool
-                self.thread_pool.shutdown(wait=False)
-                
-                # Force garbage collection to free memory
-                import gc
-                gc.collect()
+                # Shut down the capture worker
+                self.cancel_processing()
+                self.capture_executor.shutdown(wait=False)
+                self.capture_backend.close()
                 
                 # Destroy the root window properly
                 self.root.destroy()
@@ -149,139 +221,107 @@ class ScreenCaptureApp:
                 print(f"Error during cleanup: {e}")
                 # Make sure we still try to quit even if cleanup fails
                 try:
-                    self.thread_pool.shutdown(wait=False)
-                    self.root.quit()
+                    self.capture_executor.shutdown(wait=False)
+                    # A resident overlay shares the dashboard's event loop
+                    if not self.resident:
+                        self.root.quit()
                 except:
                     pass
 
-    def process_image_async(self, x, y, width, height):
-        """Process the image in a separate thread to keep UI responsive"""
+    def process_image_async(self, x, y, width, height, cancel_token=None):
+        """Capture and OCR on a worker thread; returns (success, text or error, trace)"""
+        trace = metrics.start_trace()
+        image = None
         try:
-            # Capture screenshot
-            screenshot = pyautogui.screenshot(region=(x, y, width, height))
-            
-            # Convert to OpenCV format
-            image_array = np.array(screenshot)
-            del screenshot  # Free memory
-            
-            # Convert to OpenCV format using CPU - safer across all systems
-            image = cv2.cvtColor(image_array, cv2.COLOR_RGB2BGR)
-            
-            # Only attempt GPU acceleration if the image is large enough to benefit
-            if width * height > 250000:  # Only for larger images
-                try:
-                    # Safely check for CUDA without importing cuda module directly
-                    has_cuda = hasattr(cv2, 'cuda') and hasattr(cv2.cuda, 'getCudaEnabledDeviceCount')
-                    if has_cuda and cv2.cuda.getCudaEnabledDeviceCount() > 0:
-                        # Use GPU acceleration
-                        try:
-                            gpu_image = cv2.cuda_GpuMat()
-                            gpu_image.upload(image)
-                            gpu_gray = cv2.cuda.cvtColor(gpu_image, cv2.COLOR_BGR2GRAY)
-                            gray = gpu_gray.download()
-                            # If we got here, GPU processing worked
-                            print("Using GPU acceleration for image processing")
-                            del gpu_image, gpu_gray  # Free GPU memory
-                        except Exception as gpu_err:
-                            print(f"GPU acceleration failed, falling back to CPU: {gpu_err}")
-                            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-                    else:
-                        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-                except Exception:
-                    # Any CUDA-related error, fall back to CPU
-                    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            else:
-                # For smaller images, just use CPU
-                gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            
-            # Enhance image for better OCR results
-            image = self.enhance_image(image)
-            
-            # Process with OCR
-            text = pytesseract.image_to_string(image)
-            del image  # Free memory
+            with trace.activate():
+                with trace.stage('capture'):
+                    # Grab straight into a pooled grayscale buffer
+                    image = self.capture_backend.grab_gray(
+                        x, y, width, height, out=self.buffer_pool.acquire((height, width))
+                    )
+                trace.set(capture_bytes=self.capture_backend.last_bytes_copied)
+                if cancel_token is not None:
+                    cancel_token.raise_if_cancelled()
             
-            # Put result in queue
-            self.result_queue.put((True, text.strip()))
+                # Enhance and OCR (large selections in parallel line bands),
+                # unless the same pixels were recognized before
+                text = ocr_image(image, self.engine, self.cache, self.ocr_executor,
+                                 cancel_token=cancel_token)
+                if self.history is not None and text.strip():
+                    # Only queued here; the history writer thread does the disk work
+                    # and hands the buffer back to the pool when it is done
+                    if self.history.add(text, (x, y, width, height), image, self.buffer_pool.release):
+                        image = None
+                return True, text, trace
+        except OCRCancelled:
+            trace.finish('cancelled')
+            raise
         except Exception as e:
             print(f"Error in image processing thread: {e}")
-            self.result_queue.put((False, str(e)))
+            trace.finish('error', error=str(e))
+            return False, str(e), trace
+        finally:
+            self.buffer_pool.release(image)
     
     def enhance_image(self, image):
         """Enhance image for better OCR results with cross-system compatibility"""
-        # If grayscale conversion already happened in process_image_async
-        if len(image.shape) == 2 or (len(image.shape) == 3 and image.shape[2] == 1):
-            gray = image
-        else:
-            # Convert to grayscale if needed
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        
-        # Apply adaptive thresholding with safe parameters
-        try:
-            thresh = cv2.adaptiveThreshold(
-                gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-                cv2.THRESH_BINARY, 11, 2
-            )
-        except Exception as e:
-            print(f"Adaptive threshold failed, using simple threshold: {e}")
-            # Fall back to simple thresholding if adaptive fails
-            _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-        
-        # Try to apply noise reduction, but fall back if it fails
-        try:
-            # Use a faster denoising method with reasonable parameters
-            denoise = cv2.fastNlMeansDenoising(thresh, None, 10, 7, 21)
-            return denoise
-        except Exception as e:
-            print(f"Denoising failed, using threshold image: {e}")
-            return thresh
+        return enhance_image(image)
     
-    def check_processing_results(self):
-        """Check if the image processing is complete"""
+    def on_processing_done(self, event=None):
+        """Handle the finished capture; events from superseded jobs are ignored"""
+        future = self.current_future
+        if future is None or not future.done() or future.cancelled():
+            return
+        self.current_future = None
+        self.cancel_token = None
         try:
-            # Non-blocking check for results
             try:
-                success, result = self.result_queue.get_nowait()
+                success, result, trace = future.result()
+            except OCRCancelled:
+                return
+            if success:
+                if not result:
+                    # No text found
+                    trace.finish('empty')
+                    if self.dashboard and hasattr(self.dashboard, 'error_var') and self.dashboard.error_var.get():
+                        messagebox.showinfo("Info", "No text was found in the selected area.")
+                    # Reset state and show window again
+                    self.start_x = None
+                    self.start_y = None
+                    self.root.deiconify()
+                    return
                 
-                if success:
-                    if not result:
-                        # No text found
-                        if self.dashboard and hasattr(self.dashboard, 'error_var') and self.dashboard.error_var.get():
-                            messagebox.showinfo("Info", "No text was found in the selected area.")
-                        # Reset state and show window again
-                        self.start_x = None
-                        self.start_y = None
-                        self.root.deiconify()
-                        return
-                    
-                    # Copy text to clipboard
-                    try:
+                # Copy text to clipboard
+                try:
+                    with trace.stage('clipboard'):
                         self.copy_to_clipboard(result)
-                        
-                        # Show success notification if enabled
-                        if self.dashboard and hasattr(self.dashboard, 'notif_var') and self.dashboard.notif_var.get():
-                            messagebox.showinfo("Success", "Text copied to clipboard!")
-                        self.quit()
-                    except Exception as clip_err:
-                        print(f"Clipboard error: {clip_err}")
-                        messagebox.showerror("Error", f"Failed to copy to clipboard: {str(clip_err)}")
-                        # Reset state and show window again
-                        self.start_x = None
-                        self.start_y = None
-                        self.root.deiconify()
-                else:
-                    # Error occurred
-                    messagebox.showerror("Error", f"Failed to process image: {result}")
+                    release_to_clipboard = time.perf_counter() - self.release_time
+                    self.record_latency('release_to_clipboard', release_to_clipboard)
+                    trace.finish('ok', chars=len(result),
+                                 release_to_clipboard_ms=round(release_to_clipboard * 1000, 3))
+                    
+                    # Show success notification if enabled
+                    if self.dashboard and hasattr(self.dashboard, 'notif_var') and self.dashboard.notif_var.get():
+                        messagebox.showinfo("Success", "Text copied to clipboard!")
+                    self.quit()
+                except Exception as clip_err:
+                    print(f"Clipboard error: {clip_err}")
+                    trace.finish('error', error=str(clip_err))
+                    messagebox.showerror("Error", f"Failed to copy to clipboard: {str(clip_err)}")
                     # Reset state and show window again
                     self.start_x = None
                     self.start_y = None
                     self.root.deiconify()
-            except queue.Empty:
-                # Not ready yet, check again in 50ms
-                self.root.after(50, self.check_processing_results)
+            else:
+                # Error occurred
+                messagebox.showerror("Error", f"Failed to process image: {result}")
+                # Reset state and show window again
+                self.start_x = None
+                self.start_y = None
+                self.root.deiconify()
         except Exception as e:
             # Handle any unexpected errors
-            print(f"Unexpected error in check_processing_results: {e}")
+            print(f"Unexpected error in on_processing_done: {e}")
             messagebox.showerror("Error", f"An unexpected error occurred: {str(e)}")
             # Reset state and show window again
             self.start_x = None
@@ -1,4 +1,7 @@
 # config.py
+import json
+import os
+import sys
 
 # Color scheme for the dark theme UI
 COLORS = {
@@ -16,4 +19,153 @@ HOTKEY = 'ctrl+shift+x'
 
 # Tesseract download URL
 TESSERACT_DOWNLOAD_URL = "https://sourceforge.net/projects/tesseract-ocr-alt/files/latest/download"
-TESSERACT_INSTALLER_NAME = "tesseract-installer.exe" 
\ No newline at end of file
+TESSERACT_INSTALLER_NAME = "tesseract-installer.exe" 
+# OCR engine: 'auto' keeps a resident Tesseract (tesserocr) loaded and falls
+# back to pytesseract; 'tesserocr' or 'pytesseract' force a backend
+OCR_BACKEND = 'auto'
+OCR_ENGINE_POOL_SIZE = 4
+OCR_LANGUAGE = 'eng'
+
+# OCR scheduler (ocr_scheduler.py): the cores are divided between at most
+# OCR_MAX_CONCURRENT_JOBS Tesseract calls at a time, each limited to
+# cores / jobs OpenMP threads (OMP_THREAD_LIMIT, unless set in the
+# environment). Interactive captures jump ahead of monitor and batch work and
+# keep one worker to themselves; background submissions beyond
+# OCR_SCHEDULER_QUEUE_SIZE wait or are rejected.
+OCR_MAX_CONCURRENT_JOBS = 4
+OCR_SCHEDULER_QUEUE_SIZE = 64
+
+# OCR result cache: in-memory LRU byte budget plus an on-disk store that
+# survives restarts (set OCR_CACHE_PATH to None for memory only)
+OCR_CACHE_ENABLED = True
+OCR_CACHE_MAX_BYTES = 4 * 1024 * 1024
+OCR_CACHE_DISK_MAX_ENTRIES = 5000
+OCR_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.screen_capture_ocr', 'ocr_cache.sqlite3')
+
+# Per-stage timing instrumentation. Set SCREEN_OCR_METRICS=0 to switch it off.
+# Traces go to a rotating captures.jsonl; aggregates to metrics.prom and,
+# when a port is set, to http://127.0.0.1:<port>/metrics
+METRICS_ENABLED = os.environ.get('SCREEN_OCR_METRICS', '1') != '0'
+METRICS_DIR = os.path.join(os.path.expanduser('~'), '.screen_capture_ocr', 'metrics')
+METRICS_JSONL_MAX_BYTES = 5 * 1024 * 1024
+METRICS_JSONL_BACKUPS = 3
+METRICS_PROMETHEUS_INTERVAL = 15
+METRICS_PROMETHEUS_PORT = None
+# Rolling window behind the dashboard's performance panel: the last
+# METRICS_WINDOW_SLOTS * METRICS_WINDOW_SLOT_SECONDS seconds, in fixed memory.
+# Only the histograms and counters named here are kept in it
+METRICS_WINDOW_SLOTS = 12
+METRICS_WINDOW_SLOT_SECONDS = 5
+METRICS_ROLLING_HISTOGRAMS = ('release_to_clipboard', 'ocr', 'scheduler_interactive_wait')
+METRICS_ROLLING_COUNTERS = ('captures_ok', 'captures_empty', 'captures_error', 'captures_cancelled')
+# How often the panel redraws while the dashboard is on screen
+PERFORMANCE_PANEL_INTERVAL_MS = 1000
+
+# Preprocessing pipeline run before OCR (see preprocessing.py). Each stage runs
+# 'always', 'never' or when its condition holds for the captured image, so the
+# costly denoise pass is skipped on clean UI text. normalize_height resamples
+# the capture so the median glyph is about target_height pixels tall, which
+# shrinks zoomed/4K text (OCR time scales with pixels) and enlarges tiny labels.
+PREPROCESSING_PIPELINE = [
+    {'stage': 'grayscale'},
+    {'stage': 'normalize_height', 'when': 'text_size_off', 'target_height': 16.0,
+     'min_factor': 0.25, 'max_factor': 4.0, 'tolerance': 0.25},
+    {'stage': 'sharpen', 'when': 'blurry', 'sharpness_threshold': 100.0, 'amount': 1.0},
+    {'stage': 'binarize', 'method': 'adaptive', 'block_size': 11, 'c': 2},
+    {'stage': 'denoise', 'when': 'noisy', 'noise_threshold': 3.0, 'h': 10, 'template_window': 7, 'search_window': 21},
+]
+
+# Screen grab backend: 'auto' (persistent mss grabber, falling back to
+# pyautogui), 'mss' or 'pyautogui'
+CAPTURE_BACKEND = 'auto'
+
+# Parallel line-band OCR: selections of at least BAND_SPLIT_MIN_PIXELS pixels
+# with BAND_MIN_LINES text lines are cut into BAND_WORKERS bands at whitespace
+# gaps and OCR'd concurrently
+BAND_SPLIT_MIN_PIXELS = 400000
+BAND_MIN_LINES = 6
+BAND_WORKERS = 4
+
+# Region monitor (watch mode): poll interval in seconds, downsampling factor
+# of the change detector and the per-pixel gray-level change that counts
+MONITOR_INTERVAL = 0.5
+MONITOR_DIFF_SCALE = 4
+MONITOR_DIFF_THRESHOLD = 24
+
+# Capture history: every recognized capture is kept in a searchable SQLite
+# store. Entries older than HISTORY_MAX_AGE_DAYS, beyond HISTORY_MAX_ENTRIES or
+# past HISTORY_MAX_BYTES on disk are evicted oldest first (0 disables a limit).
+# Thumbnails are HISTORY_THUMBNAIL_WIDTH pixels wide (0 to store none).
+HISTORY_ENABLED = True
+HISTORY_PATH = os.path.join(os.path.expanduser('~'), '.screen_capture_ocr', 'history.sqlite3')
+HISTORY_MAX_ENTRIES = 500000
+HISTORY_MAX_AGE_DAYS = 365
+HISTORY_MAX_BYTES = 512 * 1024 * 1024
+HISTORY_THUMBNAIL_WIDTH = 160
+HISTORY_BATCH_SIZE = 64
+HISTORY_FLUSH_INTERVAL = 1.0
+
+# Local OCR service (ocr_service.py): requests wait in a queue of at most
+# SERVICE_QUEUE_SIZE (503 beyond that). Requests arriving within
+# SERVICE_COALESCE_WINDOW seconds (up to SERVICE_COALESCE_MAX) are coalesced:
+# identical images are recognized once and share the result. Distinct images
+# are not batched; each is its own OCR call
+SERVICE_HOST = '127.0.0.1'
+SERVICE_PORT = 8765
+SERVICE_QUEUE_SIZE = 64
+SERVICE_COALESCE_MAX = 8
+SERVICE_COALESCE_WINDOW = 0.005
+SERVICE_REQUEST_TIMEOUT = 30.0
+SERVICE_MAX_IMAGE_BYTES = 20 * 1024 * 1024
+
+# Pick the Tesseract page segmentation mode per selection (single word,
+# single line, block, columns, sparse) instead of full automatic layout analysis
+LAYOUT_CLASSIFIER_ENABLED = True
+
+# Text detection pre-pass: captures are cropped to the text before
+# preprocessing and OCR, and blank captures skip OCR entirely. Edges weaker
+# than TEXT_DETECTION_MIN_GRADIENT gray levels are treated as background.
+TEXT_DETECTION_ENABLED = True
+TEXT_DETECTION_MIN_GRADIENT = 24
+
+# Reusable image buffers (buffer_pool.py): idle buffers kept for reuse by
+# the capture pipeline are capped at this many bytes
+BUFFER_POOL_MAX_BYTES = 96 * 1024 * 1024
+
+# Confidence-driven escalation (escalation.py): captures are first OCR'd as
+# plain grayscale; only lines with a word below ESCALATION_MIN_CONFIDENCE go
+# through PREPROCESSING_PIPELINE and are re-read. If more than
+# ESCALATION_FULL_FRACTION of the lines are unsure, the whole capture is.
+ESCALATION_ENABLED = True
+ESCALATION_MIN_CONFIDENCE = 50
+ESCALATION_FULL_FRACTION = 0.5
+
+# Extra Tesseract options appended to every single-pass OCR call, e.g.
+# "--psm 6" when the layout classifier is off or "-c tessedit_do_invert=0"
+OCR_EXTRA_CONFIG = ''
+
+# Tuned profile written by tuner.py. When the file exists, its settings
+# replace the defaults above for the keys listed in PROFILE_KEYS. Point
+# SCREEN_OCR_PROFILE at another file, or at an empty string to ignore it.
+PROFILE_PATH = os.environ.get(
+    'SCREEN_OCR_PROFILE', os.path.join(os.path.expanduser('~'), '.screen_capture_ocr', 'profile.json'))
+PROFILE_KEYS = ('PREPROCESSING_PIPELINE', 'LAYOUT_CLASSIFIER_ENABLED', 'TEXT_DETECTION_ENABLED',
+                'TEXT_DETECTION_MIN_GRADIENT', 'OCR_EXTRA_CONFIG', 'ESCALATION_ENABLED',
+                'ESCALATION_MIN_CONFIDENCE')
+
+
+def _apply_profile(path):
+    if not path or not os.path.exists(path):
+        return
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            settings = json.load(f).get('settings', {})
+    except (OSError, ValueError, AttributeError) as e:
+        print(f"Ignoring OCR profile {path}: {e}", file=sys.stderr)
+        return
+    for key in PROFILE_KEYS:
+        if key in settings:
+            globals()[key] = settings[key]
+
+
+_apply_profile(PROFILE_PATH)
@@ -1,19 +1,68 @@
+import importlib
+import threading
+import time
 import keyboard
-from tkinter import Tk, Frame, Label, Button, Checkbutton, BooleanVar, LEFT
-from config import COLORS, HOTKEY
-from capture_overlay import ScreenCaptureApp
+from tkinter import Tk, Frame, Label, Button, Checkbutton, BooleanVar, LEFT, messagebox
+from config import COLORS, HOTKEY, PERFORMANCE_PANEL_INTERVAL_MS
+from instrumentation import metrics
+
+# Rows of the performance panel: label, rolling histogram
+PERFORMANCE_ROWS = (
+    ("Capture to clipboard", 'release_to_clipboard'),
+    ("OCR call", 'ocr'),
+    ("Queue wait", 'scheduler_interactive_wait'),
+)
+
+def format_milliseconds(seconds):
+    if seconds is None:
+        return f"{'-':>7}"
+    return f"{seconds * 1000:7.0f}" if seconds >= 0.1 else f"{seconds * 1000:7.1f}"
+
+
+def format_performance(snapshot):
+    """Text of the performance panel for a metrics.rolling_snapshot()"""
+    if snapshot is None:
+        return "Performance: metrics are off (SCREEN_OCR_METRICS=0)"
+    histograms, counters = snapshot['histograms'], snapshot['counters']
+    lines = [f"Performance, last {snapshot['window']} s",
+             f"{'ms':<21}{'p50':>7}{'p95':>7}{'p99':>7}{'n':>6}"]
+    for label, name in PERFORMANCE_ROWS:
+        histogram = histograms.get(name)
+        if histogram is None:
+            continue
+        quantiles = histogram['quantiles']
+        lines.append(f"{label:<21}" + "".join(format_milliseconds(quantiles[q]) for q in (0.5, 0.95, 0.99))
+                     + f"{histogram['count']:>6}")
+    # Successful captures only; empty, failed and cancelled ones are not throughput
+    captures = counters.get('captures_ok')
+    errors = counters.get('captures_error', {'window': 0, 'total': 0})
+    throughput = f"{captures['window'] * 60.0 / snapshot['window']:.1f}/min" if captures is not None else "-"
+    lines.append(f"Throughput {throughput}   Errors {errors['window']} (total {errors['total']})")
+    return "\n".join(lines)
+
 
 class DashboardWindow:
     def __init__(self):
         self.root = Tk()
         self.root.title("Screen Capture OCR")
-        self.root.geometry("480x460")
+        self.root.geometry("480x680")
         self.root.resizable(False, False)
         self.colors = COLORS
         self.is_running = False
         self.show_notifications = True
         self.show_errors = True
+        self.overlay = None
+        self.hotkey_time = None
+        self.first_frame_time = None
+        self.first_frame_callbacks = []
+        self._preload_thread = None
+        self.history_window = None
+        self.performance_text = None
+        self.performance_job = None
         self.create_widgets()
+        self.root.bind('<<ShowOverlay>>', self.launch_overlay)
+        self.root.bind('<Map>', self.on_first_map, add='+')
+        self.root.bind('<Map>', self.start_performance_refresh, add='+')
 
     def create_widgets(self):
         main_container = Frame(self.root, bg=self.colors['bg'], padx=30, pady=20)
@@ -84,6 +133,81 @@ class DashboardWindow:
                               activeforeground='white',
                               cursor="hand2")
         self.toggle_btn.pack(fill='x', expand=True, padx=10, pady=10)
+        Button(button_frame,
+               text="History",
+               command=self.open_history,
+               font=("Segoe UI", 10),
+               relief="flat",
+               bg=self.colors['button_bg'],
+               fg=self.colors['fg'],
+               activebackground=self.colors['button_active'],
+               activeforeground=self.colors['fg'],
+               cursor="hand2").pack(fill='x', expand=True, padx=10)
+        performance_frame = Frame(main_container, bg=self.colors['button_bg'], padx=20, pady=10)
+        performance_frame.pack(fill='x', pady=(20, 0))
+        self.performance_label = Label(performance_frame,
+                                       justify=LEFT,
+                                       anchor='w',
+                                       font=("Consolas", 9),
+                                       bg=self.colors['button_bg'],
+                                       fg=self.colors['fg'])
+        self.performance_label.pack(fill='x')
+
+    def start_performance_refresh(self, event=None):
+        """Restart the panel's redraw loop when the dashboard is mapped again"""
+        if self.performance_job is None:
+            self.refresh_performance()
+
+    def refresh_performance(self):
+        """Redraw the performance panel and schedule the next redraw on the Tk loop"""
+        self.performance_job = None
+        # Nothing to see while the panel is off screen (iconified during
+        # captures); the loop stops until the next <Map>
+        if not self.performance_label.winfo_ismapped() or self.root.state() in ('iconic', 'withdrawn'):
+            return
+        text = format_performance(metrics.rolling_snapshot())
+        if text != self.performance_text:
+            self.performance_text = text
+            self.performance_label.config(text=text)
+        self.performance_job = self.root.after(PERFORMANCE_PANEL_INTERVAL_MS, self.refresh_performance)
+
+    def on_first_map(self, event):
+        if event.widget is not self.root or self.first_frame_time is not None:
+            return
+        self.first_frame_time = time.perf_counter()
+        for callback in self.first_frame_callbacks:
+            callback(self)
+        # The window is up; load the imaging/OCR stack without blocking it
+        self._preload_thread = threading.Thread(target=self.preload_capture_stack, daemon=True)
+        self._preload_thread.start()
+
+    def preload_capture_stack(self):
+        """Import the capture overlay (cv2, numpy, PIL, pytesseract...) in the background"""
+        try:
+            importlib.import_module('capture_overlay')
+        except Exception as e:
+            # Importing again when capture starts raises it on the Tk thread
+            print(f"Background import of the capture stack failed: {e}")
+
+    def get_capture_app_class(self):
+        if self._preload_thread is not None:
+            self._preload_thread.join()
+        from capture_overlay import ScreenCaptureApp
+        return ScreenCaptureApp
+
+    def open_history(self):
+        if self.history_window is not None and self.history_window.root.winfo_exists():
+            self.history_window.root.lift()
+            self.history_window.refresh()
+            return
+        # Imported on demand, like the capture stack
+        from capture_history import get_history
+        from history_view import HistoryWindow
+        history = get_history()
+        if history is None:
+            messagebox.showinfo("Info", "Capture history is disabled.")
+            return
+        self.history_window = HistoryWindow(self.root, history)
 
     def toggle_capture(self):
         if not self.is_running:
@@ -95,17 +219,33 @@ class DashboardWindow:
         self.is_running = True
         self.status_label.config(text="Status: Running", fg=self.colors['green'])
         self.toggle_btn.config(text="Stop", bg=self.colors['button_bg'])
+        # Build the overlay, OCR engine and worker pool once; hotkeys only show it
+        if self.overlay is None:
+            self.overlay = self.get_capture_app_class()(self, master=self.root)
         self.root.iconify()
-        keyboard.add_hotkey(HOTKEY, lambda: self.launch_overlay())
+        keyboard.add_hotkey(HOTKEY, self.on_hotkey)
+
+    def on_hotkey(self):
+        # Runs on the keyboard hook thread, so hand over to the Tk thread
+        self.hotkey_time = time.perf_counter()
+        self.root.event_generate('<<ShowOverlay>>', when='tail')
 
-    def launch_overlay(self):
-        ScreenCaptureApp(self).run()
+    def launch_overlay(self, event=None):
+        if self.overlay is not None:
+            self.overlay.show(self.hotkey_time)
 
     def stop_capture(self):
         self.is_running = False
         self.status_label.config(text="Status: Stopped", fg=self.colors['red'])
         self.toggle_btn.config(text="Start", bg=self.colors['accent'])
         keyboard.remove_all_hotkeys()
+        if self.overlay is not None:
+            self.overlay.destroy()
+            self.overlay = None
 
     def run(self):
-        self.root.mainloop() 
\ No newline at end of file
+        metrics.start()
+        try:
+            self.root.mainloop()
+        finally:
+            metrics.stop() 
\ No newline at end of file
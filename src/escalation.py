@@ -0,0 +1,119 @@
+"""
+Confidence-driven OCR: a cheap pass first, heavy preprocessing only where needed.
+
+The first pass hands the grayscale capture straight to Tesseract
+(image_to_data, so every word comes with a confidence). Clean UI text is
+done at that point. Lines whose weakest word is below the confidence
+threshold are cut out across the full width and run through the
+preprocessing pipeline (denoise, text-height normalization, binarization as
+configured). Each one is then recognized again as a single line, and keeps
+whichever reading is more confident. When the first pass read nothing, or
+most lines are unsure, the whole capture is escalated instead, because one
+full pass is cheaper than many crops.
+"""
+import concurrent.futures
+import numpy as np
+from config import ESCALATION_MIN_CONFIDENCE, ESCALATION_FULL_FRACTION, OCR_EXTRA_CONFIG
+from instrumentation import metrics, stage, current_trace
+from ocr_engine import OCRCancelled
+from preprocessing import run_pipeline, HEAP_BUFFERS
+
+# Single text line, for re-recognizing escalated lines
+LINE_PSM = 7
+# Rows of context kept above and below an escalated line, in line heights
+LINE_PADDING = 0.3
+
+
+class EscalationReport:
+    __slots__ = ('lines', 'escalated', 'replaced', 'full')
+
+    def __init__(self, lines=0, escalated=0, replaced=0, full=False):
+        self.lines = lines
+        self.escalated = escalated
+        self.replaced = replaced
+        self.full = full
+
+    def as_dict(self):
+        return {'lines': self.lines, 'escalated': self.escalated, 'replaced': self.replaced, 'full': self.full}
+
+
+def _image_to_data(engine, image, config, executor, cancel_token):
+    if cancel_token is not None:
+        cancel_token.raise_if_cancelled()
+    if executor is None:
+        return engine.image_to_data(image, config, cancel_token)
+    future = executor.submit(engine.image_to_data, image, config, cancel_token)
+    if cancel_token is not None:
+        cancel_token.on_cancel(future.cancel)
+    try:
+        return future.result()
+    except concurrent.futures.CancelledError:
+        raise OCRCancelled()
+    finally:
+        if cancel_token is not None:
+            cancel_token.remove(future.cancel)
+
+
+def _enhanced_data(engine, image, config, pipeline, executor, cancel_token, buffers):
+    """Preprocess image and OCR it; boxes are mapped back to image coordinates"""
+    enhanced = run_pipeline(image, pipeline, buffers=buffers).image
+    try:
+        text, words = _image_to_data(engine, enhanced, config, executor, cancel_token)
+        words.transform(image.shape[1] / enhanced.shape[1], image.shape[0] / enhanced.shape[0])
+    finally:
+        if not np.may_share_memory(enhanced, image):
+            buffers.release(enhanced)
+    return text, words
+
+
+def _mean_confidence(words):
+    return float(words.conf.mean()) if len(words) else -1.0
+
+
+def recognize_escalated(gray, engine, config='', pipeline=None, min_confidence=ESCALATION_MIN_CONFIDENCE,
+                        full_fraction=ESCALATION_FULL_FRACTION, extra_config=OCR_EXTRA_CONFIG,
+                        executor=None, cancel_token=None, buffers=None):
+    """
+    OCR a grayscale capture, escalating only unsure lines.
+
+    config is used for the first pass and a full escalation. Returns
+    (text, WordBoxes, EscalationReport); boxes are in gray's coordinates.
+    """
+    if buffers is None:
+        buffers = HEAP_BUFFERS
+    with stage('ocr'):
+        text, words = _image_to_data(engine, gray, config, executor, cancel_token)
+    numbers, means, lowest = words.line_confidence()
+    unsure = np.flatnonzero(lowest < min_confidence)
+    report = EscalationReport(len(numbers), len(unsure))
+    if not len(words) or len(unsure) > full_fraction * len(numbers):
+        report.full = True
+        with stage('escalate'):
+            full_text, full_words = _enhanced_data(engine, gray, config, pipeline, executor, cancel_token, buffers)
+        if _mean_confidence(full_words) > _mean_confidence(words):
+            report.replaced = report.lines
+            text, words = full_text, full_words
+    elif len(unsure):
+        _, starts, ends = words.lines()
+        line_config = f"{extra_config} --psm {LINE_PSM}".strip()
+        replacements = {}
+        with stage('escalate'):
+            for index in unsure.tolist():
+                _, y0, _, y1 = words.line_box(starts[index], ends[index])
+                pad = max(2, int((y1 - y0) * LINE_PADDING))
+                top, bottom = max(0, y0 - pad), min(gray.shape[0], y1 + pad)
+                _, line_words = _enhanced_data(engine, gray[top:bottom], line_config, pipeline, executor,
+                                               cancel_token, buffers)
+                if _mean_confidence(line_words) > means[index]:
+                    replacements[int(numbers[index])] = line_words.transform(offset_y=top)
+        if replacements:
+            report.replaced = len(replacements)
+            words = words.splice(replacements)
+            text = words.text()
+    metrics.increment('escalation_lines', report.lines)
+    metrics.increment('escalation_lines_escalated', report.escalated)
+    metrics.increment('escalation_lines_replaced', report.replaced)
+    if report.full:
+        metrics.increment('escalation_full')
+    current_trace().set(escalation=report.as_dict())
+    return text.strip(), words, report
@@ -0,0 +1,275 @@
+"""
+Accuracy-vs-latency evaluation of OCR pipeline configurations.
+
+A corpus is a list of images with their ground-truth text: rendered by
+synthetic_text (tiny labels to zoomed text, several fonts, noise, blur, dark
+themes) and/or recorded screenshots saved as name.png next to name.gt.txt.
+A configuration is a profile, i.e. the PROFILE_KEYS settings of config.py.
+Each one is run over the corpus through ocr_image, exactly as a capture is
+(text crop, layout classifier, confidence-driven escalation or the full
+preprocessing pipeline, Tesseract), and scored by character and word error
+rate next to its latency:
+
+    python src/evaluation.py [--corpus screenshots/] [--profile tuned.json] [--runs 3]
+"""
+import argparse
+import copy
+import glob
+import json
+import os
+import statistics
+import sys
+import time
+import cv2
+import config
+from ocr_engine import create_engine
+from ocr_pipeline import ocr_image
+from preprocessing import with_binarization
+from synthetic_text import SAMPLE_LINES, render_text_image, text_for_lines
+
+GROUND_TRUTH_SUFFIX = '.gt.txt'
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.webp')
+
+# name, text lines, font size, font family, noise sigma, dark theme, blur sigma
+SYNTHETIC_VARIANTS = [
+    ('label-9', 1, 9, 'sans', 0.0, False, 0.0),
+    ('label-11-dark', 1, 11, 'sans', 0.0, True, 0.0),
+    ('word-14', 1, 14, 'sans', 0.0, False, 0.0),
+    ('path-13-mono', 1, 13, 'mono', 0.0, False, 0.0),
+    ('line-16-serif', 1, 16, 'serif', 0.0, False, 0.0),
+    ('block-12', 4, 12, 'sans', 0.0, False, 0.0),
+    ('block-14-mono-dark', 4, 14, 'mono', 0.0, True, 0.0),
+    ('block-16-noisy', 4, 16, 'sans', 12.0, False, 0.0),
+    ('block-18-blurred', 3, 18, 'sans', 0.0, False, 1.2),
+    ('block-20-noisy-dark', 3, 20, 'serif', 10.0, True, 0.0),
+    ('page-24', 8, 24, 'sans', 0.0, False, 0.0),
+    ('zoomed-64', 2, 64, 'sans', 0.0, False, 0.0),
+]
+
+
+class Sample:
+    __slots__ = ('name', 'image', 'text')
+
+    def __init__(self, name, image, text):
+        self.name = name
+        self.image = image      # BGR capture
+        self.text = text        # ground truth
+
+
+def synthetic_corpus(variants=SYNTHETIC_VARIANTS):
+    """Render the built-in ground-truth corpus"""
+    samples = []
+    for i, (name, lines, font_size, family, noise, dark, blur) in enumerate(variants):
+        text = SAMPLE_LINES[i % len(SAMPLE_LINES)] if lines == 1 else text_for_lines(lines, offset=i)
+        background, foreground = (30, 220) if dark else (255, 0)
+        rgb = render_text_image(text, font_size=font_size, family=family, noise=noise, padding=font_size,
+                                background=background, foreground=foreground, seed=i)
+        if blur:
+            rgb = cv2.GaussianBlur(rgb, (0, 0), blur)
+        samples.append(Sample(name, cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR), text))
+    return samples
+
+
+def load_corpus(directory):
+    """Load recorded screenshots that have a name.gt.txt ground-truth file next to them"""
+    samples = []
+    for path in sorted(glob.glob(os.path.join(directory, '*'))):
+        stem, extension = os.path.splitext(path)
+        if extension.lower() not in IMAGE_EXTENSIONS or not os.path.exists(stem + GROUND_TRUTH_SUFFIX):
+            continue
+        image = cv2.imread(path, cv2.IMREAD_COLOR)
+        if image is None:
+            print(f"Skipping unreadable image {path}")
+            continue
+        with open(stem + GROUND_TRUTH_SUFFIX, 'r', encoding='utf-8') as f:
+            samples.append(Sample(os.path.basename(stem), image, f.read()))
+    return samples
+
+
+def normalize_text(text):
+    """Collapse runs of whitespace within lines and drop blank lines"""
+    return "\n".join(" ".join(line.split()) for line in text.splitlines() if line.strip())
+
+
+def edit_distance(reference, hypothesis):
+    """Levenshtein distance between two sequences (strings or token lists)"""
+    if len(reference) < len(hypothesis):
+        reference, hypothesis = hypothesis, reference
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_item in enumerate(reference, 1):
+        current = [i]
+        for j, hyp_item in enumerate(hypothesis, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_item != hyp_item)))
+        previous = current
+    return previous[-1]
+
+
+def current_profile():
+    """The PROFILE_KEYS settings currently in effect"""
+    return {key: copy.deepcopy(getattr(config, key)) for key in config.PROFILE_KEYS}
+
+
+def load_profile(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        settings = json.load(f)['settings']
+    profile = current_profile()
+    profile.update((key, value) for key, value in settings.items() if key in config.PROFILE_KEYS)
+    return profile
+
+
+def save_profile(path, profile, evaluation=None, **extra):
+    """Write a profile the app loads at startup (config.PROFILE_PATH)"""
+    document = {'settings': {key: profile[key] for key in config.PROFILE_KEYS if key in profile}}
+    if evaluation is not None:
+        document['evaluation'] = evaluation.as_dict()
+    document.update(extra)
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(document, f, indent=2)
+    os.replace(temp_path, path)
+
+
+def recognize(image, engine, profile):
+    """OCR one capture through ocr_image, with the profile's settings in place of the global ones"""
+    return ocr_image(image, engine, profile=profile)
+
+
+class Evaluation:
+    """Corpus-level error rates and per-sample latency of one profile"""
+
+    def __init__(self):
+        self.char_errors = 0
+        self.chars = 0
+        self.word_errors = 0
+        self.words = 0
+        self.latencies = []
+        self.samples = []   # [(name, cer, wer, seconds)]
+
+    def add(self, name, reference, hypothesis, seconds):
+        reference, hypothesis = normalize_text(reference), normalize_text(hypothesis)
+        char_errors = edit_distance(reference, hypothesis)
+        word_errors = edit_distance(reference.split(), hypothesis.split())
+        self.char_errors += char_errors
+        self.chars += len(reference)
+        self.word_errors += word_errors
+        self.words += len(reference.split())
+        self.latencies.append(seconds)
+        self.samples.append((name, char_errors / max(1, len(reference)),
+                             word_errors / max(1, len(reference.split())), seconds))
+
+    @property
+    def cer(self):
+        return self.char_errors / max(1, self.chars)
+
+    @property
+    def wer(self):
+        return self.word_errors / max(1, self.words)
+
+    @property
+    def mean_latency(self):
+        return statistics.fmean(self.latencies) if self.latencies else 0.0
+
+    @property
+    def p95_latency(self):
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+
+    def as_dict(self):
+        return {
+            'cer': round(self.cer, 4),
+            'wer': round(self.wer, 4),
+            'mean_ms': round(self.mean_latency * 1000, 2),
+            'p95_ms': round(self.p95_latency * 1000, 2),
+            'samples': len(self.samples),
+        }
+
+
+def evaluate(corpus, engine, profile, runs=1):
+    """Score a profile on a corpus; latency is the median of runs per sample"""
+    evaluation = Evaluation()
+    for sample in corpus:
+        timings = []
+        text = ''
+        for _ in range(max(1, runs)):
+            start = time.perf_counter()
+            text = recognize(sample.image, engine, profile)
+            timings.append(time.perf_counter() - start)
+        evaluation.add(sample.name, sample.text, text, statistics.median(timings))
+    return evaluation
+
+
+def variant(profile, **changes):
+    """Copy of a profile with some settings replaced"""
+    result = copy.deepcopy(profile)
+    result.update(changes)
+    return result
+
+
+def builtin_profiles():
+    """Reference configurations compared by the command line report"""
+    current = current_profile()
+    pipeline = current['PREPROCESSING_PIPELINE']
+    otsu = [dict(spec, method='otsu') if spec['stage'] == 'binarize' else spec for spec in pipeline]
+    return {
+        'current': current,
+        'grayscale-only': variant(current, PREPROCESSING_PIPELINE=[{'stage': 'grayscale'}]),
+        'otsu': variant(current, PREPROCESSING_PIPELINE=otsu),
+        'sauvola': variant(current, PREPROCESSING_PIPELINE=with_binarization(pipeline, 'sauvola')),
+        'auto-layout': variant(current, LAYOUT_CLASSIFIER_ENABLED=False),
+        'full-frame': variant(current, TEXT_DETECTION_ENABLED=False),
+        'no-escalation': variant(current, ESCALATION_ENABLED=False),
+    }
+
+
+def build_corpus(directories, synthetic=True):
+    corpus = synthetic_corpus() if synthetic else []
+    for directory in directories or []:
+        corpus.extend(load_corpus(directory))
+    return corpus
+
+
+def print_report(results, verbose=False):
+    print(f"{'configuration':<24} {'CER':>7} {'WER':>7} {'mean ms':>9} {'p95 ms':>8}")
+    for name, evaluation in results:
+        print(f"{name:<24} {evaluation.cer:7.3f} {evaluation.wer:7.3f} "
+              f"{evaluation.mean_latency * 1000:9.1f} {evaluation.p95_latency * 1000:8.1f}")
+        if verbose:
+            for sample_name, cer, wer, seconds in evaluation.samples:
+                print(f"  {sample_name:<22} {cer:7.3f} {wer:7.3f} {seconds * 1000:9.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report CER/WER and latency per OCR configuration")
+    parser.add_argument('--corpus', action='append', help="Directory of name.png + name.gt.txt pairs (repeatable)")
+    parser.add_argument('--no-synthetic', action='store_true', help="Only use the --corpus directories")
+    parser.add_argument('--profile', action='append', default=[], help="Profile JSON to compare (repeatable)")
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--verbose', action='store_true', help="Show per-sample scores")
+    parser.add_argument('--backend', default='auto', choices=['auto', 'tesserocr', 'pytesseract'])
+    args = parser.parse_args(argv)
+
+    corpus = build_corpus(args.corpus, not args.no_synthetic)
+    if not corpus:
+        print("The corpus is empty")
+        return 1
+    profiles = builtin_profiles()
+    for path in args.profile:
+        profiles[os.path.basename(path)] = load_profile(path)
+    engine = create_engine(args.backend, pool_size=1)
+    try:
+        # Warm-up so traineddata loading is not charged to the first configuration
+        recognize(corpus[0].image, engine, profiles['current'])
+        print(f"{len(corpus)} samples, median of {args.runs} runs per sample")
+        results = [(name, evaluate(corpus, engine, profile, args.runs)) for name, profile in profiles.items()]
+    finally:
+        engine.close()
+    print_report(results, args.verbose)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,221 @@
+import base64
+import concurrent.futures
+import queue
+import time
+from tkinter import (Toplevel, Frame, Label, Entry, Button, Listbox, Scrollbar, Text, StringVar,
+                     PhotoImage, LEFT, RIGHT, BOTH, END, X, Y, WORD, DISABLED, NORMAL)
+from config import COLORS
+
+# Entries fetched per page; searching never loads more than this at once
+PAGE_SIZE = 200
+# Typing pause before a search runs
+SEARCH_DELAY_MS = 150
+
+
+class HistoryWindow:
+    """Searchable list of past captures with a text and thumbnail preview"""
+
+    def __init__(self, master, history):
+        self.history = history
+        self.colors = COLORS
+        self.entries = []
+        self.exhausted = False
+        self._pending_search = None
+        self._thumbnail = None
+        self._preview_id = None
+        # SQLite queries run on one worker thread. Results come back through
+        # _results and a <<HistoryResults>> event, drained on the Tk loop;
+        # pages from a search older than the current one are dropped
+        self._searcher = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self._results = queue.Queue()
+        self._generation = 0
+        self._loading = False
+        self.root = Toplevel(master)
+        self.root.title("Capture History")
+        self.root.geometry("760x520")
+        self.root.configure(bg=self.colors['bg'])
+        self.create_widgets()
+        self.root.bind('<Destroy>', self.on_destroy)
+        self.root.bind('<<HistoryResults>>', self.on_results)
+        self.refresh()
+
+    def create_widgets(self):
+        search_frame = Frame(self.root, bg=self.colors['bg'], padx=10, pady=10)
+        search_frame.pack(fill=X)
+        Label(search_frame, text="Search:", font=("Segoe UI", 10),
+              bg=self.colors['bg'], fg=self.colors['fg']).pack(side=LEFT)
+        self.query_var = StringVar()
+        self.query_var.trace_add('write', self.on_query_changed)
+        entry = Entry(search_frame, textvariable=self.query_var, font=("Segoe UI", 10),
+                      bg=self.colors['button_bg'], fg=self.colors['fg'], insertbackground=self.colors['fg'])
+        entry.pack(side=LEFT, fill=X, expand=True, padx=(8, 8))
+        entry.focus_set()
+        self.count_label = Label(search_frame, font=("Segoe UI", 9),
+                                 bg=self.colors['bg'], fg=self.colors['fg'])
+        self.count_label.pack(side=RIGHT)
+
+        body = Frame(self.root, bg=self.colors['bg'], padx=10)
+        body.pack(fill=BOTH, expand=True)
+        list_frame = Frame(body, bg=self.colors['bg'])
+        list_frame.pack(side=LEFT, fill=BOTH, expand=True)
+        self.scrollbar = Scrollbar(list_frame)
+        self.scrollbar.pack(side=RIGHT, fill=Y)
+        self.listbox = Listbox(list_frame, font=("Segoe UI", 9), activestyle='none',
+                               bg=self.colors['button_bg'], fg=self.colors['fg'],
+                               selectbackground=self.colors['accent'], yscrollcommand=self.on_scroll)
+        self.listbox.pack(side=LEFT, fill=BOTH, expand=True)
+        self.scrollbar.config(command=self.listbox.yview)
+        self.listbox.bind('<<ListboxSelect>>', self.on_select)
+        self.listbox.bind('<Double-Button-1>', lambda e: self.copy_selected())
+
+        preview = Frame(body, bg=self.colors['bg'], padx=10)
+        preview.pack(side=RIGHT, fill=Y)
+        self.thumbnail_label = Label(preview, bg=self.colors['bg'])
+        self.thumbnail_label.pack(pady=(0, 8))
+        self.preview_text = Text(preview, width=40, wrap=WORD, font=("Segoe UI", 9),
+                                 bg=self.colors['button_bg'], fg=self.colors['fg'], state=DISABLED)
+        self.preview_text.pack(fill=BOTH, expand=True)
+
+        button_frame = Frame(self.root, bg=self.colors['bg'], padx=10, pady=10)
+        button_frame.pack(fill=X)
+        for text, command in (("Copy", self.copy_selected), ("Delete", self.delete_selected)):
+            Button(button_frame, text=text, command=command, width=10, font=("Segoe UI", 9),
+                   bg=self.colors['button_bg'], fg=self.colors['fg'],
+                   activebackground=self.colors['button_active'],
+                   activeforeground=self.colors['fg']).pack(side=LEFT, padx=(0, 8))
+
+    def on_query_changed(self, *args):
+        # Debounce so a search runs once typing pauses, not on every key
+        if self._pending_search is not None:
+            self.root.after_cancel(self._pending_search)
+        self._pending_search = self.root.after(SEARCH_DELAY_MS, self.refresh)
+
+    def refresh(self):
+        self._pending_search = None
+        self._generation += 1
+        self._loading = False
+        self.entries = []
+        self.exhausted = False
+        self.listbox.delete(0, END)
+        self.show_preview(None)
+        self.load_page()
+
+    def load_page(self):
+        if self._loading:
+            return
+        self._loading = True
+        self._searcher.submit(self._search, self._generation, self.query_var.get(), len(self.entries))
+
+    def _search(self, generation, query, offset):
+        # Runs on the search thread
+        try:
+            page = self.history.search(query, PAGE_SIZE, offset)
+        except Exception as e:
+            print(f"History search failed: {e}")
+            page = []
+        self._post(self.show_page, generation, page, self.history.count())
+
+    def _post(self, callback, *args):
+        # Runs on the search thread; event_generate is the thread-safe way into Tk
+        self._results.put((callback, args))
+        try:
+            self.root.event_generate('<<HistoryResults>>', when='tail')
+        except Exception:
+            # The window was closed while the query ran
+            pass
+
+    def on_results(self, event=None):
+        while True:
+            try:
+                callback, args = self._results.get_nowait()
+            except queue.Empty:
+                return
+            callback(*args)
+
+    def show_page(self, generation, page, total):
+        if generation != self._generation:
+            return
+        self._loading = False
+        self.show_count(total)
+        self.exhausted = len(page) < PAGE_SIZE
+        self.entries.extend(page)
+        for entry in page:
+            stamp = time.strftime('%Y-%m-%d %H:%M', time.localtime(entry['created']))
+            first_line = entry['text'].strip().splitlines()[0] if entry['text'].strip() else ''
+            self.listbox.insert(END, f"{stamp}  {first_line[:80]}")
+
+    def on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        # Fetch the next page when the end of the list comes into view
+        if float(last) >= 1.0 and not self.exhausted and self.entries:
+            self.load_page()
+
+    def selected_entry(self):
+        selection = self.listbox.curselection()
+        return self.entries[selection[0]] if selection else None
+
+    def on_select(self, event=None):
+        self.show_preview(self.selected_entry())
+
+    def show_preview(self, entry):
+        self.preview_text.config(state=NORMAL)
+        self.preview_text.delete('1.0', END)
+        self._thumbnail = None
+        self._preview_id = None if entry is None else entry['id']
+        if entry is not None:
+            self.preview_text.insert('1.0', entry['text'])
+            if entry['has_thumbnail']:
+                self._searcher.submit(self._load_thumbnail, entry['id'])
+        self.preview_text.config(state=DISABLED)
+        self.thumbnail_label.config(image='')
+
+    def _load_thumbnail(self, entry_id):
+        # Runs on the search thread
+        try:
+            data = self.history.thumbnail(entry_id)
+        except Exception as e:
+            print(f"Failed to load thumbnail: {e}")
+            return
+        if data:
+            self._post(self.show_thumbnail, entry_id, data)
+
+    def show_thumbnail(self, entry_id, data):
+        if entry_id != self._preview_id:
+            return
+        try:
+            self._thumbnail = PhotoImage(data=base64.b64encode(data))
+        except Exception as e:
+            print(f"Failed to load thumbnail: {e}")
+            return
+        self.thumbnail_label.config(image=self._thumbnail)
+
+    def copy_selected(self):
+        entry = self.selected_entry()
+        if entry is not None:
+            self.root.clipboard_clear()
+            self.root.clipboard_append(entry['text'])
+
+    def delete_selected(self):
+        entry = self.selected_entry()
+        if entry is None:
+            return
+        index = self.entries.index(entry)
+        del self.entries[index]
+        self.listbox.delete(index)
+        self.show_preview(None)
+        self._searcher.submit(self._delete, entry['id'])
+
+    def _delete(self, entry_id):
+        # Runs on the search thread
+        try:
+            self.history.delete(entry_id)
+        except Exception as e:
+            print(f"History delete failed: {e}")
+        self._post(self.show_count, self.history.count())
+
+    def show_count(self, total):
+        self.count_label.config(text=f"{total} captures")
+
+    def on_destroy(self, event):
+        if event.widget is self.root:
+            self._searcher.shutdown(wait=False, cancel_futures=True)
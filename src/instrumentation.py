@@ -0,0 +1,505 @@
+"""
+Lightweight per-stage timing and counters for the capture pipeline.
+
+Stages are timed with `stage(name)` context managers. Each capture is a
+trace that is written as one JSON line to a rotating log file through a
+background queue listener, while aggregate histograms and counters can be
+exported in Prometheus text format to a file or a small HTTP endpoint.
+A few of them are also kept in rolling windows of fixed size, which the
+dashboard's performance panel reads for recent percentiles.
+With METRICS_ENABLED off every call returns a shared no-op object.
+"""
+import json
+import logging
+import logging.handlers
+import math
+import os
+import queue
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from config import (METRICS_ENABLED, METRICS_DIR, METRICS_JSONL_MAX_BYTES, METRICS_JSONL_BACKUPS,
+                    METRICS_PROMETHEUS_INTERVAL, METRICS_PROMETHEUS_PORT, METRICS_WINDOW_SLOTS,
+                    METRICS_WINDOW_SLOT_SECONDS, METRICS_ROLLING_HISTOGRAMS, METRICS_ROLLING_COUNTERS)
+
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRIC_PREFIX = 'screen_ocr'
+
+# Log-linear buckets of the rolling histograms: ROLLING_SUB_BUCKETS per
+# power of two above ROLLING_MIN_SECONDS, so a reported percentile is within
+# 1/ROLLING_SUB_BUCKETS (~6%) of the exact one. 10 us to ~170 s
+ROLLING_MIN_SECONDS = 1e-5
+ROLLING_SUB_BUCKETS = 16
+ROLLING_OCTAVES = 24
+ROLLING_BUCKETS = 1 + ROLLING_OCTAVES * ROLLING_SUB_BUCKETS
+PANEL_QUANTILES = (0.5, 0.95, 0.99)
+
+_local = threading.local()
+
+
+class _NullContext:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _NullTrace:
+    stages = {}
+
+    def stage(self, name):
+        return _NULL_CONTEXT
+
+    def activate(self):
+        return _NULL_CONTEXT
+
+    def set(self, **fields):
+        pass
+
+    def finish(self, status='ok', **fields):
+        pass
+
+
+_NULL_CONTEXT = _NullContext()
+_NULL_TRACE = _NullTrace()
+
+
+class _StageHistogram:
+    __slots__ = ('bucket_counts', 'count', 'total', 'maximum')
+
+    def __init__(self):
+        self.bucket_counts = [0] * len(STAGE_BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.maximum:
+            self.maximum = seconds
+        for i, bound in enumerate(STAGE_BUCKETS):
+            if seconds <= bound:
+                self.bucket_counts[i] += 1
+                break
+
+
+def rolling_bucket(seconds):
+    """Index of the log-linear bucket that holds seconds"""
+    if seconds < ROLLING_MIN_SECONDS:
+        return 0
+    # seconds / min = mantissa * 2 ** exponent with mantissa in [0.5, 1)
+    mantissa, exponent = math.frexp(seconds / ROLLING_MIN_SECONDS)
+    index = 1 + (exponent - 1) * ROLLING_SUB_BUCKETS + int((mantissa - 0.5) * 2 * ROLLING_SUB_BUCKETS)
+    return min(index, ROLLING_BUCKETS - 1)
+
+
+def rolling_bucket_bound(index):
+    """Upper bound in seconds of a rolling histogram bucket"""
+    if index == 0:
+        return ROLLING_MIN_SECONDS
+    octave, step = divmod(index - 1, ROLLING_SUB_BUCKETS)
+    return ROLLING_MIN_SECONDS * 2 ** octave * (1 + (step + 1) / ROLLING_SUB_BUCKETS)
+
+
+def bucket_quantiles(buckets, count, maximum, quantiles=PANEL_QUANTILES):
+    """{quantile: seconds} from merged rolling buckets; None when empty"""
+    if not count:
+        return dict.fromkeys(quantiles)
+    result = {}
+    targets = sorted(quantiles)
+    position = 0
+    cumulative = 0
+    for index, bucket_count in enumerate(buckets):
+        cumulative += bucket_count
+        while position < len(targets) and cumulative >= targets[position] * count:
+            result[targets[position]] = min(rolling_bucket_bound(index), maximum)
+            position += 1
+        if position == len(targets):
+            break
+    for quantile in targets[position:]:
+        result[quantile] = maximum
+    return result
+
+
+class _RollingWindow:
+    """
+    Ring of time slots covering the last slots * slot_seconds seconds. A
+    slot is cleared and reused when its turn comes round again, so memory
+    stays the same however many values are recorded.
+    """
+    __slots__ = ('slots', 'slot_seconds', 'epochs')
+
+    def __init__(self, slots, slot_seconds):
+        self.slots = slots
+        self.slot_seconds = slot_seconds
+        # Slot-length interval since the epoch each slot holds; -1 is empty
+        self.epochs = [-1] * slots
+
+    def _slot(self, now):
+        epoch = int(now // self.slot_seconds)
+        index = epoch % self.slots
+        if self.epochs[index] != epoch:
+            self.epochs[index] = epoch
+            self._clear(index)
+        return index
+
+    def _live(self, now):
+        """Indexes of the slots inside the window ending at now"""
+        oldest = int(now // self.slot_seconds) - self.slots
+        return [index for index, epoch in enumerate(self.epochs) if epoch > oldest]
+
+    def _clear(self, index):
+        raise NotImplementedError
+
+
+class RollingHistogram(_RollingWindow):
+    """Latencies of the last window in log-linear buckets of fixed count"""
+    __slots__ = ('buckets', 'counts', 'totals', 'maxima')
+
+    def __init__(self, slots=METRICS_WINDOW_SLOTS, slot_seconds=METRICS_WINDOW_SLOT_SECONDS):
+        super().__init__(slots, slot_seconds)
+        self.buckets = [[0] * ROLLING_BUCKETS for _ in range(slots)]
+        self.counts = [0] * slots
+        self.totals = [0.0] * slots
+        self.maxima = [0.0] * slots
+
+    def _clear(self, index):
+        self.buckets[index][:] = _EMPTY_BUCKETS
+        self.counts[index] = 0
+        self.totals[index] = 0.0
+        self.maxima[index] = 0.0
+
+    def observe(self, seconds, now):
+        index = self._slot(now)
+        self.buckets[index][rolling_bucket(seconds)] += 1
+        self.counts[index] += 1
+        self.totals[index] += seconds
+        if seconds > self.maxima[index]:
+            self.maxima[index] = seconds
+
+    def merged(self, now):
+        """(buckets, count, sum, max) over the window"""
+        live = self._live(now)
+        if not live:
+            return None, 0, 0.0, 0.0
+        buckets = [sum(column) for column in zip(*(self.buckets[index] for index in live))]
+        return (buckets, sum(self.counts[index] for index in live),
+                sum(self.totals[index] for index in live), max(self.maxima[index] for index in live))
+
+
+class RollingCounter(_RollingWindow):
+    """Count of events in the last window"""
+    __slots__ = ('counts',)
+
+    def __init__(self, slots=METRICS_WINDOW_SLOTS, slot_seconds=METRICS_WINDOW_SLOT_SECONDS):
+        super().__init__(slots, slot_seconds)
+        self.counts = [0] * slots
+
+    def _clear(self, index):
+        self.counts[index] = 0
+
+    def increment(self, amount, now):
+        self.counts[self._slot(now)] += amount
+
+    def total(self, now):
+        return sum(self.counts[index] for index in self._live(now))
+
+
+_EMPTY_BUCKETS = [0] * ROLLING_BUCKETS
+
+
+class _StageTimer:
+    __slots__ = ('metrics', 'name', 'trace', 'start')
+
+    def __init__(self, metrics, name, trace):
+        self.metrics = metrics
+        self.name = name
+        self.trace = trace
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        self.metrics.observe(self.name, elapsed)
+        if self.trace is not None:
+            self.trace.stages[self.name] = self.trace.stages.get(self.name, 0.0) + elapsed
+        return False
+
+
+class _Activation:
+    __slots__ = ('trace', 'previous')
+
+    def __init__(self, trace):
+        self.trace = trace
+
+    def __enter__(self):
+        self.previous = getattr(_local, 'trace', None)
+        _local.trace = self.trace
+        return self.trace
+
+    def __exit__(self, *exc):
+        _local.trace = self.previous
+        return False
+
+
+class Trace:
+    """Stage timings and fields for one capture, emitted as one JSON line"""
+
+    def __init__(self, metrics, kind):
+        self.metrics = metrics
+        self.kind = kind
+        self.started = time.time()
+        self.start = time.perf_counter()
+        self.stages = {}
+        self.fields = {}
+
+    def stage(self, name):
+        return _StageTimer(self.metrics, name, self)
+
+    def activate(self):
+        """Make this the current trace for module-level stage() calls on this thread"""
+        return _Activation(self)
+
+    def set(self, **fields):
+        self.fields.update(fields)
+
+    def finish(self, status='ok', **fields):
+        self.fields.update(fields)
+        elapsed = time.perf_counter() - self.start
+        self.metrics.observe(f"{self.kind}_total", elapsed)
+        self.metrics.increment(f"{self.kind}s_{status}")
+        self.metrics.emit({
+            'ts': round(self.started, 3),
+            'kind': self.kind,
+            'status': status,
+            'total_ms': round(elapsed * 1000, 3),
+            'stages_ms': {name: round(seconds * 1000, 3) for name, seconds in self.stages.items()},
+            **self.fields,
+        })
+
+
+class Metrics:
+    def __init__(self, directory=METRICS_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self._rolling_histograms = {name: RollingHistogram() for name in METRICS_ROLLING_HISTOGRAMS}
+        self._rolling_counters = {name: RollingCounter() for name in METRICS_ROLLING_COUNTERS}
+        self._listener = None
+        self._logger = None
+        self._http_server = None
+        self._prometheus_thread = None
+        self._stop = threading.Event()
+
+    def start_trace(self, kind='capture'):
+        return Trace(self, kind)
+
+    def stage(self, name):
+        return _StageTimer(self, name, getattr(_local, 'trace', None))
+
+    def observe(self, name, seconds):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = _StageHistogram()
+            histogram.observe(seconds)
+            rolling = self._rolling_histograms.get(name)
+            if rolling is not None:
+                rolling.observe(seconds, time.monotonic())
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+            rolling = self._rolling_counters.get(name)
+            if rolling is not None:
+                rolling.increment(amount, time.monotonic())
+
+    def emit(self, record):
+        # The queue handler only enqueues; file I/O happens on the listener thread
+        if self._logger is not None:
+            self._logger.info(json.dumps(record, ensure_ascii=False))
+
+    def snapshot(self):
+        with self._lock:
+            histograms = {
+                name: {'count': h.count, 'sum': h.total, 'max': h.maximum, 'buckets': list(h.bucket_counts)}
+                for name, h in self._histograms.items()
+            }
+            return histograms, dict(self._counters)
+
+    def rolling_snapshot(self, quantiles=PANEL_QUANTILES):
+        """
+        Recent activity for the performance panel: percentiles, count and rate
+        per rolling histogram, window count and lifetime total per rolling
+        counter. Only the buckets are summed under the lock.
+        """
+        now = time.monotonic()
+        with self._lock:
+            merged = {name: rolling.merged(now) for name, rolling in self._rolling_histograms.items()}
+            counters = {name: (rolling.total(now), self._counters.get(name, 0))
+                        for name, rolling in self._rolling_counters.items()}
+        window = METRICS_WINDOW_SLOTS * METRICS_WINDOW_SLOT_SECONDS
+        histograms = {
+            name: {'count': count, 'per_minute': count * 60.0 / window, 'mean': total / count if count else None,
+                   'max': maximum, 'quantiles': bucket_quantiles(buckets, count, maximum, quantiles)}
+            for name, (buckets, count, total, maximum) in merged.items()
+        }
+        return {
+            'window': window,
+            'histograms': histograms,
+            'counters': {name: {'window': recent, 'total': total} for name, (recent, total) in counters.items()},
+        }
+
+    def render_prometheus(self):
+        """Render histograms and counters in the Prometheus text exposition format"""
+        histograms, counters = self.snapshot()
+        lines = []
+        name = f"{METRIC_PREFIX}_stage_seconds"
+        lines.append(f"# HELP {name} Time spent per pipeline stage.")
+        lines.append(f"# TYPE {name} histogram")
+        for stage, h in sorted(histograms.items()):
+            cumulative = 0
+            for bound, count in zip(STAGE_BUCKETS, h['buckets']):
+                cumulative += count
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {h["count"]}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {h["sum"]:.6f}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {h["count"]}')
+        for counter, value in sorted(counters.items()):
+            metric = f"{METRIC_PREFIX}_{counter}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus_file(self, path=None):
+        path = path or os.path.join(self.directory, 'metrics.prom')
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp_path, path)
+
+    def start(self, prometheus_port=METRICS_PROMETHEUS_PORT):
+        """Start the JSON Lines writer, the periodic .prom file and the optional HTTP endpoint"""
+        if self._listener is not None:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            file_handler = logging.handlers.RotatingFileHandler(
+                os.path.join(self.directory, 'captures.jsonl'),
+                maxBytes=METRICS_JSONL_MAX_BYTES, backupCount=METRICS_JSONL_BACKUPS, encoding='utf-8'
+            )
+            file_handler.setFormatter(logging.Formatter('%(message)s'))
+            log_queue = queue.SimpleQueue()
+            self._listener = logging.handlers.QueueListener(log_queue, file_handler)
+            self._listener.start()
+            self._logger = logging.getLogger(f"{METRIC_PREFIX}.traces")
+            self._logger.propagate = False
+            self._logger.setLevel(logging.INFO)
+            self._logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        except Exception as e:
+            print(f"Metrics file export disabled: {e}", file=sys.stderr)
+            self._listener = None
+            self._logger = None
+
+        self._prometheus_thread = threading.Thread(target=self._prometheus_loop, daemon=True)
+        self._prometheus_thread.start()
+
+        if prometheus_port:
+            try:
+                self._http_server = ThreadingHTTPServer(('127.0.0.1', prometheus_port), _make_handler(self))
+                threading.Thread(target=self._http_server.serve_forever, daemon=True).start()
+            except Exception as e:
+                print(f"Metrics endpoint unavailable on port {prometheus_port}: {e}", file=sys.stderr)
+                self._http_server = None
+
+    def _prometheus_loop(self):
+        while not self._stop.wait(METRICS_PROMETHEUS_INTERVAL):
+            try:
+                self.write_prometheus_file()
+            except Exception as e:
+                print(f"Failed to write metrics file: {e}", file=sys.stderr)
+
+    def stop(self):
+        self._stop.set()
+        if self._http_server is not None:
+            self._http_server.shutdown()
+            self._http_server = None
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+        try:
+            self.write_prometheus_file()
+        except Exception:
+            pass
+
+
+class NullMetrics:
+    """Drop-in replacement used when metrics are switched off"""
+
+    def start_trace(self, kind='capture'):
+        return _NULL_TRACE
+
+    def stage(self, name):
+        return _NULL_CONTEXT
+
+    def observe(self, name, seconds):
+        pass
+
+    def increment(self, name, amount=1):
+        pass
+
+    def emit(self, record):
+        pass
+
+    def snapshot(self):
+        return {}, {}
+
+    def rolling_snapshot(self, quantiles=PANEL_QUANTILES):
+        return None
+
+    def render_prometheus(self):
+        return ""
+
+    def start(self, prometheus_port=None):
+        pass
+
+    def stop(self):
+        pass
+
+
+def _make_handler(metrics):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path not in ('/', '/metrics'):
+                self.send_error(404)
+                return
+            body = metrics.render_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return MetricsHandler
+
+
+metrics = Metrics() if METRICS_ENABLED else NullMetrics()
+
+
+def stage(name):
+    """Time a stage against the current thread's trace (if any)"""
+    return metrics.stage(name)
+
+
+def current_trace():
+    """The trace activated on this thread, or a no-op trace"""
+    return getattr(_local, 'trace', None) or _NULL_TRACE
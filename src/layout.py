@@ -0,0 +1,150 @@
+"""
+Pick a Tesseract page segmentation mode from the shape of the selection.
+
+Most selections are a filename, an error code or a single line, yet the
+default mode runs full automatic layout analysis. The classifier looks at
+the binarized image only: text lines from the horizontal projection profile,
+word gaps and column gutters from the vertical profile, and how much of the
+height is covered by text. Each class maps to the cheapest mode that still
+reads it correctly.
+"""
+import numpy as np
+from config import LAYOUT_CLASSIFIER_ENABLED
+from line_bands import ink_mask, find_text_lines
+
+# Class name -> Tesseract options
+LAYOUT_CONFIGS = {
+    'word': "--psm 8",        # single word, no line or word segmentation
+    'line': "--psm 7",        # single text line
+    'block': "--psm 6",       # one uniform block, no column detection
+    'columns': "--psm 3",     # multi-column text needs full layout analysis
+    'sparse': "--psm 11",     # scattered labels in no particular order
+    'unknown': "",
+}
+# Added when the image is known to be dark text on a light background, where
+# Tesseract's retry of low-confidence lines as inverted text is wasted work.
+# Binarized dark-theme captures can be white-on-black, so it is not assumed
+NO_INVERT = "-c tessedit_do_invert=0"
+# A gap wider than this many line heights separates words; letter gaps
+# stay well below it, word spaces are about a third of a line
+WORD_GAP_LINE_HEIGHTS = 0.35
+# Longer unbroken runs (paths, URLs) read better as a line than as a word
+WORD_MAX_ASPECT = 8.0
+# Row ranges closer than this many line heights are one line (underscores,
+# accents and i-dots otherwise show up as separate thin lines) when one of
+# them is thinner than LINE_FRAGMENT_HEIGHT line heights; two full-height
+# ranges are tightly spaced lines, not fragments
+LINE_MERGE_GAP = 0.3
+LINE_FRAGMENT_HEIGHT = 0.5
+# A blank vertical strip wider than this many line heights is a column gutter
+GUTTER_LINE_HEIGHTS = 2.0
+# Below this share of rows containing text, multi-line selections are sparse
+SPARSE_ROW_COVERAGE = 0.2
+
+
+class LayoutInfo:
+    __slots__ = ('name', 'config', 'lines', 'line_height', 'row_coverage')
+
+    def __init__(self, name, config, lines, line_height, row_coverage):
+        self.name = name
+        self.config = config
+        self.lines = lines
+        self.line_height = line_height
+        self.row_coverage = row_coverage
+
+    def as_dict(self):
+        return {
+            'name': self.name,
+            'lines': len(self.lines),
+            'line_height': round(self.line_height, 1),
+            'row_coverage': round(self.row_coverage, 3),
+        }
+
+
+def _gaps(is_ink):
+    """Lengths of interior runs of False in a boolean profile (edges excluded)"""
+    ink = np.flatnonzero(is_ink)
+    if len(ink) < 2:
+        return np.empty(0, dtype=np.int64)
+    steps = np.diff(ink) - 1
+    return steps[steps > 0]
+
+
+def merge_lines(lines):
+    """Merge row ranges split by a blank row or two inside a single text line"""
+    if len(lines) < 2:
+        return list(lines)
+    tallest = max(bottom - top for top, bottom in lines)
+    merged = [lines[0]]
+    for top, bottom in lines[1:]:
+        previous_top, previous_bottom = merged[-1]
+        fragment = min(bottom - top, previous_bottom - previous_top) < LINE_FRAGMENT_HEIGHT * tallest
+        if fragment and top - previous_bottom <= LINE_MERGE_GAP * tallest:
+            merged[-1] = (previous_top, bottom)
+        else:
+            merged.append((top, bottom))
+    return merged
+
+
+def _has_gutter(mask, lines, line_height):
+    """True when a blank vertical strip splits the text into columns"""
+    top, bottom = lines[0][0], lines[-1][1]
+    columns = mask[top:bottom].any(axis=0)
+    ink = np.flatnonzero(columns)
+    if len(ink) < 2:
+        return False
+    left, right = ink[0], ink[-1]
+    span = right - left
+    if span <= 0:
+        return False
+    blank = ~columns[left:right + 1]
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], blank.view(np.int8), [0]))))
+    for start, end in zip(edges[0::2], edges[1::2]):
+        # A gutter sits away from the edges and is much wider than a word gap
+        middle = (start + end) / 2 / span
+        if end - start >= GUTTER_LINE_HEIGHTS * line_height and 0.15 < middle < 0.85:
+            return True
+    return False
+
+
+def classify_layout(image, lines=None, dark_text=False):
+    """
+    Classify a binarized selection; returns a LayoutInfo. dark_text says the
+    text is known to be darker than its background (see NO_INVERT).
+    """
+    if lines is None:
+        lines = find_text_lines(image)
+    lines = merge_lines(lines)
+    height = image.shape[0]
+    if not lines:
+        return LayoutInfo('unknown', LAYOUT_CONFIGS['unknown'], lines, 0.0, 0.0)
+    heights = [bottom - top for top, bottom in lines]
+    line_height = float(np.median(heights))
+    row_coverage = sum(heights) / max(1, height)
+    mask = ink_mask(image)
+    if len(lines) == 1:
+        top, bottom = lines[0]
+        columns = mask[top:bottom].any(axis=0)
+        ink = np.flatnonzero(columns)
+        gaps = _gaps(columns)
+        is_word = (not np.any(gaps >= WORD_GAP_LINE_HEIGHTS * line_height)
+                   and ink[-1] - ink[0] <= WORD_MAX_ASPECT * line_height)
+        name = 'word' if is_word else 'line'
+    elif _has_gutter(mask, lines, line_height):
+        name = 'columns'
+    elif row_coverage < SPARSE_ROW_COVERAGE:
+        name = 'sparse'
+    else:
+        name = 'block'
+    config = LAYOUT_CONFIGS[name]
+    if dark_text:
+        config = f"{config} {NO_INVERT}".strip()
+    return LayoutInfo(name, config, lines, line_height, row_coverage)
+
+
+def layout_config(image, lines=None, dark_text=False, enabled=LAYOUT_CLASSIFIER_ENABLED):
+    """Return (Tesseract options, LayoutInfo); ('', None) when the classifier is off"""
+    if not enabled:
+        return '', None
+    layout = classify_layout(image, lines, dark_text)
+    return layout.config, layout
@@ -0,0 +1,99 @@
+"""
+Split large captures into horizontal text bands and OCR them in parallel.
+
+Text lines are found from the horizontal projection profile (ink pixels per
+row) of the binarized image. Lines are grouped into a few bands of similar
+height, cut in the middle of the whitespace between them, OCR'd concurrently
+and reassembled top to bottom.
+"""
+import concurrent.futures
+import numpy as np
+from ocr_engine import OCRCancelled
+from config import BAND_SPLIT_MIN_PIXELS, BAND_MIN_LINES
+
+# A row counts as text when at least this share of its pixels is ink
+ROW_INK_FRACTION = 0.002
+# Tesseract mode used per band: a single uniform block of text
+BAND_PSM = 6
+
+
+def ink_mask(image):
+    """Boolean ink mask; the majority tone is taken to be the background"""
+    if image.dtype != np.uint8:
+        image = image.astype(np.uint8)
+    background_is_light = image.mean() >= 128
+    return image < 128 if background_is_light else image >= 128
+
+
+def find_text_lines(image):
+    """Return [(top, bottom)] row ranges that contain ink, bottom exclusive"""
+    mask = ink_mask(image)
+    profile = np.count_nonzero(mask, axis=1)
+    is_text = profile > max(1, int(image.shape[1] * ROW_INK_FRACTION))
+    if not is_text.any():
+        return []
+    # Rising and falling edges of the boolean profile delimit the lines
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], is_text.view(np.int8), [0]))))
+    return list(zip(edges[0::2].tolist(), edges[1::2].tolist()))
+
+
+def group_lines(lines, band_count, height):
+    """
+    Group text lines into at most band_count bands of similar height.
+
+    Returns [(top, bottom, gap_before)] where band edges sit in the middle of
+    the whitespace separating neighbouring lines.
+    """
+    if not lines:
+        return []
+    target = max(1, (lines[-1][1] - lines[0][0]) // max(1, band_count))
+    groups = [[lines[0]]]
+    for line in lines[1:]:
+        current = groups[-1]
+        if line[1] - current[0][0] > target and len(groups) < band_count:
+            groups.append([line])
+        else:
+            current.append(line)
+    bands = []
+    for i, group in enumerate(groups):
+        top = 0 if i == 0 else (groups[i - 1][-1][1] + group[0][0]) // 2
+        bottom = height if i == len(groups) - 1 else (group[-1][1] + groups[i + 1][0][0]) // 2
+        gap_before = 0 if i == 0 else group[0][0] - groups[i - 1][-1][1]
+        bands.append((top, bottom, gap_before))
+    return bands
+
+
+def should_split(image, lines):
+    return image.shape[0] * image.shape[1] >= BAND_SPLIT_MIN_PIXELS and len(lines) >= BAND_MIN_LINES
+
+
+def ocr_bands(image, engine, executor, band_count, lines=None, cancel_token=None, extra_config=''):
+    """OCR each band on the executor and join the text in reading order; extra_config is appended to each call"""
+    if lines is None:
+        lines = find_text_lines(image)
+    bands = group_lines(lines, band_count, image.shape[0])
+    if not bands:
+        return ""
+    config = f"--psm {BAND_PSM} {extra_config}".strip()
+    futures = [
+        executor.submit(engine.image_to_string, image[top:bottom], config, cancel_token)
+        for top, bottom, _ in bands
+    ]
+    if cancel_token is not None:
+        # Bands that have not started yet are dropped on cancel
+        cancel_token.on_cancel(lambda: [future.cancel() for future in futures])
+    heights = [bottom - top for top, bottom in lines]
+    line_height = float(np.median(heights)) if heights else 0.0
+    parts = []
+    for (_, _, gap_before), future in zip(bands, futures):
+        try:
+            text = future.result().strip()
+        except concurrent.futures.CancelledError:
+            raise OCRCancelled()
+        if not text:
+            continue
+        if parts:
+            # Keep paragraph breaks that fell exactly on a band edge
+            parts.append("\n\n" if gap_before > 1.5 * line_height else "\n")
+        parts.append(text)
+    return "".join(parts)
@@ -1,6 +1,30 @@
+import importlib
+import os
+import sys
+import time
 from dashboard import DashboardWindow
 
+def report_startup(event):
+    """Startup probe used by benchmarks/bench_startup.py and bench_packaging.py"""
+    started = float(os.environ['SCREEN_OCR_STARTUP_PROBE'])
+    print(f"{event} {time.time() - started:.4f}", flush=True)
+
+def report_first_frame(dashboard):
+    report_startup('first-frame')
+    dashboard.root.after(0, dashboard.root.destroy)
+
+def probe_without_window():
+    """Time to the OCR stack a capture needs, for machines without a display"""
+    importlib.import_module('ocr_pipeline')
+    report_startup('ocr-stack')
+
 if __name__ == "__main__":
+    if os.environ.get('SCREEN_OCR_STARTUP_PROBE'):
+        report_startup('launched')
+        if os.environ.get('SCREEN_OCR_STARTUP_PROBE_HEADLESS'):
+            probe_without_window()
+            sys.exit(0)
     dashboard = DashboardWindow()
-    dashboard.run() 
-  
\ No newline at end of file
+    if os.environ.get('SCREEN_OCR_STARTUP_PROBE'):
+        dashboard.first_frame_callbacks.append(report_first_frame)
+    dashboard.run()
@@ -0,0 +1,161 @@
+import hashlib
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from config import OCR_CACHE_ENABLED, OCR_CACHE_MAX_BYTES, OCR_CACHE_PATH, OCR_CACHE_DISK_MAX_ENTRIES
+
+# Rough per-entry bookkeeping cost (OrderedDict node, key and str objects)
+_ENTRY_OVERHEAD = 200
+
+
+def make_cache_key(image, settings):
+    """Hash the captured pixels together with the pipeline settings"""
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"{image.shape}|{image.dtype}|{settings}".encode('utf-8'))
+    digest.update(memoryview(image if image.flags['C_CONTIGUOUS'] else image.copy()))
+    return digest.hexdigest()
+
+
+class OCRCache:
+    """
+    Content-addressed OCR result cache.
+
+    An in-memory LRU bounded by a byte budget sits in front of an optional
+    SQLite store, so results survive restarts. All methods are thread-safe.
+    """
+
+    def __init__(self, max_bytes=OCR_CACHE_MAX_BYTES, disk_path=None, disk_max_entries=OCR_CACHE_DISK_MAX_ENTRIES):
+        self.max_bytes = max_bytes
+        self.disk_max_entries = disk_max_entries
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._db = None
+        self._disk_writes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if disk_path:
+            try:
+                os.makedirs(os.path.dirname(disk_path) or '.', exist_ok=True)
+                self._db = sqlite3.connect(disk_path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS ocr_cache ("
+                    "key TEXT PRIMARY KEY, text TEXT NOT NULL, accessed REAL NOT NULL)"
+                )
+                self._db.commit()
+            except Exception as e:
+                print(f"OCR cache disk store unavailable, using memory only: {e}", file=sys.stderr)
+                self._db = None
+
+    @staticmethod
+    def _entry_size(key, text):
+        return len(key) + len(text.encode('utf-8')) + _ENTRY_OVERHEAD
+
+    def _store_memory(self, key, text):
+        if key in self._entries:
+            self._bytes -= self._entry_size(key, self._entries.pop(key))
+        size = self._entry_size(key, text)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = text
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            old_key, old_text = self._entries.popitem(last=False)
+            self._bytes -= self._entry_size(old_key, old_text)
+            self.evictions += 1
+
+    def get(self, key):
+        """Return the cached text for key, or None on a miss"""
+        with self._lock:
+            text = self._entries.get(key)
+            if text is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return text
+            if self._db is not None:
+                try:
+                    row = self._db.execute("SELECT text FROM ocr_cache WHERE key = ?", (key,)).fetchone()
+                    if row is not None:
+                        self._db.execute("UPDATE ocr_cache SET accessed = ? WHERE key = ?", (time.time(), key))
+                        self._db.commit()
+                        self._store_memory(key, row[0])
+                        self.hits += 1
+                        self.disk_hits += 1
+                        return row[0]
+                except Exception as e:
+                    print(f"OCR cache disk read failed: {e}", file=sys.stderr)
+            self.misses += 1
+            return None
+
+    def put(self, key, text):
+        with self._lock:
+            self._store_memory(key, text)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO ocr_cache (key, text, accessed) VALUES (?, ?, ?)",
+                        (key, text, time.time())
+                    )
+                    self._disk_writes += 1
+                    if self._disk_writes % 100 == 0:
+                        self._prune_disk()
+                    self._db.commit()
+                except Exception as e:
+                    print(f"OCR cache disk write failed: {e}", file=sys.stderr)
+
+    def _prune_disk(self):
+        # Keep the disk store bounded by dropping least recently used rows
+        self._db.execute(
+            "DELETE FROM ocr_cache WHERE key NOT IN "
+            "(SELECT key FROM ocr_cache ORDER BY accessed DESC LIMIT ?)",
+            (self.disk_max_entries,)
+        )
+
+    def stats(self):
+        """Return hit/miss counters and current memory usage"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            if self._db is not None:
+                self._db.execute("DELETE FROM ocr_cache")
+                self._db.commit()
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Return the process-wide OCR cache, or None when caching is disabled"""
+    global _shared_cache
+    if not OCR_CACHE_ENABLED:
+        return None
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = OCRCache(disk_path=OCR_CACHE_PATH)
+        return _shared_cache
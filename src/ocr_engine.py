@@ -0,0 +1,366 @@
+import io
+import os
+import queue
+import shlex
+import subprocess
+import sys
+import threading
+import numpy as np
+import pytesseract
+from PIL import Image
+from config import OCR_BACKEND, OCR_ENGINE_POOL_SIZE, OCR_LANGUAGE
+from system_utils import get_thread_budget
+from word_boxes import WordBoxes
+
+# OpenMP reads its thread limit when Tesseract is loaded, so the per-job share
+# of the cores is set before the import (tesseract subprocesses inherit it).
+# A limit set in the environment is left alone.
+USER_THREAD_LIMIT = os.environ.get('OMP_THREAD_LIMIT')
+os.environ.setdefault('OMP_THREAD_LIMIT', str(get_thread_budget()[1]))
+
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+
+class OCRCancelled(Exception):
+    """Raised when the capture that requested OCR was abandoned"""
+
+
+class CancelToken:
+    """
+    Cancellation flag shared by one capture's work.
+
+    Engines register callbacks (e.g. killing a tesseract subprocess) that run
+    as soon as cancel() is called from any thread.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Cancel callback failed: {e}", file=sys.stderr)
+
+    def on_cancel(self, callback):
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def remove(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise OCRCancelled()
+
+
+def parse_tesseract_config(config):
+    """Split a pytesseract-style config string into (psm, oem, variables)"""
+    psm = None
+    oem = None
+    variables = {}
+    tokens = shlex.split(config or '')
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token == '--psm' and i + 1 < len(tokens):
+            psm = int(tokens[i + 1])
+            i += 1
+        elif token == '--oem' and i + 1 < len(tokens):
+            oem = int(tokens[i + 1])
+            i += 1
+        elif token == '-c' and i + 1 < len(tokens):
+            key, _, value = tokens[i + 1].partition('=')
+            variables[key] = value
+            i += 1
+        i += 1
+    return psm, oem, variables
+
+
+def find_tessdata_path():
+    """Locate the tessdata directory next to the configured tesseract binary"""
+    if os.environ.get('TESSDATA_PREFIX'):
+        return os.environ['TESSDATA_PREFIX']
+    cmd = pytesseract.pytesseract.tesseract_cmd
+    if cmd and os.path.isabs(cmd):
+        candidate = os.path.join(os.path.dirname(cmd), 'tessdata')
+        if os.path.isdir(candidate):
+            return candidate
+    return None
+
+
+class PytesseractEngine:
+    """Fallback backend: one tesseract subprocess per call via pytesseract"""
+    name = 'pytesseract'
+
+    def __init__(self, lang=OCR_LANGUAGE):
+        self.lang = lang
+
+    def image_to_string(self, image, config='', cancel_token=None):
+        if cancel_token is None:
+            return pytesseract.image_to_string(image, lang=self.lang, config=config)
+        return self._run_cancellable(image, config, cancel_token)
+
+    def _run_cancellable(self, image, config, cancel_token, output=None):
+        """Pipe a PNG through tesseract's stdin/stdout so the process can be killed"""
+        cancel_token.raise_if_cancelled()
+        buffer = io.BytesIO()
+        Image.fromarray(np.asarray(image)).save(buffer, format='PNG')
+        args = [pytesseract.pytesseract.tesseract_cmd, 'stdin', 'stdout', '-l', self.lang]
+        args.extend(shlex.split(config or ''))
+        if output:
+            args.append(output)
+        creationflags = getattr(subprocess, 'CREATE_NO_WINDOW', 0)
+        process = subprocess.Popen(args, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE, creationflags=creationflags)
+        cancel_token.on_cancel(process.kill)
+        try:
+            stdout, stderr = process.communicate(buffer.getvalue())
+        finally:
+            cancel_token.remove(process.kill)
+        cancel_token.raise_if_cancelled()
+        if process.returncode != 0:
+            raise pytesseract.TesseractError(process.returncode, stderr.decode('utf-8', 'replace').strip())
+        return stdout.decode('utf-8', 'replace')
+
+    def image_to_data(self, image, config='', cancel_token=None):
+        """Return (text, WordBoxes) where words carry confidence and bounding boxes"""
+        if cancel_token is None:
+            data = pytesseract.image_to_data(image, lang=self.lang, config=config,
+                                             output_type=pytesseract.Output.DICT)
+        else:
+            tsv = self._run_cancellable(image, config, cancel_token, output='tsv')
+            data = pytesseract.pytesseract.file_to_dict(tsv, '\t', -1)
+        keep = [i for i, text in enumerate(data.get('text', ())) if str(text).strip()]
+        line_ids, para_ids = {}, {}
+        lines, paras = [], []
+        for i in keep:
+            para = (data['page_num'][i], data['block_num'][i], data['par_num'][i])
+            paras.append(para_ids.setdefault(para, len(para_ids)))
+            lines.append(line_ids.setdefault(para + (data['line_num'][i],), len(line_ids)))
+        words = WordBoxes.from_columns(
+            [str(data['text'][i]).strip() for i in keep],
+            [data['left'][i] for i in keep], [data['top'][i] for i in keep],
+            [data['width'][i] for i in keep], [data['height'][i] for i in keep],
+            [float(data['conf'][i]) for i in keep], lines, paras)
+        return words.text(), words
+
+    def close(self):
+        pass
+
+
+class TesseractAPIEngine:
+    """
+    Resident backend built on the Tesseract C API (tesserocr).
+
+    A small pool of initialized PyTessBaseAPI instances is kept alive so the
+    traineddata is loaded once, and grayscale numpy buffers are handed to
+    Tesseract directly instead of going through a temp file and a subprocess.
+    """
+    name = 'tesserocr'
+
+    def __init__(self, lang=OCR_LANGUAGE, pool_size=OCR_ENGINE_POOL_SIZE, tessdata_path=None):
+        if tesserocr is None:
+            raise RuntimeError("tesserocr is not installed")
+        self.lang = lang
+        self.tessdata_path = tessdata_path or find_tessdata_path()
+        self.pool_size = max(1, pool_size)
+        # The engine mode is fixed when an API is initialized, so each --oem
+        # gets its own pool; only the default one is filled up front
+        self._pools = {None: queue.LifoQueue()}
+        self._pool_counts = {None: self.pool_size}
+        self._pools_lock = threading.Lock()
+        self._api_oems = {}
+        self._all_apis = []
+        for _ in range(self.pool_size):
+            self._apis_for(None).put(self._new_api(None))
+
+    def _create_api(self, oem):
+        kwargs = {'lang': self.lang}
+        if self.tessdata_path:
+            kwargs['path'] = self.tessdata_path
+        if oem is not None:
+            kwargs['oem'] = oem
+        return tesserocr.PyTessBaseAPI(**kwargs)
+
+    def _new_api(self, oem):
+        api = self._create_api(oem)
+        with self._pools_lock:
+            self._all_apis.append(api)
+            self._api_oems[id(api)] = oem
+        return api
+
+    def _apis_for(self, oem):
+        with self._pools_lock:
+            if oem not in self._pools:
+                self._pools[oem] = queue.LifoQueue()
+                self._pool_counts[oem] = 0
+            return self._pools[oem]
+
+    def _checkout(self, oem):
+        """Take an idle API for oem, creating one while its pool is below pool_size"""
+        apis = self._apis_for(oem)
+        try:
+            return apis.get_nowait()
+        except queue.Empty:
+            pass
+        with self._pools_lock:
+            create = self._pool_counts[oem] < self.pool_size
+            if create:
+                self._pool_counts[oem] += 1
+        if not create:
+            return apis.get()
+        try:
+            # Raises for a mode the installed traineddata does not support
+            return self._new_api(oem)
+        except Exception:
+            with self._pools_lock:
+                self._pool_counts[oem] -= 1
+            raise
+
+    def _set_image(self, api, image):
+        """Hand a numpy buffer to Tesseract without encoding it"""
+        array = np.asarray(image)
+        if array.dtype != np.uint8:
+            array = array.astype(np.uint8)
+        if array.ndim == 3 and array.shape[2] == 1:
+            array = array[:, :, 0]
+        height, width = array.shape[:2]
+        bytes_per_pixel = 1 if array.ndim == 2 else array.shape[2]
+        # tesserocr only accepts bytes (not memoryviews or arrays) here, so one
+        # copy is unavoidable; tobytes() packs crops and strided views in C
+        # order itself, so nothing copies them to a contiguous array first
+        api.SetImageBytes(array.tobytes(), width, height, bytes_per_pixel, width * bytes_per_pixel)
+
+    def _acquire(self, config):
+        """Check out an API instance configured for config; returns (api, previous variables)"""
+        psm, oem, variables = parse_tesseract_config(config)
+        api = self._checkout(oem)
+        previous = {}
+        try:
+            for key, value in variables.items():
+                previous[key] = api.GetVariableAsString(key)
+                api.SetVariable(key, value)
+            api.SetPageSegMode(psm if psm is not None else tesserocr.PSM.AUTO)
+        except Exception:
+            self._release(api, previous)
+            raise
+        return api, previous
+
+    def _release(self, api, previous):
+        for key, value in previous.items():
+            if value is not None:
+                api.SetVariable(key, value)
+        api.Clear()
+        self._pools[self._api_oems[id(api)]].put(api)
+
+    def image_to_string(self, image, config='', cancel_token=None):
+        # An in-flight C API call cannot be interrupted, so cancellation is
+        # checked before the call and after waiting for a free instance
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        api, previous = self._acquire(config)
+        try:
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            self._set_image(api, image)
+            return api.GetUTF8Text()
+        finally:
+            self._release(api, previous)
+
+    def image_to_data(self, image, config='', cancel_token=None):
+        """Return (text, WordBoxes) from a single recognition pass"""
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        api, previous = self._acquire(config)
+        try:
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            self._set_image(api, image)
+            api.Recognize()
+            texts, lefts, tops, widths, heights, confs, lines, paras = [], [], [], [], [], [], [], []
+            level = tesserocr.RIL.WORD
+            iterator = api.GetIterator()
+            line = para = -1
+            if iterator is not None:
+                for word in tesserocr.iterate_level(iterator, level):
+                    if word.IsAtBeginningOf(tesserocr.RIL.PARA):
+                        para += 1
+                    if word.IsAtBeginningOf(tesserocr.RIL.TEXTLINE):
+                        line += 1
+                    try:
+                        word_text = (word.GetUTF8Text(level) or '').strip()
+                    except RuntimeError:
+                        # Empty results raise instead of returning ''
+                        continue
+                    if not word_text:
+                        continue
+                    left, top, right, bottom = word.BoundingBox(level)
+                    texts.append(word_text)
+                    lefts.append(left)
+                    tops.append(top)
+                    widths.append(right - left)
+                    heights.append(bottom - top)
+                    confs.append(word.Confidence(level))
+                    lines.append(max(line, 0))
+                    paras.append(max(para, 0))
+            # Built from the words like the pytesseract backend, so both give the same text
+            words = WordBoxes.from_columns(texts, lefts, tops, widths, heights, confs, lines, paras)
+            return words.text(), words
+        finally:
+            self._release(api, previous)
+
+    def close(self):
+        for api in self._all_apis:
+            try:
+                api.End()
+            except Exception:
+                pass
+        self._all_apis = []
+
+
+def create_engine(backend=OCR_BACKEND, **kwargs):
+    """Create an OCR engine; 'auto' prefers the resident C API backend"""
+    if backend in ('auto', 'tesserocr'):
+        try:
+            return TesseractAPIEngine(**kwargs)
+        except Exception as e:
+            if backend == 'tesserocr':
+                raise
+            print(f"Resident Tesseract engine unavailable, using pytesseract: {e}", file=sys.stderr)
+    kwargs.pop('pool_size', None)
+    kwargs.pop('tessdata_path', None)
+    return PytesseractEngine(**kwargs)
+
+
+_shared_engine = None
+_shared_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """Return the process-wide OCR engine, creating it on first use"""
+    global _shared_engine
+    with _shared_engine_lock:
+        if _shared_engine is None:
+            _shared_engine = create_engine()
+        return _shared_engine
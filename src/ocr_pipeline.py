@@ -0,0 +1,241 @@
+import concurrent.futures
+import numpy as np
+from ocr_cache import make_cache_key
+from instrumentation import metrics, stage, current_trace
+from binarization import INTEGRAL_METHODS, detect_polarity
+from preprocessing import run_pipeline, describe_pipeline, to_grayscale, with_binarization
+from line_bands import find_text_lines, should_split, ocr_bands
+from layout import layout_config, NO_INVERT
+from ocr_engine import OCRCancelled
+from text_regions import find_text_area
+from escalation import recognize_escalated
+from word_boxes import WordBoxes
+from buffer_pool import get_buffer_pool
+from config import (BAND_WORKERS, LAYOUT_CLASSIFIER_ENABLED, TEXT_DETECTION_ENABLED, TEXT_DETECTION_MIN_GRADIENT,
+                    OCR_EXTRA_CONFIG, ESCALATION_ENABLED, ESCALATION_MIN_CONFIDENCE, PREPROCESSING_PIPELINE,
+                    PROFILE_KEYS)
+
+# Bump whenever enhance_image changes so cached OCR results are not reused
+PIPELINE_VERSION = 'pipeline-v6'
+
+
+def capture_settings(profile=None):
+    """
+    The PROFILE_KEYS settings a capture runs with: those in effect, with the
+    entries of profile (e.g. a configuration being evaluated) in their place.
+    """
+    settings = {
+        'PREPROCESSING_PIPELINE': PREPROCESSING_PIPELINE,
+        'LAYOUT_CLASSIFIER_ENABLED': LAYOUT_CLASSIFIER_ENABLED,
+        'TEXT_DETECTION_ENABLED': TEXT_DETECTION_ENABLED,
+        'TEXT_DETECTION_MIN_GRADIENT': TEXT_DETECTION_MIN_GRADIENT,
+        'OCR_EXTRA_CONFIG': OCR_EXTRA_CONFIG,
+        'ESCALATION_ENABLED': ESCALATION_ENABLED,
+        'ESCALATION_MIN_CONFIDENCE': ESCALATION_MIN_CONFIDENCE,
+    }
+    if profile:
+        settings.update((key, value) for key, value in profile.items() if key in PROFILE_KEYS)
+    return settings
+
+
+def enhance_image(image, buffers=None, binarization=None, pipeline=None):
+    """
+    Enhance image for better OCR results with cross-system compatibility.
+
+    pipeline replaces PREPROCESSING_PIPELINE; binarization overrides its
+    binarize method: 'adaptive', 'otsu', or the integral-image 'sauvola' / 'wolf'.
+    """
+    if pipeline is None:
+        pipeline = PREPROCESSING_PIPELINE
+    if binarization:
+        pipeline = with_binarization(pipeline, binarization)
+    result = run_pipeline(image, pipeline, buffers=buffers)
+    current_trace().set(preprocess=result.as_dict())
+    return result.image
+
+
+def pipeline_settings(engine, config='', profile=None):
+    """Describe everything besides the pixels that affects the OCR output"""
+    settings = capture_settings(profile)
+    layout = 'layout' if settings['LAYOUT_CLASSIFIER_ENABLED'] else 'auto'
+    detect = f"detect{settings['TEXT_DETECTION_MIN_GRADIENT']}" if settings['TEXT_DETECTION_ENABLED'] else 'full'
+    escalate = f"escalate{settings['ESCALATION_MIN_CONFIDENCE']}" if settings['ESCALATION_ENABLED'] else 'enhance'
+    return (f"{PIPELINE_VERSION}|{describe_pipeline(settings['PREPROCESSING_PIPELINE'])}|{layout}|{detect}|"
+            f"{escalate}|{settings['OCR_EXTRA_CONFIG']}|{engine.name}|{engine.lang}|{config}")
+
+
+def locate_text(image, settings=None):
+    """
+    Crop a capture to its text before preprocessing.
+
+    Returns (cropped view, TextArea); the view is None when no text was found,
+    and the TextArea is None when detection is switched off.
+    """
+    if settings is None:
+        settings = capture_settings()
+    if not settings['TEXT_DETECTION_ENABLED']:
+        return image, None
+    with stage('detect'):
+        area = find_text_area(image, settings['TEXT_DETECTION_MIN_GRADIENT'], buffers=get_buffer_pool())
+    pixels = image.shape[0] * image.shape[1]
+    current_trace().set(text_area=area.as_dict())
+    metrics.increment('detect_pixels', pixels)
+    metrics.increment('detect_pixels_skipped', int(round(area.skipped_fraction * pixels)))
+    if area.blank:
+        metrics.increment('detect_blank')
+        return None, area
+    return area.apply(image), area
+
+
+def is_dark_text(image, pipeline=None):
+    """
+    True when the image Tesseract reads is known to be dark text on a light
+    background: the capture itself is, or pipeline always binarizes it with
+    an integral method, which turns light-on-dark text around. Adaptive and
+    Otsu thresholds keep a dark theme's polarity.
+    """
+    for spec in pipeline or ():
+        if (spec['stage'] == 'binarize' and spec.get('method') in INTEGRAL_METHODS
+                and spec.get('when', 'always') == 'always'):
+            return True
+    return not detect_polarity(image)
+
+
+def select_config(enhanced, lines=None, dark_text=False, settings=None):
+    """Tesseract options picked by the layout classifier plus OCR_EXTRA_CONFIG, recorded on the trace"""
+    if settings is None:
+        settings = capture_settings()
+    with stage('layout'):
+        config, layout = layout_config(enhanced, lines, dark_text, settings['LAYOUT_CLASSIFIER_ENABLED'])
+    if layout is not None:
+        current_trace().set(layout=layout.as_dict())
+    return f"{config} {settings['OCR_EXTRA_CONFIG']}".strip()
+
+
+def release_enhanced(pool, enhanced, image):
+    # The pipeline may hand back (a view of) the input when no stage ran
+    if not np.may_share_memory(enhanced, image):
+        pool.release(enhanced)
+
+
+def run_ocr(engine, image, config, executor=None, cancel_token=None):
+    """One Tesseract call, on the executor (the scheduler) when given"""
+    if executor is None:
+        return engine.image_to_string(image, config, cancel_token)
+    future = executor.submit(engine.image_to_string, image, config, cancel_token)
+    if cancel_token is not None:
+        cancel_token.on_cancel(future.cancel)
+    try:
+        return future.result()
+    except concurrent.futures.CancelledError:
+        raise OCRCancelled()
+    finally:
+        if cancel_token is not None:
+            cancel_token.remove(future.cancel)
+
+
+def ocr_image(image, engine, cache=None, executor=None, band_count=BAND_WORKERS, cancel_token=None, profile=None):
+    """
+    Run the capture pipeline (detect + enhance + OCR) on a BGR or grayscale image.
+
+    The capture is cropped to its text first; a blank capture returns '' without
+    running Tesseract. With a cache, a hit on the pixel hash skips preprocessing
+    and OCR entirely. With escalation on, the grayscale crop is OCR'd first and
+    only unsure lines are preprocessed and re-read. With an executor (an OCR
+    scheduler view), Tesseract runs there and large multi-line selections are
+    split into line bands that are enhanced and OCR'd concurrently. A cancelled
+    cancel_token raises OCRCancelled between stages and kills any running
+    tesseract subprocess. profile overrides PROFILE_KEYS settings (see
+    capture_settings), which is how evaluation.py measures configurations.
+    """
+    settings = capture_settings(profile)
+    key = None
+    if cache is not None:
+        mode = f"bands{band_count}" if executor is not None else ''
+        key = make_cache_key(image, pipeline_settings(engine, mode, profile))
+        text = cache.get(key)
+        if text is not None:
+            metrics.increment('cache_hits')
+            return text
+        metrics.increment('cache_misses')
+    cropped, _ = locate_text(image, settings)
+    if cropped is None:
+        # Nothing that looks like text: skip preprocessing and Tesseract
+        text = ''
+        if cache is not None:
+            cache.put(key, text)
+        return text
+    pool = get_buffer_pool()
+    pipeline = settings['PREPROCESSING_PIPELINE']
+    if settings['ESCALATION_ENABLED']:
+        gray = to_grayscale(cropped)
+        with stage('layout'):
+            lines = find_text_lines(gray)
+        if executor is None or not should_split(gray, lines):
+            config = select_config(gray, lines, is_dark_text(gray), settings)
+            text, _, _ = recognize_escalated(gray, engine, config, pipeline, settings['ESCALATION_MIN_CONFIDENCE'],
+                                             extra_config=settings['OCR_EXTRA_CONFIG'], executor=executor,
+                                             cancel_token=cancel_token, buffers=pool)
+            if cache is not None:
+                cache.put(key, text)
+            return text
+    dark_text = is_dark_text(cropped, pipeline)
+    enhanced = enhance_image(cropped, pool, pipeline=pipeline)
+    try:
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        with stage('layout'):
+            lines = find_text_lines(enhanced)
+        if executor is not None and should_split(enhanced, lines):
+            with stage('ocr'):
+                current_trace().set(bands=min(band_count, len(lines)))
+                # Same options select_config gives an unsplit capture, apart from
+                # the fixed band segmentation
+                invert = NO_INVERT if dark_text and settings['LAYOUT_CLASSIFIER_ENABLED'] else ''
+                extra_config = f"{invert} {settings['OCR_EXTRA_CONFIG']}".strip()
+                text = ocr_bands(enhanced, engine, executor, band_count, lines, cancel_token, extra_config)
+        else:
+            config = select_config(enhanced, lines, dark_text, settings)
+            with stage('ocr'):
+                text = run_ocr(engine, enhanced, config, executor, cancel_token).strip()
+    finally:
+        release_enhanced(pool, enhanced, image)
+    if cache is not None:
+        cache.put(key, text)
+    return text
+
+
+def ocr_image_data(image, engine, config='', profile=None):
+    """
+    OCR an image, returning (text, WordBoxes).
+
+    Without an explicit config the layout classifier picks the segmentation mode.
+    Boxes are mapped back to the coordinates of the input image, undoing the
+    text crop and any rescaling done by the pipeline. profile is as for ocr_image.
+    """
+    settings = capture_settings(profile)
+    cropped, area = locate_text(image, settings)
+    if cropped is None:
+        return '', WordBoxes()
+    offset_x, offset_y = area.crop[:2] if area is not None else (0, 0)
+    pool = get_buffer_pool()
+    pipeline = settings['PREPROCESSING_PIPELINE']
+    if settings['ESCALATION_ENABLED']:
+        gray = to_grayscale(cropped)
+        if not config:
+            config = select_config(gray, dark_text=is_dark_text(gray), settings=settings)
+        text, words, _ = recognize_escalated(gray, engine, config, pipeline, settings['ESCALATION_MIN_CONFIDENCE'],
+                                             extra_config=settings['OCR_EXTRA_CONFIG'], buffers=pool)
+        return text, words.transform(offset_x=offset_x, offset_y=offset_y)
+    dark_text = is_dark_text(cropped, pipeline)
+    enhanced = enhance_image(cropped, pool, pipeline=pipeline)
+    try:
+        if not config:
+            config = select_config(enhanced, dark_text=dark_text, settings=settings)
+        with stage('ocr'):
+            text, words = engine.image_to_data(enhanced, config)
+        enhanced_shape = enhanced.shape
+    finally:
+        release_enhanced(pool, enhanced, image)
+    words.transform(cropped.shape[1] / enhanced_shape[1], cropped.shape[0] / enhanced_shape[0], offset_x, offset_y)
+    return text.strip(), words
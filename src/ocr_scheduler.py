@@ -0,0 +1,201 @@
+"""
+Process-wide OCR job scheduler with priority classes.
+
+Every Tesseract call in the process (overlay captures and their line bands,
+watch-mode lines, OCR service requests) runs on one set of workers sized by
+the thread budget, so our parallelism and Tesseract's OpenMP threads share
+the cores instead of multiplying. Queued jobs start in priority order:
+interactive captures before monitor polls before batch work. A running
+Tesseract call cannot be interrupted, so when there are several workers one
+of them is kept free of background work and a hotkey capture never waits
+behind it. Background submissions beyond the queue limit wait or are
+rejected with SchedulerBusy; an interactive job is always admitted and
+pushes the newest background job out of a full queue instead.
+"""
+import concurrent.futures
+import heapq
+import itertools
+import threading
+import time
+from config import OCR_SCHEDULER_QUEUE_SIZE
+from instrumentation import metrics
+from system_utils import get_thread_budget
+
+# Priority classes, most urgent first
+INTERACTIVE = 0
+MONITOR = 1
+BATCH = 2
+PRIORITY_NAMES = {INTERACTIVE: 'interactive', MONITOR: 'monitor', BATCH: 'batch'}
+
+
+class SchedulerBusy(Exception):
+    """Raised when the scheduler queue is full"""
+
+
+class _Job:
+    __slots__ = ('priority', 'future', 'fn', 'args', 'kwargs', 'enqueued')
+
+    def __init__(self, priority, future, fn, args, kwargs):
+        self.priority = priority
+        self.future = future
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.enqueued = time.perf_counter()
+
+
+class PriorityExecutor:
+    """Executor-style view of the scheduler that submits at one priority"""
+
+    def __init__(self, scheduler, priority):
+        self.scheduler = scheduler
+        self.priority = priority
+
+    def submit(self, fn, *args, **kwargs):
+        return self.scheduler.submit(fn, *args, priority=self.priority, **kwargs)
+
+
+class OCRScheduler:
+    def __init__(self, workers=None, queue_size=OCR_SCHEDULER_QUEUE_SIZE):
+        budget_jobs, self.threads_per_job = get_thread_budget(workers) if workers else get_thread_budget()
+        self.workers = max(1, workers or budget_jobs)
+        # With a single worker there is nothing to reserve
+        self.background_limit = max(1, self.workers - 1)
+        self.queue_size = max(1, queue_size)
+        self._heap = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._running_background = 0
+        self.running = 0
+        self.completed = dict.fromkeys(PRIORITY_NAMES, 0)
+        self.rejected = 0
+        self.displaced = 0
+        self._closed = False
+        self._threads = []
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f'ocr-scheduler-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def executor(self, priority):
+        return PriorityExecutor(self, priority)
+
+    def submit(self, fn, *args, priority=BATCH, block=True, timeout=None, **kwargs):
+        """
+        Queue fn(*args, **kwargs) and return a Future.
+
+        When the queue is full, background jobs wait up to timeout seconds
+        (forever by default) for room, or raise SchedulerBusy at once with
+        block=False or when the wait runs out.
+        """
+        future = concurrent.futures.Future()
+        job = _Job(priority, future, fn, args, kwargs)
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError("OCR scheduler is closed")
+                if len(self._heap) < self.queue_size:
+                    break
+                if priority == INTERACTIVE and self._displace_background():
+                    break
+                remaining = None if deadline is None else deadline - time.perf_counter()
+                if not block or (remaining is not None and remaining <= 0):
+                    self.rejected += 1
+                    metrics.increment('scheduler_rejected')
+                    raise SchedulerBusy()
+                self._condition.wait(remaining)
+            heapq.heappush(self._heap, (priority, next(self._sequence), job))
+            self._condition.notify_all()
+        return future
+
+    def _displace_background(self):
+        """Drop the newest lowest-priority background job from a full queue"""
+        victims = [entry for entry in self._heap if entry[0] != INTERACTIVE]
+        if not victims:
+            return False
+        victim = max(victims, key=lambda entry: (entry[0], entry[1]))
+        self._heap.remove(victim)
+        heapq.heapify(self._heap)
+        victim[2].future.set_exception(SchedulerBusy())
+        self.displaced += 1
+        metrics.increment('scheduler_displaced')
+        return True
+
+    def _next_job(self):
+        """Pop the most urgent job this worker may run, waiting as needed; None on close"""
+        with self._condition:
+            while True:
+                if self._heap:
+                    priority = self._heap[0][0]
+                    if priority == INTERACTIVE or self._running_background < self.background_limit:
+                        _, _, job = heapq.heappop(self._heap)
+                        if job.priority != INTERACTIVE:
+                            self._running_background += 1
+                        self.running += 1
+                        # Room in the queue for a waiting submitter
+                        self._condition.notify_all()
+                        return job
+                elif self._closed:
+                    return None
+                self._condition.wait()
+
+    def _worker(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            name = PRIORITY_NAMES.get(job.priority, 'batch')
+            try:
+                if not job.future.set_running_or_notify_cancel():
+                    continue
+                metrics.observe(f"scheduler_{name}_wait", time.perf_counter() - job.enqueued)
+                try:
+                    job.future.set_result(job.fn(*job.args, **job.kwargs))
+                except BaseException as e:
+                    job.future.set_exception(e)
+            finally:
+                with self._condition:
+                    self.running -= 1
+                    if job.priority != INTERACTIVE:
+                        self._running_background -= 1
+                    self.completed[job.priority] = self.completed.get(job.priority, 0) + 1
+                    self._condition.notify_all()
+
+    def stats(self):
+        with self._condition:
+            queued = dict.fromkeys(PRIORITY_NAMES.values(), 0)
+            for priority, _, _ in self._heap:
+                queued[PRIORITY_NAMES.get(priority, 'batch')] += 1
+            return {
+                'workers': self.workers,
+                'threads_per_job': self.threads_per_job,
+                'running': self.running,
+                'queued': queued,
+                'completed': {PRIORITY_NAMES.get(priority, 'batch'): count
+                              for priority, count in self.completed.items()},
+                'rejected': self.rejected,
+                'displaced': self.displaced,
+            }
+
+    def close(self, wait=True):
+        """Stop accepting jobs; queued jobs still run before the workers exit"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+
+_shared_scheduler = None
+_shared_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Return the process-wide OCR scheduler, creating it on first use"""
+    global _shared_scheduler
+    with _shared_scheduler_lock:
+        if _shared_scheduler is None:
+            _shared_scheduler = OCRScheduler()
+        return _shared_scheduler
@@ -0,0 +1,334 @@
+"""
+Localhost OCR service running the capture pipeline (preprocessing + Tesseract).
+
+    POST /ocr[?psm=6&boxes=0]   body: PNG/JPEG/BMP bytes -> {"text", "words", "ms"}
+    GET  /health                queue depth, in-flight jobs, engine
+    GET  /metrics               Prometheus text format
+
+Requests go into a bounded queue. A dispatcher collects whatever arrives
+within a short window and coalesces requests for identical images (same
+pixels and options), so each distinct image is recognized once. When the
+workers are busy the queue fills, and further requests are answered with 503
+and Retry-After instead of piling up.
+
+This is not micro-batching: distinct images are never merged into one
+Tesseract call or scheduler job. Each one is its own OCR call, handed to a
+worker pool sized to the engine's API pool, so coalescing only saves work
+when clients send the same image. Tesseract has no batch API, and the
+resident tesserocr engine's per-call overhead is small, so batching was left
+out.
+
+    python src/ocr_service.py --port 8765
+"""
+import argparse
+import json
+import queue
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import cv2
+import numpy as np
+from config import (SERVICE_HOST, SERVICE_PORT, SERVICE_QUEUE_SIZE, SERVICE_COALESCE_MAX, SERVICE_COALESCE_WINDOW,
+                    SERVICE_REQUEST_TIMEOUT, SERVICE_MAX_IMAGE_BYTES, OCR_ENGINE_POOL_SIZE)
+from instrumentation import metrics, METRIC_PREFIX
+from ocr_cache import make_cache_key
+from ocr_engine import create_engine
+from ocr_pipeline import ocr_image_data, pipeline_settings
+from ocr_scheduler import get_scheduler, BATCH, SchedulerBusy
+
+
+class ServiceBusy(Exception):
+    """Raised when the request queue is full"""
+
+
+class OCRJob:
+    __slots__ = ('image', 'config', 'boxes', 'key', 'enqueued', 'done', 'text', 'words', 'error')
+
+    def __init__(self, image, config='', boxes=True):
+        self.image = image
+        self.config = config
+        self.boxes = boxes
+        self.key = None
+        self.enqueued = time.perf_counter()
+        self.done = threading.Event()
+        self.text = None
+        self.words = None
+        self.error = None
+
+
+class OCRService:
+    def __init__(self, engine=None, workers=OCR_ENGINE_POOL_SIZE, queue_size=SERVICE_QUEUE_SIZE,
+                 coalesce_max=SERVICE_COALESCE_MAX, coalesce_window=SERVICE_COALESCE_WINDOW, scheduler=None):
+        self.workers = max(1, workers)
+        self.engine = engine or create_engine(pool_size=self.workers)
+        self.coalesce_max = max(1, coalesce_max)
+        self.coalesce_window = coalesce_window
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._slots = threading.Semaphore(self.workers)
+        # Recognition runs as batch work on the shared scheduler, behind any
+        # interactive capture in the same process
+        self._executor = (scheduler or get_scheduler()).executor(BATCH)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.requests = 0
+        self.rejected = 0
+        self.windows = 0
+        self.deduplicated = 0
+        self._stop = threading.Event()
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name='ocr-service-dispatch', daemon=True)
+        self._dispatcher.start()
+
+    def submit(self, job):
+        """Queue a job; raises ServiceBusy when the queue is full"""
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                self.rejected += 1
+            metrics.increment('service_rejected')
+            raise ServiceBusy()
+        with self._lock:
+            self.requests += 1
+        metrics.increment('service_requests')
+        return job
+
+    def _collect_window(self):
+        """Jobs that arrive within coalesce_window of the first one"""
+        job = self._queue.get()
+        if job is None:
+            return None
+        window = [job]
+        deadline = time.perf_counter() + self.coalesce_window
+        while len(window) < self.coalesce_max:
+            remaining = deadline - time.perf_counter()
+            try:
+                job = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is None:
+                self._stop.set()
+                break
+            window.append(job)
+        return window
+
+    def _dispatch_loop(self):
+        while not self._stop.is_set():
+            window = self._collect_window()
+            if window is None:
+                break
+            self.windows += 1
+            metrics.increment('service_windows')
+            metrics.increment('service_window_requests', len(window))
+            # Identical images with identical options are recognized once and
+            # the result shared; each distinct image is still its own OCR call
+            # and scheduler job (no batching)
+            groups = {}
+            for job in window:
+                job.key = make_cache_key(job.image, pipeline_settings(self.engine, job.config))
+                groups.setdefault(job.key, []).append(job)
+            self.deduplicated += len(window) - len(groups)
+            metrics.increment('service_deduplicated', len(window) - len(groups))
+            for jobs in groups.values():
+                # Waiting for a free worker here is what lets the queue fill up
+                self._slots.acquire()
+                with self._lock:
+                    self.in_flight += 1
+                future = self._executor.submit(self._run, jobs)
+                future.add_done_callback(lambda future, jobs=jobs: self._check_displaced(future, jobs))
+
+    def _run(self, jobs):
+        first = jobs[0]
+        started = time.perf_counter()
+        try:
+            trace = metrics.start_trace('service')
+            with trace.activate():
+                text, words = ocr_image_data(first.image, self.engine, first.config)
+            trace.finish('ok', chars=len(text), coalesced=len(jobs))
+            for job in jobs:
+                job.text = text
+                job.words = words.as_dicts() if job.boxes else None
+        except Exception as e:
+            print(f"OCR service job failed: {e}")
+            for job in jobs:
+                job.error = str(e)
+        finally:
+            self._finish(jobs, started)
+
+    def _check_displaced(self, future, jobs):
+        # An interactive capture pushed this job out of a full scheduler queue
+        if isinstance(future.exception(), SchedulerBusy):
+            for job in jobs:
+                job.error = "OCR scheduler busy"
+            self._finish(jobs, time.perf_counter())
+
+    def _finish(self, jobs, started):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+        for job in jobs:
+            metrics.observe('service_queue_wait', started - job.enqueued)
+            job.done.set()
+
+    def health(self):
+        with self._lock:
+            return {
+                'status': 'ok' if self._dispatcher.is_alive() else 'stopped',
+                'engine': self.engine.name,
+                'workers': self.workers,
+                'queue_depth': self._queue.qsize(),
+                'queue_limit': self._queue.maxsize,
+                'in_flight': self.in_flight,
+                'requests': self.requests,
+                'rejected': self.rejected,
+                'windows': self.windows,
+                'deduplicated': self.deduplicated,
+                'scheduler': self._executor.scheduler.stats(),
+            }
+
+    def render_prometheus(self):
+        health = self.health()
+        lines = [metrics.render_prometheus().rstrip('\n')]
+        for name in ('queue_depth', 'in_flight'):
+            metric = f"{METRIC_PREFIX}_service_{name}"
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {health[name]}")
+        return "\n".join(line for line in lines if line) + "\n"
+
+    def close(self):
+        self._stop.set()
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        self._dispatcher.join(timeout=5)
+        # In-flight jobs hold the slots; wait for them to finish
+        for _ in range(self.workers):
+            self._slots.acquire()
+        for _ in range(self.workers):
+            self._slots.release()
+
+
+def decode_image(data):
+    """Decode an encoded image to a grayscale or BGR array, or None"""
+    array = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+    if array is None:
+        return None
+    if array.ndim == 3 and array.shape[2] == 4:
+        array = cv2.cvtColor(array, cv2.COLOR_BGRA2BGR)
+    if array.dtype != np.uint8:
+        array = cv2.convertScaleAbs(array, alpha=255.0 / max(1, int(array.max())))
+    return array
+
+
+def _make_handler(service, timeout):
+    class OCRRequestHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def send_json(self, status, payload, headers=None):
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            path = urlparse(self.path).path
+            if path == '/health':
+                self.send_json(200, service.health())
+            elif path == '/metrics':
+                body = service.render_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            else:
+                self.send_json(404, {'error': 'not found'})
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            if url.path != '/ocr':
+                self.send_json(404, {'error': 'not found'})
+                return
+            length = int(self.headers.get('Content-Length') or 0)
+            if length <= 0:
+                self.send_json(400, {'error': 'empty body'})
+                return
+            if length > SERVICE_MAX_IMAGE_BYTES:
+                self.close_connection = True
+                self.send_json(413, {'error': f'image larger than {SERVICE_MAX_IMAGE_BYTES} bytes'})
+                return
+            started = time.perf_counter()
+            image = decode_image(self.rfile.read(length))
+            if image is None:
+                self.send_json(400, {'error': 'body is not a decodable image'})
+                return
+            params = parse_qs(url.query)
+            config = ''
+            if 'psm' in params:
+                try:
+                    config = f"--psm {int(params['psm'][0])}"
+                except ValueError:
+                    self.send_json(400, {'error': 'psm must be an integer'})
+                    return
+            boxes = params.get('boxes', ['1'])[0] not in ('0', 'false')
+            try:
+                job = service.submit(OCRJob(image, config, boxes))
+            except ServiceBusy:
+                self.send_json(503, {'error': 'busy'}, {'Retry-After': '1'})
+                return
+            if not job.done.wait(timeout):
+                self.send_json(504, {'error': 'timed out'})
+                return
+            if job.error is not None:
+                self.send_json(500, {'error': job.error})
+                return
+            elapsed = time.perf_counter() - started
+            metrics.observe('service_request', elapsed)
+            payload = {'text': job.text, 'ms': round(elapsed * 1000, 3)}
+            if boxes:
+                payload['words'] = job.words
+            self.send_json(200, payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return OCRRequestHandler
+
+
+def make_server(service, host=SERVICE_HOST, port=SERVICE_PORT, timeout=SERVICE_REQUEST_TIMEOUT):
+    server = ThreadingHTTPServer((host, port), _make_handler(service, timeout))
+    server.daemon_threads = True
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the OCR pipeline on localhost")
+    parser.add_argument('--host', default=SERVICE_HOST)
+    parser.add_argument('--port', type=int, default=SERVICE_PORT)
+    parser.add_argument('--workers', type=int, default=OCR_ENGINE_POOL_SIZE)
+    parser.add_argument('--backend', default='auto', choices=['auto', 'tesserocr', 'pytesseract'])
+    args = parser.parse_args(argv)
+
+    service = OCRService(create_engine(args.backend, pool_size=args.workers), workers=args.workers)
+    server = make_server(service, args.host, args.port)
+    print(f"OCR service ({service.engine.name}, {service.workers} workers) on "
+          f"http://{args.host}:{server.server_address[1]}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        service.engine.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
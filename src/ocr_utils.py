@@ -3,8 +3,13 @@ import os
 import tempfile
 import urllib.request
 import subprocess
+import shutil
 import pytesseract
-import winreg
+try:
+    import winreg
+except ImportError:
+    # Not on Windows: only the PATH lookup in setup_tesseract_headless applies
+    winreg = None
 from tkinter import messagebox
 from config import TESSERACT_DOWNLOAD_URL, TESSERACT_INSTALLER_NAME
 
@@ -61,4 +66,13 @@ def setup_tesseract():
         return True
     else:
         messagebox.showerror("Error", "Failed to initialize Tesseract OCR")
-        sys.exit(1) 
\ No newline at end of file
+        sys.exit(1)
+
+def setup_tesseract_headless():
+    """Point pytesseract at an installed Tesseract without any dialogs or installs"""
+    tesseract_path = get_tesseract_path()
+    if tesseract_path:
+        pytesseract.pytesseract.tesseract_cmd = os.path.join(tesseract_path, "tesseract.exe")
+        return True
+    # Otherwise rely on a tesseract binary on PATH (Linux/macOS)
+    return shutil.which("tesseract") is not None
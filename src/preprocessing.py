@@ -0,0 +1,328 @@
+"""
+Declarative preprocessing pipeline for OCR.
+
+A pipeline is a list of stage specs such as
+    {'stage': 'denoise', 'when': 'noisy', 'h': 10}
+Each stage runs 'always', 'never', or when a named condition holds for the
+image, judged from cheap statistics (noise estimate, contrast, sharpness,
+size) computed once per image. The result records which stages ran, how
+long they took and why the others were skipped.
+"""
+import hashlib
+import json
+import sys
+import time
+import cv2
+import numpy as np
+from binarization import INTEGRAL_METHODS, binarize
+from config import PREPROCESSING_PIPELINE
+from instrumentation import metrics, stage
+
+# Statistics are computed on at most this many pixels
+STATS_MAX_PIXELS = 1024 * 1024
+STATS_SAMPLE_STRIDE = 2
+
+
+class ImageStats:
+    __slots__ = ('width', 'height', 'noise', 'contrast', 'sharpness', 'text_height')
+
+    def __init__(self, width, height, noise, contrast, sharpness, text_height=None):
+        self.width = width
+        self.height = height
+        self.noise = noise
+        self.contrast = contrast
+        self.sharpness = sharpness
+        self.text_height = text_height
+
+    @property
+    def pixels(self):
+        return self.width * self.height
+
+    def as_dict(self):
+        return {
+            'width': self.width,
+            'height': self.height,
+            'noise': round(self.noise, 2),
+            'contrast': round(self.contrast, 1),
+            'sharpness': round(self.sharpness, 1),
+            'text_height': round(self.text_height, 1) if self.text_height else None,
+        }
+
+
+class PreprocessResult:
+    __slots__ = ('image', 'stats', 'ran', 'skipped')
+
+    def __init__(self, image, stats):
+        self.image = image
+        self.stats = stats
+        self.ran = []       # [(stage name, seconds)]
+        self.skipped = []   # [(stage name, reason)]
+
+    def as_dict(self):
+        return {
+            'stats': self.stats.as_dict(),
+            'ran': {name: round(seconds * 1000, 3) for name, seconds in self.ran},
+            'skipped': dict(self.skipped),
+        }
+
+
+def to_grayscale(image, out=None):
+    """Return a single-channel view of a BGR or grayscale image (converted into out)"""
+    if len(image.shape) == 2:
+        return image
+    if len(image.shape) == 3 and image.shape[2] == 1:
+        return image[:, :, 0]
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=out)
+
+
+def _central_crop(gray, max_pixels):
+    height, width = gray.shape[:2]
+    if height * width <= max_pixels:
+        return gray
+    scale = (max_pixels / float(height * width)) ** 0.5
+    crop_h = max(3, int(height * scale))
+    crop_w = max(3, int(width * scale))
+    top = (height - crop_h) // 2
+    left = (width - crop_w) // 2
+    return gray[top:top + crop_h, left:left + crop_w]
+
+
+# Second-difference kernel from Immerkaer's fast noise estimator; the response
+# to pure Gaussian noise of sigma s has standard deviation 6 * s
+_NOISE_KERNEL = np.array([[1, -2, 1], [-2, 4, -2], [1, -2, 1]], dtype=np.float32)
+
+
+def estimate_text_height(gray):
+    """
+    Median height in pixels of glyph-sized connected components, or None.
+
+    Components are taken from an Otsu binarization in which text is the
+    minority tone; specks, rules and frames are ignored.
+    """
+    if gray.shape[0] < 3 or gray.shape[1] < 3:
+        return None
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    if cv2.countNonZero(binary) > binary.size // 2:
+        binary = cv2.bitwise_not(binary)
+    count, _, components, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+    if count <= 1:
+        return None
+    heights = components[1:, cv2.CC_STAT_HEIGHT]
+    widths = components[1:, cv2.CC_STAT_WIDTH]
+    areas = components[1:, cv2.CC_STAT_AREA]
+    glyphs = (heights >= 3) & (areas >= 4) & (heights < gray.shape[0] * 0.9) & (widths < heights * 8)
+    if np.count_nonzero(glyphs) < 2:
+        return None
+    return float(np.median(heights[glyphs]))
+
+
+def compute_stats(gray):
+    """Cheap per-image statistics used to decide which stages are worth running"""
+    height, width = gray.shape[:2]
+    sample = _central_crop(gray, STATS_MAX_PIXELS)
+    if sample.shape[0] < 3 or sample.shape[1] < 3:
+        return ImageStats(width, height, 0.0, 0.0, 0.0)
+    response = cv2.filter2D(sample, cv2.CV_32F, _NOISE_KERNEL)[1:-1, 1:-1]
+    strided = np.abs(response[::STATS_SAMPLE_STRIDE, ::STATS_SAMPLE_STRIDE])
+    # Median absolute response is robust to the (minority) text edges
+    noise = float(np.median(strided)) / 0.6745 / 6.0
+    low, high = np.percentile(sample[::STATS_SAMPLE_STRIDE, ::STATS_SAMPLE_STRIDE], (5, 95))
+    sharpness = float(cv2.Laplacian(sample, cv2.CV_32F).var())
+    return ImageStats(width, height, noise, float(high - low), sharpness, estimate_text_height(sample))
+
+
+def text_scale_factor(stats, spec):
+    """Resampling factor that brings the text to spec['target_height'], or 1.0"""
+    if not stats.text_height:
+        return 1.0
+    factor = spec.get('target_height', 16.0) / stats.text_height
+    factor = min(spec.get('max_factor', 4.0), max(spec.get('min_factor', 0.25), factor))
+    # Close enough already: resampling would cost more than it gains
+    if abs(factor - 1.0) <= spec.get('tolerance', 0.25):
+        return 1.0
+    return factor
+
+
+# Conditions receive the image statistics and the stage spec
+CONDITIONS = {
+    'always': lambda stats, spec: True,
+    'never': lambda stats, spec: False,
+    'noisy': lambda stats, spec: stats.noise >= spec.get('noise_threshold', 3.0),
+    'low_contrast': lambda stats, spec: stats.contrast < spec.get('contrast_threshold', 80.0),
+    'blurry': lambda stats, spec: stats.sharpness < spec.get('sharpness_threshold', 100.0),
+    'small_image': lambda stats, spec: min(stats.width, stats.height) < spec.get('min_side', 24),
+    'large_image': lambda stats, spec: stats.pixels > spec.get('max_pixels', 4000000),
+    'text_size_off': lambda stats, spec: text_scale_factor(stats, spec) != 1.0,
+}
+
+
+def threshold_image(gray, block_size=11, c=2, out=None):
+    """Apply adaptive thresholding with safe parameters (into out when given)"""
+    try:
+        return cv2.adaptiveThreshold(
+            gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+            cv2.THRESH_BINARY, block_size, c, dst=out
+        )
+    except Exception as e:
+        print(f"Adaptive threshold failed, using simple threshold: {e}", file=sys.stderr)
+        # Fall back to simple thresholding if adaptive fails
+        _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=out)
+        return thresh
+
+
+def denoise_image(thresh, h=10, template_window=7, search_window=21, out=None):
+    """Try to apply noise reduction, but fall back if it fails"""
+    try:
+        return cv2.fastNlMeansDenoising(thresh, out, h, template_window, search_window)
+    except Exception as e:
+        print(f"Denoising failed, using threshold image: {e}", file=sys.stderr)
+        return thresh
+
+
+class HeapBuffers:
+    """Buffer source that simply allocates; used when no pool is given"""
+
+    @staticmethod
+    def acquire(shape, dtype=np.uint8):
+        return np.empty(shape, dtype=dtype)
+
+    @staticmethod
+    def release(array):
+        pass
+
+
+HEAP_BUFFERS = HeapBuffers()
+
+
+# Stages receive the current image, their spec, the image statistics and a
+# buffer source, and write their output into a buffer acquired from it
+def _grayscale_stage(image, spec, stats, buffers):
+    if len(image.shape) == 2:
+        return image
+    return to_grayscale(image, buffers.acquire(image.shape[:2]))
+
+
+def _resize(image, factor, buffers):
+    height = max(1, int(round(image.shape[0] * factor)))
+    width = max(1, int(round(image.shape[1] * factor)))
+    interpolation = cv2.INTER_CUBIC if factor > 1.0 else cv2.INTER_AREA
+    return cv2.resize(image, (width, height), dst=buffers.acquire((height, width)), interpolation=interpolation)
+
+
+def _scale_stage(image, spec, stats, buffers):
+    factor = spec.get('factor', 2.0)
+    if factor == 1.0:
+        return image
+    return _resize(image, factor, buffers)
+
+
+def _normalize_height_stage(image, spec, stats, buffers):
+    # Shrinking big text cuts OCR time with the pixel count; enlarging tiny
+    # UI text gives Tesseract enough pixels per glyph
+    factor = text_scale_factor(stats, spec)
+    if factor == 1.0:
+        return image
+    return _resize(image, factor, buffers)
+
+
+def _binarize_stage(image, spec, stats, buffers):
+    method = spec.get('method', 'adaptive')
+    out = buffers.acquire(image.shape)
+    if method == 'otsu':
+        _, binary = cv2.threshold(image, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=out)
+        return binary
+    if method in INTEGRAL_METHODS:
+        return binarize(image, method, spec.get('window', 25), spec.get('k'), spec.get('polarity', 'auto'), out,
+                        buffers)
+    return threshold_image(image, spec.get('block_size', 11), spec.get('c', 2), out)
+
+
+def _denoise_stage(image, spec, stats, buffers):
+    out = buffers.acquire(image.shape)
+    denoised = denoise_image(image, spec.get('h', 10), spec.get('template_window', 7), spec.get('search_window', 21),
+                             out)
+    if denoised is not out:
+        # Fell back to the input; the buffer was never filled
+        buffers.release(out)
+    return denoised
+
+
+def _sharpen_stage(image, spec, stats, buffers):
+    # Unsharp mask: original + amount * (original - blurred)
+    amount = spec.get('amount', 1.0)
+    blurred = cv2.GaussianBlur(image, (0, 0), spec.get('sigma', 1.0), dst=buffers.acquire(image.shape))
+    sharpened = cv2.addWeighted(image, 1.0 + amount, blurred, -amount, 0, dst=buffers.acquire(image.shape))
+    buffers.release(blurred)
+    return sharpened
+
+
+STAGES = {
+    'grayscale': _grayscale_stage,
+    'scale': _scale_stage,
+    'normalize_height': _normalize_height_stage,
+    'binarize': _binarize_stage,
+    'denoise': _denoise_stage,
+    'sharpen': _sharpen_stage,
+}
+
+
+def with_binarization(pipeline, method):
+    """
+    Copy of a pipeline whose binarize stage uses method. The integral methods
+    average noise over their window, so the denoise stage is dropped for them.
+    """
+    result = []
+    for spec in pipeline:
+        if spec['stage'] == 'binarize':
+            spec = {'stage': 'binarize', 'when': spec.get('when', 'always'), 'method': method}
+        elif spec['stage'] == 'denoise' and method in INTEGRAL_METHODS:
+            continue
+        result.append(spec)
+    return result
+
+
+def describe_pipeline(pipeline=None):
+    """Short stable fingerprint of a pipeline spec, used in cache keys"""
+    spec = json.dumps(pipeline if pipeline is not None else PREPROCESSING_PIPELINE, sort_keys=True)
+    return hashlib.sha1(spec.encode('utf-8')).hexdigest()[:12]
+
+
+def run_pipeline(image, pipeline=None, force=False, buffers=None):
+    """
+    Run a preprocessing pipeline on a BGR or grayscale image.
+
+    force=True runs every stage that is not 'never', ignoring the
+    conditions, which is how benchmarks measure what a skip saved.
+    With a buffer pool, stage outputs are written into pooled buffers and
+    each intermediate is released once the next stage has consumed it; the
+    caller releases result.image when done with it. The input is never
+    released or modified.
+    """
+    if pipeline is None:
+        pipeline = PREPROCESSING_PIPELINE
+    if buffers is None:
+        buffers = HEAP_BUFFERS
+    gray = _grayscale_stage(image, None, None, buffers)
+    stats = compute_stats(gray)
+    result = PreprocessResult(gray, stats)
+    current = gray
+    for spec in pipeline:
+        name = spec['stage']
+        when = spec.get('when', 'always')
+        condition = CONDITIONS.get(when)
+        if condition is None:
+            raise ValueError(f"Unknown preprocessing condition: {when}")
+        if when == 'never' or not (force or condition(stats, spec)):
+            result.skipped.append((name, when))
+            metrics.increment(f"preprocess_{name}_skipped")
+            continue
+        start = time.perf_counter()
+        previous = current
+        with stage(name):
+            current = STAGES[name](current, spec, stats, buffers)
+        if not np.may_share_memory(current, previous) and not np.may_share_memory(previous, image):
+            # The intermediate was ours and has been consumed
+            buffers.release(previous)
+        result.ran.append((name, time.perf_counter() - start))
+    result.image = current
+    return result
@@ -0,0 +1,200 @@
+"""
+Watch a fixed screen region and stream text deltas.
+
+Each poll grabs the region into a reused grayscale buffer and compares a
+downsampled copy with the previous frame. An unchanged frame costs one grab,
+one resize and one absdiff. When pixels change, the region is re-segmented
+into text lines; lines whose pixels were seen before (including lines that
+merely scrolled) reuse their earlier text, and only new lines are OCR'd, at
+monitor priority on the shared OCR scheduler.
+The line list is diffed against the previous one to produce deltas.
+
+    python src/region_monitor.py --region 0,0,800,600 --interval 0.5
+"""
+import argparse
+import difflib
+import hashlib
+import json
+import sys
+import threading
+import time
+import cv2
+import numpy as np
+from config import MONITOR_INTERVAL, MONITOR_DIFF_SCALE, MONITOR_DIFF_THRESHOLD
+from capture_backends import create_backend
+from instrumentation import metrics
+from line_bands import find_text_lines
+from ocr_engine import create_engine
+from ocr_scheduler import get_scheduler, MONITOR
+from preprocessing import run_pipeline
+
+# Single text line
+LINE_PSM = 7
+# Rows of whitespace kept around each line crop
+LINE_PADDING = 4
+# Line texts remembered by pixel hash, so scrolled lines are not re-OCR'd
+LINE_MEMORY = 2048
+
+
+def line_crops(lines, height, padding=LINE_PADDING):
+    """
+    (top, bottom) rows of one crop per text line: the line plus up to padding
+    rows on each side, never past the middle of the gap to a neighbouring
+    line. Fixed padding (rather than the gap) keeps a line's crop identical
+    when it scrolls.
+    """
+    crops = []
+    for i, (top, bottom) in enumerate(lines):
+        upper = 0 if i == 0 else (lines[i - 1][1] + top) // 2
+        lower = height if i == len(lines) - 1 else (bottom + lines[i + 1][0]) // 2
+        crops.append((max(upper, top - padding), min(lower, bottom + padding)))
+    return crops
+
+
+class RegionMonitor:
+    def __init__(self, region, backend=None, engine=None, interval=MONITOR_INTERVAL,
+                 diff_scale=MONITOR_DIFF_SCALE, diff_threshold=MONITOR_DIFF_THRESHOLD, on_delta=None,
+                 scheduler=None):
+        self.x, self.y, self.width, self.height = region
+        self.backend = backend or create_backend()
+        self.engine = engine or create_engine()
+        self.ocr_executor = (scheduler or get_scheduler()).executor(MONITOR)
+        self.interval = interval
+        self.diff_scale = max(1, diff_scale)
+        self.diff_threshold = diff_threshold
+        self.on_delta = on_delta
+        self.lines = []
+        self.polls = 0
+        self.changes = 0
+        self.lines_ocred = 0
+        self.lines_reused = 0
+        self._frame = np.empty((self.height, self.width), dtype=np.uint8)
+        small_size = (max(1, self.height // self.diff_scale), max(1, self.width // self.diff_scale))
+        self._small = np.empty(small_size, dtype=np.uint8)
+        self._previous_small = None
+        self._diff = np.empty(small_size, dtype=np.uint8)
+        self._line_memory = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _frame_changed(self):
+        cv2.resize(self._frame, (self._small.shape[1], self._small.shape[0]),
+                   dst=self._small, interpolation=cv2.INTER_AREA)
+        if self._previous_small is None:
+            self._previous_small = self._small.copy()
+            return True
+        cv2.absdiff(self._small, self._previous_small, dst=self._diff)
+        if int(self._diff.max()) <= self.diff_threshold:
+            return False
+        self._previous_small, self._small = self._small, self._previous_small
+        return True
+
+    def _line_text(self, band):
+        key = hashlib.blake2b(band.tobytes(), digest_size=16).digest() + bytes(str(band.shape), 'ascii')
+        text = self._line_memory.get(key)
+        if text is not None:
+            self.lines_reused += 1
+            metrics.increment('monitor_lines_reused')
+            return text
+        # Interactive captures overtake queued line OCR
+        text = self.ocr_executor.submit(self.engine.image_to_string, run_pipeline(band).image,
+                                        f"--psm {LINE_PSM}").result().strip()
+        self.lines_ocred += 1
+        metrics.increment('monitor_lines_ocr')
+        if len(self._line_memory) >= LINE_MEMORY:
+            self._line_memory.pop(next(iter(self._line_memory)))
+        self._line_memory[key] = text
+        return text
+
+    def _read_lines(self):
+        text_lines = find_text_lines(self._frame)
+        texts = [self._line_text(self._frame[top:bottom])
+                 for top, bottom in line_crops(text_lines, self.height)]
+        return [text for text in texts if text]
+
+    def poll_once(self):
+        """Grab the region once and return the list of deltas (empty if unchanged)"""
+        self.polls += 1
+        self.backend.grab_gray(self.x, self.y, self.width, self.height, out=self._frame)
+        if not self._frame_changed():
+            return []
+        self.changes += 1
+        metrics.increment('monitor_changes')
+        new_lines = self._read_lines()
+        deltas = diff_lines(self.lines, new_lines)
+        self.lines = new_lines
+        return deltas
+
+    def run(self):
+        """Poll until stop() is called, passing deltas to on_delta"""
+        while not self._stop.is_set():
+            started = time.perf_counter()
+            try:
+                for delta in self.poll_once():
+                    if self.on_delta:
+                        self.on_delta(delta)
+            except Exception as e:
+                print(f"Region monitor poll failed: {e}", file=sys.stderr)
+            self._stop.wait(max(0.0, self.interval - (time.perf_counter() - started)))
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def diff_lines(old, new):
+    """Describe how the list of text lines changed, as JSON-ready dicts"""
+    deltas = []
+    matcher = difflib.SequenceMatcher(None, old, new, autojunk=False)
+    for op, i1, i2, j1, j2 in matcher.get_opcodes():
+        if op == 'equal':
+            continue
+        deltas.append({
+            'ts': round(time.time(), 3),
+            'op': op,
+            'line': j1,
+            'removed': old[i1:i2],
+            'added': new[j1:j2],
+        })
+    return deltas
+
+
+def parse_region(value):
+    parts = [int(part) for part in value.split(',')]
+    if len(parts) != 4 or parts[2] <= 0 or parts[3] <= 0:
+        raise argparse.ArgumentTypeError("region must be x,y,width,height")
+    return tuple(parts)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream text deltas from a screen region")
+    parser.add_argument('--region', type=parse_region, required=True, help="x,y,width,height")
+    parser.add_argument('--interval', type=float, default=MONITOR_INTERVAL, help="Seconds between polls")
+    parser.add_argument('--backend', default='auto', help="Capture backend (auto, mss, pyautogui)")
+    args = parser.parse_args(argv)
+
+    def emit(delta):
+        print(json.dumps(delta, ensure_ascii=False), flush=True)
+
+    monitor = RegionMonitor(args.region, backend=create_backend(args.backend),
+                            interval=args.interval, on_delta=emit)
+    try:
+        monitor.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        monitor.backend.close()
+    print(f"{monitor.polls} polls, {monitor.changes} changes, {monitor.lines_ocred} lines OCR'd, "
+          f"{monitor.lines_reused} reused", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+"""Render synthetic text images for benchmarks and offline testing."""
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+SAMPLE_LINES = [
+    "The quick brown fox jumps over the lazy dog.",
+    "Error 0x80070005: Access is denied.",
+    "C:\\Users\\admin\\AppData\\Local\\Temp\\setup.log",
+    "Connection timed out after 30000 ms (retry 3/5)",
+    "Total: $1,284.50  Tax: $102.76  Due: 2024-03-15",
+    "def process_image_async(self, x, y, width, height):",
+    "WARNING: disk usage at 91% on /dev/sda1",
+    "Pack my box with five dozen liquor jugs.",
+]
+
+# Tried in order; PIL's bundled default font is used when none is installed
+FONT_CANDIDATES = {
+    'sans': ['DejaVuSans.ttf', 'arial.ttf', 'segoeui.ttf', 'LiberationSans-Regular.ttf'],
+    'mono': ['DejaVuSansMono.ttf', 'consola.ttf', 'cour.ttf', 'LiberationMono-Regular.ttf'],
+    'serif': ['DejaVuSerif.ttf', 'times.ttf', 'LiberationSerif-Regular.ttf'],
+}
+
+
+def load_font(family, size):
+    for name in FONT_CANDIDATES.get(family, []):
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            continue
+    return ImageFont.load_default(size=size)
+
+
+def text_for_lines(line_count, offset=0):
+    return "\n".join(SAMPLE_LINES[(offset + i) % len(SAMPLE_LINES)] for i in range(line_count))
+
+
+def render_text_image(text, font_size=16, family='sans', noise=0.0, padding=12,
+                      background=255, foreground=0, size=None, seed=0):
+    """
+    Render text to an RGB numpy array, as a screenshot would produce.
+
+    noise is the standard deviation of additive Gaussian noise in gray levels.
+    size=(width, height) pads or crops the canvas to a fixed resolution.
+    """
+    font = load_font(family, font_size)
+    probe = ImageDraw.Draw(Image.new('L', (1, 1)))
+    left, top, right, bottom = probe.multiline_textbbox((0, 0), text, font=font, spacing=font_size // 3)
+    width = right - left + 2 * padding
+    height = bottom - top + 2 * padding
+    if size is not None:
+        width, height = size
+    image = Image.new('L', (width, height), background)
+    ImageDraw.Draw(image).multiline_text(
+        (padding - left, padding - top), text, fill=foreground, font=font, spacing=font_size // 3
+    )
+    array = np.array(image, dtype=np.float32)
+    if noise > 0:
+        rng = np.random.default_rng(seed)
+        array += rng.normal(0.0, noise, array.shape).astype(np.float32)
+    gray = np.clip(array, 0, 255).astype(np.uint8)
+    return np.repeat(gray[:, :, None], 3, axis=2)
@@ -0,0 +1,62 @@
+import multiprocessing
+import sys
+import psutil
+from config import OCR_MAX_CONCURRENT_JOBS
+
+def get_optimal_workers():
+    """
+    Determine the optimal number of worker processes based on system resources.
+    Safely handles systems where resource detection might fail.
+    Diagnostics go to stderr: batch_ocr streams its results on stdout.
+    
+    Returns a tuple of (cpu_count, worker_count) where:
+    - cpu_count: Number of logical CPU cores available
+    - worker_count: Optimal number of worker processes to use
+    """
+    try:
+        # Try to detect CPU count
+        cpu_count = multiprocessing.cpu_count()
+    except Exception:
+        # Default to 2 if detection fails
+        print("Could not detect CPU count, defaulting to 2", file=sys.stderr)
+        cpu_count = 2
+    
+    try:
+        # Try to detect memory
+        mem_gb = psutil.virtual_memory().total / (1024 * 1024 * 1024)
+    except Exception:
+        # Default to 4GB if detection fails
+        print("Could not detect system memory, defaulting to 4GB", file=sys.stderr)
+        mem_gb = 4
+    
+    # Calculate optimal workers based on CPU and memory
+    # Each worker might need ~1GB of memory
+    mem_based_workers = max(1, int(mem_gb / 1.5))
+    cpu_based_workers = max(1, cpu_count - 1)  # Leave one core free for system
+    
+    # Use the smaller of the two to avoid resource exhaustion
+    worker_count = min(mem_based_workers, cpu_based_workers)
+    
+    # Cap at 8 workers to avoid issues on very high-end systems
+    worker_count = min(worker_count, 8)
+    
+    print(f"System has {cpu_count} CPU cores and {mem_gb:.1f}GB RAM", file=sys.stderr)
+    print(f"Using {worker_count} worker processes for optimal performance", file=sys.stderr)
+    
+    return cpu_count, worker_count
+
+
+def get_thread_budget(max_jobs=OCR_MAX_CONCURRENT_JOBS):
+    """
+    Divide the cores between concurrent OCR jobs and Tesseract's own threads.
+
+    Returns (jobs, threads_per_job): at most max_jobs jobs run at once and
+    each gets an equal share of the cores for its OpenMP threads, so the two
+    kinds of parallelism do not oversubscribe the machine.
+    """
+    try:
+        cpu_count = multiprocessing.cpu_count()
+    except Exception:
+        cpu_count = 2
+    jobs = max(1, min(cpu_count, max_jobs))
+    return jobs, max(1, cpu_count // jobs)
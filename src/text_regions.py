@@ -0,0 +1,121 @@
+"""
+Cheap text detection run before preprocessing and OCR.
+
+Text is dense in strong, short edges. A morphological gradient of the
+grayscale capture is thresholded, smeared horizontally so the glyphs of a
+word or line merge, and the resulting connected components are filtered by
+shape: frames, rules, separators and specks are dropped. The capture is then cropped to
+the padded bounding box of the remaining regions (one crop, so the reading
+order Tesseract sees is unchanged), or reported as blank so OCR can be
+skipped altogether.
+"""
+import cv2
+import numpy as np
+from config import TEXT_DETECTION_MIN_GRADIENT
+from preprocessing import to_grayscale, HEAP_BUFFERS
+
+# Detection runs on a downsampled copy above this many pixels
+DETECT_MAX_PIXELS = 2 * 1024 * 1024
+# Component limits in capture pixels
+MIN_REGION_HEIGHT = 4
+MIN_REGION_AREA = 24
+# Components at most RULE_MAX_HEIGHT tall (or wide) and this elongated are
+# rules and separators
+RULE_ASPECT = 20
+RULE_MAX_HEIGHT = 5
+
+
+class TextArea:
+    __slots__ = ('boxes', 'crop', 'skipped_fraction')
+
+    def __init__(self, boxes, crop, skipped_fraction):
+        self.boxes = boxes                          # [(x, y, w, h)] text regions
+        self.crop = crop                            # (x0, y0, x1, y1) or None when blank
+        self.skipped_fraction = skipped_fraction    # share of the capture not OCR'd
+
+    @property
+    def blank(self):
+        return self.crop is None
+
+    def apply(self, image):
+        """View of image restricted to the text crop"""
+        x0, y0, x1, y1 = self.crop
+        return image[y0:y1, x0:x1]
+
+    def as_dict(self):
+        return {
+            'regions': len(self.boxes),
+            'crop': list(self.crop) if self.crop else None,
+            'skipped': round(self.skipped_fraction, 3),
+        }
+
+
+def _edge_components(gray, min_gradient, buffers):
+    """Connected-component stats of the horizontally joined strong edges, or None"""
+    # gradient -> edges -> joined reuse two buffers of the detection size
+    gradient = cv2.morphologyEx(gray, cv2.MORPH_GRADIENT, cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3)),
+                                dst=buffers.acquire(gray.shape))
+    edges = buffers.acquire(gray.shape)
+    try:
+        otsu, _ = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=edges)
+        # The floor keeps flat or noisy backgrounds from producing edges at all
+        cv2.threshold(gradient, max(otsu, min_gradient), 255, cv2.THRESH_BINARY, dst=edges)
+        if not cv2.countNonZero(edges):
+            return None
+        joined = cv2.morphologyEx(edges, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (9, 1)),
+                                  dst=gradient)
+        return cv2.connectedComponentsWithStats(joined, connectivity=8)[2]
+    finally:
+        buffers.release(edges)
+        buffers.release(gradient)
+
+
+def detect_text_boxes(gray, min_gradient=TEXT_DETECTION_MIN_GRADIENT, buffers=HEAP_BUFFERS):
+    """Return [(x, y, w, h)] boxes of likely text lines in a grayscale image"""
+    height, width = gray.shape[:2]
+    scale = 1.0
+    small = None
+    if height * width > DETECT_MAX_PIXELS:
+        scale = (DETECT_MAX_PIXELS / float(height * width)) ** 0.5
+        size = (max(1, int(width * scale)), max(1, int(height * scale)))
+        small = cv2.resize(gray, size, dst=buffers.acquire((size[1], size[0])), interpolation=cv2.INTER_AREA)
+        gray = small
+    try:
+        components = _edge_components(gray, min_gradient, buffers)
+    finally:
+        buffers.release(small)
+    if components is None:
+        return []
+    min_height = max(2, MIN_REGION_HEIGHT * scale)
+    min_area = max(6, MIN_REGION_AREA * scale * scale)
+    boxes = []
+    for x, y, w, h, _ in components[1:].tolist():
+        if h < min_height or w * h < min_area:
+            continue
+        if (h <= RULE_MAX_HEIGHT and w > RULE_ASPECT * h) or (w <= RULE_MAX_HEIGHT and h > RULE_ASPECT * w):
+            continue
+        if w >= 0.98 * gray.shape[1] and h >= 0.98 * gray.shape[0]:
+            # A frame around the whole selection
+            continue
+        boxes.append((x, y, w, h))
+    if scale != 1.0:
+        boxes = [(int(x / scale), int(y / scale), int(np.ceil(w / scale)), int(np.ceil(h / scale)))
+                 for x, y, w, h in boxes]
+    return boxes
+
+
+def find_text_area(image, min_gradient=TEXT_DETECTION_MIN_GRADIENT, buffers=HEAP_BUFFERS):
+    """Locate the text in a BGR or grayscale capture; returns a TextArea"""
+    gray = to_grayscale(image)
+    height, width = gray.shape[:2]
+    boxes = detect_text_boxes(gray, min_gradient, buffers)
+    if not boxes:
+        return TextArea([], None, 1.0)
+    # Pad by about half a line so ascenders and context are kept
+    pad = max(4, int(np.median([h for _, _, _, h in boxes]) * 0.5))
+    x0 = max(0, min(x for x, _, _, _ in boxes) - pad)
+    y0 = max(0, min(y for _, y, _, _ in boxes) - pad)
+    x1 = min(width, max(x + w for x, _, w, _ in boxes) + pad)
+    y1 = min(height, max(y + h for _, y, _, h in boxes) + pad)
+    skipped = 1.0 - (x1 - x0) * (y1 - y0) / float(max(1, height * width))
+    return TextArea(boxes, (int(x0), int(y0), int(x1), int(y1)), float(skipped))
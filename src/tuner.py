@@ -0,0 +1,206 @@
+"""
+Find the fastest OCR configuration that meets a target accuracy.
+
+Searches the preprocessing and Tesseract settings one dimension at a time
+(coordinate descent, repeated until no change helps), scoring every
+candidate on the evaluation corpus. A candidate that meets the target error
+rate beats one that does not; among those that meet it the lowest mean
+latency wins. The winner is saved as a profile the app loads at startup
+(config.PROFILE_PATH) if it beats the settings currently in effect:
+
+    python src/tuner.py [--target-cer 0.02] [--corpus screenshots/] [--output profile.json]
+"""
+import argparse
+import json
+import sys
+import time
+import config
+from evaluation import build_corpus, current_profile, evaluate, recognize, save_profile, variant
+from ocr_engine import create_engine
+
+# Dimension -> values tried; the first value of each is the shipped default
+SEARCH_SPACE = {
+    'text_height': [16.0, 20.0, 24.0, 32.0, None],
+    'binarize': ['adaptive', 'adaptive-wide', 'otsu', 'sauvola', 'wolf', None],
+    'denoise': ['after', 'before', None],
+    'sharpen': ['blurry', None],
+    'segmentation': ['layout', '--psm 6', '--psm 3', '--psm 11'],
+    'invert': ['', '-c tessedit_do_invert=0'],
+    'detect': [True, False],
+    # Lowest word confidence before a line is escalated; None runs the full
+    # pipeline on every capture
+    'escalation': [50, 35, 70, None],
+}
+DEFAULT_PARAMS = {name: values[0] for name, values in SEARCH_SPACE.items()}
+
+# Stage specs used when the base pipeline does not have the stage
+DEFAULT_SPECS = {
+    'normalize_height': {'stage': 'normalize_height', 'when': 'text_size_off', 'target_height': 16.0,
+                         'min_factor': 0.25, 'max_factor': 4.0, 'tolerance': 0.25},
+    'sharpen': {'stage': 'sharpen', 'when': 'blurry', 'sharpness_threshold': 100.0, 'amount': 1.0},
+    'binarize': {'stage': 'binarize', 'method': 'adaptive', 'block_size': 11, 'c': 2},
+    'denoise': {'stage': 'denoise', 'when': 'noisy', 'noise_threshold': 3.0, 'h': 10,
+                'template_window': 7, 'search_window': 21},
+}
+BINARIZE_VARIANTS = {
+    'adaptive': {'method': 'adaptive', 'block_size': 11, 'c': 2},
+    'adaptive-wide': {'method': 'adaptive', 'block_size': 31, 'c': 10},
+    'otsu': {'method': 'otsu'},
+    'sauvola': {'method': 'sauvola'},
+    'wolf': {'method': 'wolf'},
+}
+# Default accuracy target: at most 2 character errors per 100
+DEFAULT_TARGET_CER = 0.02
+# A faster candidate must save at least this share of the latency to count,
+# so timing noise does not flip settings back and forth
+MIN_LATENCY_GAIN = 0.03
+
+
+def _spec(base_pipeline, name, **changes):
+    spec = next((spec for spec in base_pipeline if spec['stage'] == name), DEFAULT_SPECS[name])
+    return dict(spec, **changes)
+
+
+def build_profile(params, base):
+    """Profile for a point of the search space; unsearched spec fields come from base"""
+    pipeline = [{'stage': 'grayscale'}]
+    base_pipeline = base['PREPROCESSING_PIPELINE']
+    if params['text_height'] is not None:
+        pipeline.append(_spec(base_pipeline, 'normalize_height', target_height=params['text_height']))
+    if params['sharpen'] is not None:
+        pipeline.append(_spec(base_pipeline, 'sharpen', when=params['sharpen']))
+    if params['denoise'] == 'before':
+        pipeline.append(_spec(base_pipeline, 'denoise'))
+    if params['binarize'] is not None:
+        pipeline.append(_spec(base_pipeline, 'binarize', **BINARIZE_VARIANTS[params['binarize']]))
+    if params['denoise'] == 'after':
+        pipeline.append(_spec(base_pipeline, 'denoise'))
+    layout = params['segmentation'] == 'layout'
+    options = [params['invert']] if layout else [params['segmentation'], params['invert']]
+    escalation = params['escalation']
+    if escalation is None:
+        escalation = base['ESCALATION_MIN_CONFIDENCE']
+    return variant(base, PREPROCESSING_PIPELINE=pipeline, LAYOUT_CLASSIFIER_ENABLED=layout,
+                   TEXT_DETECTION_ENABLED=params['detect'], OCR_EXTRA_CONFIG=" ".join(filter(None, options)),
+                   ESCALATION_ENABLED=params['escalation'] is not None, ESCALATION_MIN_CONFIDENCE=escalation)
+
+
+def better(candidate, best, target_cer, target_wer=None):
+    """True when evaluation candidate should replace best"""
+    def meets(evaluation):
+        return evaluation.cer <= target_cer and (target_wer is None or evaluation.wer <= target_wer)
+    if meets(candidate) != meets(best):
+        return meets(candidate)
+    if not meets(candidate):
+        return candidate.cer < best.cer
+    return candidate.mean_latency < best.mean_latency * (1.0 - MIN_LATENCY_GAIN)
+
+
+class Tuner:
+    """Coordinate-descent search over SEARCH_SPACE with memoized evaluations"""
+
+    def __init__(self, corpus, engine, base, target_cer, target_wer=None, runs=1, log=print):
+        self.corpus = corpus
+        self.engine = engine
+        self.base = base
+        self.target_cer = target_cer
+        self.target_wer = target_wer
+        self.runs = runs
+        self.log = log
+        self._evaluations = {}
+
+    def evaluate(self, params):
+        key = json.dumps(params, sort_keys=True)
+        if key not in self._evaluations:
+            evaluation = evaluate(self.corpus, self.engine, build_profile(params, self.base), self.runs)
+            self._evaluations[key] = evaluation
+            self.log(f"  {describe_params(params):<70} CER {evaluation.cer:.3f} WER {evaluation.wer:.3f} "
+                     f"{evaluation.mean_latency * 1000:7.1f} ms")
+        return self._evaluations[key]
+
+    @property
+    def evaluations(self):
+        return len(self._evaluations)
+
+    def search(self, start=None, max_passes=3):
+        """Return (params, evaluation) of the best point found"""
+        best_params = dict(start or DEFAULT_PARAMS)
+        best = self.evaluate(best_params)
+        for i in range(max_passes):
+            changed = False
+            for name, values in SEARCH_SPACE.items():
+                for value in values:
+                    if value == best_params[name]:
+                        continue
+                    params = dict(best_params, **{name: value})
+                    evaluation = self.evaluate(params)
+                    if better(evaluation, best, self.target_cer, self.target_wer):
+                        best_params, best, changed = params, evaluation, True
+            self.log(f"pass {i + 1}: {describe_params(best_params)}")
+            if not changed:
+                break
+        return best_params, best
+
+
+def describe_params(params):
+    return " ".join(f"{name}={params[name]}" for name in SEARCH_SPACE)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tune OCR settings for latency at a target accuracy")
+    parser.add_argument('--target-cer', type=float, default=DEFAULT_TARGET_CER,
+                        help="Highest acceptable character error rate")
+    parser.add_argument('--target-wer', type=float, help="Highest acceptable word error rate")
+    parser.add_argument('--corpus', action='append', help="Directory of name.png + name.gt.txt pairs (repeatable)")
+    parser.add_argument('--no-synthetic', action='store_true', help="Only use the --corpus directories")
+    parser.add_argument('--runs', type=int, default=1, help="Timed runs per sample and candidate")
+    parser.add_argument('--passes', type=int, default=3)
+    parser.add_argument('--output', default=config.PROFILE_PATH, help="Where to save the profile")
+    parser.add_argument('--dry-run', action='store_true', help="Report the result without saving it")
+    parser.add_argument('--backend', default='auto', choices=['auto', 'tesserocr', 'pytesseract'])
+    args = parser.parse_args(argv)
+
+    corpus = build_corpus(args.corpus, not args.no_synthetic)
+    if not corpus:
+        print("The corpus is empty")
+        return 1
+    base = current_profile()
+    engine = create_engine(args.backend, pool_size=1)
+    start = time.perf_counter()
+    try:
+        recognize(corpus[0].image, engine, base)
+        baseline = evaluate(corpus, engine, base, args.runs)
+        target_cer = args.target_cer
+        print(f"{len(corpus)} samples; current settings: CER {baseline.cer:.3f} WER {baseline.wer:.3f} "
+              f"{baseline.mean_latency * 1000:.1f} ms; target CER <= {target_cer:.3f}")
+        tuner = Tuner(corpus, engine, base, target_cer, args.target_wer, args.runs)
+        params, best = tuner.search(max_passes=args.passes)
+    finally:
+        engine.close()
+    print(f"Searched {tuner.evaluations} configurations in {time.perf_counter() - start:.0f}s")
+    print(f"Best: {describe_params(params)}")
+    print(f"      CER {best.cer:.3f} WER {best.wer:.3f} {best.mean_latency * 1000:.1f} ms "
+          f"({baseline.mean_latency / max(best.mean_latency, 1e-9):.2f}x the current speed)")
+    if not better(best, baseline, target_cer, args.target_wer):
+        print("The current settings are already at least as good; nothing saved")
+        return 0
+    if best.cer > target_cer or (args.target_wer is not None and best.wer > args.target_wer):
+        print("No configuration met the target; the most accurate one is reported")
+    if args.dry_run:
+        return 0
+    save_profile(args.output, build_profile(params, base), best, tuned={
+        'params': params,
+        'target_cer': target_cer,
+        'target_wer': args.target_wer,
+        'samples': len(corpus),
+        'baseline': baseline.as_dict(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    })
+    print(f"Saved profile to {args.output}")
+    if args.output != config.PROFILE_PATH:
+        print(f"Set SCREEN_OCR_PROFILE={args.output} to use it")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""
+Compact column store for recognized words.
+
+Word boxes used to be one dict per word. A full page has thousands of
+words, and escalation asks per-line questions (which lines are unsure, what
+is their box) and then splices re-recognized lines back in. Keeping the
+boxes, confidences and line numbers in numpy columns makes those
+operations vectorized. Only the word strings stay in a Python list.
+"""
+import numpy as np
+
+
+class WordBoxes:
+    """
+    Words in reading order with their boxes, confidences, line and paragraph numbers.
+
+    boxes is an (n, 4) int32 array of left, top, width, height; conf is the
+    Tesseract word confidence (0-100); line and paragraph numbers never
+    decrease along the words, so each line and paragraph is a contiguous run.
+    """
+    __slots__ = ('texts', 'boxes', 'conf', 'line', 'para')
+
+    def __init__(self, texts=(), boxes=None, conf=None, line=None, para=None):
+        self.texts = list(texts)
+        count = len(self.texts)
+        self.boxes = np.zeros((count, 4), dtype=np.int32) if boxes is None else np.asarray(boxes, dtype=np.int32)
+        self.conf = np.zeros(count, dtype=np.float32) if conf is None else np.asarray(conf, dtype=np.float32)
+        self.line = np.zeros(count, dtype=np.int32) if line is None else np.asarray(line, dtype=np.int32)
+        self.para = np.zeros(count, dtype=np.int32) if para is None else np.asarray(para, dtype=np.int32)
+
+    @classmethod
+    def from_columns(cls, texts, lefts, tops, widths, heights, confs, lines, paras=None):
+        boxes = np.empty((len(texts), 4), dtype=np.int32)
+        if len(texts):
+            boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3] = lefts, tops, widths, heights
+        return cls(texts, boxes, confs, lines, paras)
+
+    def __len__(self):
+        return len(self.texts)
+
+    def lines(self):
+        """Return (line numbers, start indices, end indices) of the runs of words per line"""
+        if not len(self):
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, empty
+        starts = np.flatnonzero(np.diff(self.line, prepend=self.line[0] - 1))
+        ends = np.append(starts[1:], len(self))
+        return self.line[starts], starts, ends
+
+    def line_confidence(self):
+        """Return (line numbers, mean confidence, lowest confidence) per line"""
+        numbers, starts, ends = self.lines()
+        if not len(numbers):
+            return numbers, np.empty(0, dtype=np.float32), np.empty(0, dtype=np.float32)
+        means = np.add.reduceat(self.conf, starts) / (ends - starts)
+        return numbers, means, np.minimum.reduceat(self.conf, starts)
+
+    def line_box(self, start, end):
+        """(x0, y0, x1, y1) bounding the words start:end"""
+        boxes = self.boxes[start:end]
+        return (int(boxes[:, 0].min()), int(boxes[:, 1].min()),
+                int((boxes[:, 0] + boxes[:, 2]).max()), int((boxes[:, 1] + boxes[:, 3]).max()))
+
+    def transform(self, scale_x=1.0, scale_y=1.0, offset_x=0, offset_y=0):
+        """Map boxes from a resized/cropped image back to the original, in place"""
+        if not len(self):
+            return self
+        if scale_x != 1.0 or scale_y != 1.0:
+            scaled = self.boxes * np.array([scale_x, scale_y, scale_x, scale_y])
+            self.boxes = np.rint(scaled).astype(np.int32)
+        if offset_x or offset_y:
+            self.boxes[:, 0] += offset_x
+            self.boxes[:, 1] += offset_y
+        return self
+
+    def splice(self, replacements):
+        """
+        Return a copy where whole lines are swapped for other WordBoxes.
+
+        replacements maps a line number to the words that replace it, which
+        may span several lines of their own; they join the paragraph of the
+        line they replace. Lines are renumbered in order.
+        Untouched lines are copied as whole slices, so the cost grows with the
+        number of replaced lines rather than the size of the page.
+        """
+        numbers, starts, ends = self.lines()
+        texts, boxes, conf, line, para = [], [], [], [], []
+        position = 0
+        for index in np.flatnonzero(np.isin(numbers, list(replacements))).tolist():
+            start, end = int(starts[index]), int(ends[index])
+            part = replacements[int(numbers[index])]
+            for source, first, last in ((self, position, start), (part, 0, len(part))):
+                texts.extend(source.texts[first:last])
+                boxes.append(source.boxes[first:last])
+                conf.append(source.conf[first:last])
+                line.append(source.line[first:last])
+            para.append(self.para[position:start])
+            para.append(np.full(len(part), self.para[start], dtype=np.int32))
+            position = end
+        texts.extend(self.texts[position:])
+        boxes.append(self.boxes[position:])
+        conf.append(self.conf[position:])
+        line.append(self.line[position:])
+        para.append(self.para[position:])
+        if not texts:
+            return WordBoxes()
+        # Line numbers only ascend within each piece; key them by piece so
+        # that one cumulative count renumbers the whole result
+        pieces = np.repeat(np.arange(len(line), dtype=np.int64), [len(part) for part in line])
+        keys = (pieces << 32) | np.concatenate(line).astype(np.int64)
+        renumbered = np.concatenate(([0], np.cumsum(np.diff(keys) != 0)))
+        return WordBoxes(texts, np.concatenate(boxes), np.concatenate(conf), renumbered, np.concatenate(para))
+
+    def text(self):
+        """Plain text, one output line per recognized line and a blank line between paragraphs"""
+        _, starts, ends = self.lines()
+        if not len(starts):
+            return ''
+        breaks = np.diff(self.para[starts]) != 0
+        parts = [" ".join(self.texts[starts[0]:ends[0]])]
+        for start, end, new_para in zip(starts[1:].tolist(), ends[1:].tolist(), breaks.tolist()):
+            parts.append("\n\n" if new_para else "\n")
+            parts.append(" ".join(self.texts[start:end]))
+        return "".join(parts)
+
+    def as_dicts(self):
+        """JSON-ready list of words"""
+        return [
+            {'text': text, 'conf': round(conf, 2), 'left': left, 'top': top, 'width': width, 'height': height,
+             'line': line}
+            for text, (left, top, width, height), conf, line
+            in zip(self.texts, self.boxes.tolist(), self.conf.tolist(), self.line.tolist())
+        ]